@@ -127,6 +127,119 @@ template MultiMerkleTreeCheckerPoseidon2(number, level1, level2) {
     }
 }
 
+// Computes Poseidon2 over four children in compression mode: Poseidon2Ex(4).out[0] + in[0]
+template HashQuadPoseidon2() {
+    signal input in[4];
+    signal output hash;
+
+    component hasher = Poseidon2Ex(4);
+    for (var i = 0; i < 4; i++) {
+        hasher.inputs[i] <== in[i];
+    }
+    hash <== hasher.out[0] + in[0];
+}
+
+// Places in at position s (0..3) among the three siblings, which keep their order
+template QuadMux() {
+    signal input in;
+    signal input siblings[3];
+    signal input s;
+    signal output out[4];
+
+    signal b[2];
+    b[0] <-- s & 1;
+    b[1] <-- (s >> 1) & 1;
+    b[0] * (1 - b[0]) === 0;
+    b[1] * (1 - b[1]) === 0;
+    s === b[0] + 2 * b[1];
+
+    signal both;
+    both <== b[0] * b[1];
+    // is[j] = (s == j), above[j] = (s > j)
+    var is[4] = [1 - b[0] - b[1] + both, b[0] - both, b[1] - both, both];
+    var above[3] = [b[0] + b[1] - both, b[1], both];
+
+    signal swap[4];
+    signal shift[2];
+    for (var j = 0; j < 4; j++) {
+        swap[j] <== is[j] * (in - siblings[j == 0 ? 0 : j - 1]);
+    }
+    for (var j = 1; j < 3; j++) {
+        shift[j - 1] <== above[j] * (siblings[j] - siblings[j - 1]);
+    }
+    out[0] <== siblings[0] + swap[0];
+    out[1] <== siblings[0] + swap[1] + shift[0];
+    out[2] <== siblings[1] + swap[2] + shift[1];
+    out[3] <== siblings[2] + swap[3];
+}
+
+// Verifies a path in an arity-4 tree: pathElements[i] are the three other children at level i
+// in position order and pathIndices[i] in 0..3 is the position of the path node
+template QuadMerkleTreeCheckerPoseidon2(levels) {
+    signal input leaf;
+    signal input root;
+    signal input pathElements[levels][3];
+    signal input pathIndices[levels];
+
+    component selectors[levels];
+    component hashers[levels];
+
+    for (var i = 0; i < levels; i++) {
+        selectors[i] = QuadMux();
+        selectors[i].in <== i == 0 ? leaf : hashers[i - 1].hash;
+        for (var j = 0; j < 3; j++) {
+            selectors[i].siblings[j] <== pathElements[i][j];
+        }
+        selectors[i].s <== pathIndices[i];
+
+        hashers[i] = HashQuadPoseidon2();
+        for (var j = 0; j < 4; j++) {
+            hashers[i].in[j] <== selectors[i].out[j];
+        }
+    }
+    root === hashers[levels - 1].hash;
+}
+
+template MultiQuadMerkleTreeCheckerPoseidon2(number, level1, level2) {
+    signal input leaves[number];
+
+    signal input root1[number];
+    signal input pathElements1[number][level1][3];
+    signal input pathIndices1[number][level1];
+
+    signal input root2[number];
+    signal input pathElements2[number][level2][3];
+    signal input pathIndices2[number][level2];
+
+    // Check root2 existence in the Layer 1 Merkle tree
+    component ph1[number];
+    for (var i = 0; i < number; i++) {
+        ph1[i] = QuadMerkleTreeCheckerPoseidon2(level1);
+        ph1[i].leaf <== root2[i];
+        ph1[i].root <== root1[i];
+        for (var j = 0; j < level1; j++) {
+            for (var k = 0; k < 3; k++) {
+                ph1[i].pathElements[j][k] <== pathElements1[i][j][k];
+            }
+            ph1[i].pathIndices[j] <== pathIndices1[i][j];
+        }
+    }
+
+    // Check leaves existence in the Layer 2 Merkle tree (root2)
+    component ph2[number];
+    for (var i = 0; i < number; i++) {
+        ph2[i] = QuadMerkleTreeCheckerPoseidon2(level2);
+        ph2[i].leaf <== leaves[i];
+        ph2[i].root <== root2[i];
+        for (var j = 0; j < level2; j++) {
+            for (var k = 0; k < 3; k++) {
+                ph2[i].pathElements[j][k] <== pathElements2[i][j][k];
+            }
+            ph2[i].pathIndices[j] <== pathIndices2[i][j];
+        }
+    }
+}
+
 template Sigma() {
     signal input in;
     signal output out;
@@ -0,0 +1,41 @@
+'use strict';
+const fs = require("fs");
+const { utils, getCurveFromName } = require("ffjavascript");
+const { Poseidon2, F1Field } = require("poseidon2");
+const { getPoseidon2Params } = require("../src/utils");
+const poseidon2Constants = require("../src/poseidon2_constants.js");
+const { MAT_DIAG3_M_1, MAT_INTERNAL3, RC3 } = utils.unstringifyBigInts(poseidon2Constants);
+
+/**
+ * Hashes shared Poseidon2 vectors with the `poseidon2` package and the parameters of
+ * poseidon2_hash in src/utils.js, for stealthhub/bench_poseidon2.py.
+ * Usage: node scripts/bench_poseidon2.js <vectors.json> <output.json>
+ * vectors.json: { "vectors": [[a, b, c], ...], "repeat": n }
+ */
+async function main() {
+    const [inputPath, outputPath] = process.argv.slice(2);
+    const { vectors, repeat } = JSON.parse(fs.readFileSync(inputPath, "utf8"));
+
+    // Build the permutation once; poseidon2_hash rebuilds the curve on every call
+    const curve = await getCurveFromName("bn128", true);
+    const F = new F1Field(curve.r);
+    const poseidon2 = new Poseidon2(getPoseidon2Params(3, 5, 8, 56, MAT_DIAG3_M_1, MAT_INTERNAL3, RC3), F);
+    const inputs = vectors.map(v => v.map(x => BigInt(x)));
+
+    let outputs = [];
+    const start = process.hrtime.bigint();
+    for (let r = 0; r < repeat; r++) {
+        outputs = inputs.map(v => poseidon2.permute(v)[0]);
+    }
+    const seconds = Number(process.hrtime.bigint() - start) / 1e9;
+
+    fs.writeFileSync(outputPath, JSON.stringify({ outputs: outputs.map(x => x.toString()), seconds: seconds / repeat }));
+    await curve.terminate();
+}
+
+main()
+    .then(() => process.exit(0))
+    .catch((error) => {
+        console.error("Error:", error);
+        process.exit(1);
+    });
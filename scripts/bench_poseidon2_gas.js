@@ -0,0 +1,42 @@
+'use strict';
+const { ethers } = require("hardhat");
+const fs = require("fs");
+// ---------------------------
+// Configuration
+// ---------------------------
+// Written by stealthhub/bench_poseidon2.py: { "vectors": [[a, b], ...] }
+const VECTORS_PATH = process.env.POSEIDON2_VECTORS;
+const OUTPUT_PATH = process.env.POSEIDON2_GAS_OUTPUT;
+
+async function main() {
+    const { vectors } = JSON.parse(fs.readFileSync(VECTORS_PATH, "utf8"));
+
+    // Deploy Poseidon2 hash function
+    const poseidon2Factory = await ethers.getContractFactory("Poseidon2Yul");
+    const poseidon2 = await poseidon2Factory.deploy();
+    await poseidon2.waitForDeployment();
+    const poseidon2Address = await poseidon2.getAddress();
+    console.log("Poseidon2 deployed at:", poseidon2Address);
+
+    const coder = ethers.AbiCoder.defaultAbiCoder();
+    const outputs = [];
+    const gas = [];
+    for (const vector of vectors) {
+        // Same calldata as callPoseidon2Yul in Imt.sol: abi.encode(input1, input2)
+        const data = coder.encode(vector.map(() => "uint256"), vector.map(x => BigInt(x)));
+        const result = await ethers.provider.call({ to: poseidon2Address, data });
+        const estimate = await ethers.provider.estimateGas({ to: poseidon2Address, data });
+        outputs.push(BigInt(result).toString());
+        gas.push(estimate.toString());
+    }
+
+    fs.writeFileSync(OUTPUT_PATH, JSON.stringify({ outputs, gas }, null, 2));
+    console.log(`Poseidon2Yul gas data saved to ${OUTPUT_PATH}`);
+}
+
+main()
+    .then(() => process.exit(0))
+    .catch((error) => {
+        console.error("Error:", error);
+        process.exit(1);
+    });
@@ -0,0 +1,80 @@
+'use strict';
+const { ethers } = require("hardhat");
+const fs = require("fs");
+
+/**
+ * Deploys the contracts of one scripts/test*.js measurement and writes everything
+ * stealthhub/gas_bench.py needs to pre-sign the same call many times.
+ * Usage: GAS_BENCH_TARGET=shm_dep GAS_BENCH_OUTPUT=plan.json npx hardhat run scripts/gas_bench_prepare.js --network localhost
+ * Targets: shi_dep, shi_st, shm_dep, shm_st, sha_dep, sha_st
+ */
+const INITIAL_ROOT = "0xf46a7a418a6466497be26636a906ad8efd56f663199b679e63e70bc8666566cf";
+const SAMPLE_COMMITMENT = "0x006a7a418a6466497be26636a906ad8efd56f663199b679e63e70bc8666566cf";
+const SAMPLE_DEPOSIT_VALUE = 100000000000n;
+const SAMPLE_ETHER_VALUE = ethers.parseEther("0.0000001");
+const Height = 31;
+const zkProof = [["0x26472964da7eafd6bfddbcc5556b87e069b98649afb918d5ffb99f2eb18a2536", "0x077db48ba7bc9ab0e1305276d3d6d2f0f6ea994c91ae3f2b70bcd34d8acfab04"], [["0x1dd86a393222110fb157ad41470271e68f6268b4029f9c70f392099e4bb22c9b", "0x09a387779963a97c5d126f46dfc85a0f4f5be60fccc820feed335f2e410ccf42"], ["0x0d60f88d1861131fd4555d124b01f1b44d4aa2f45130bcbbec496257ef9261e0", "0x2c9f7aa08444e6057cc390fd876c8a29013da8ef2925074143c80b57763b41b1"]], ["0x0c2def9770b76eab8c29ab82c98c50c729d1f8994695e06f5f2cae9605d510ed", "0x1be4185e550200f86bdc749aac64fd3dd7986a69dc7f0516bf414949a990ec05"], ["0x0000000000000000000000000000000000000000000000000000000000000001"]]
+
+// Contract, last constructor argument and call of each test script
+const TARGETS = {
+    shi_dep: ["EthShi", Height, (c) => c.deposit.populateTransaction(SAMPLE_COMMITMENT, SAMPLE_DEPOSIT_VALUE, { value: SAMPLE_ETHER_VALUE })],
+    shi_st: ["EthShi", Height, (c) => c.shieldedTransfer.populateTransaction(SAMPLE_COMMITMENT, SAMPLE_COMMITMENT, zkProof, SAMPLE_DEPOSIT_VALUE)],
+    shm_dep: ["EthShm", INITIAL_ROOT, (c) => c.deposit.populateTransaction(SAMPLE_COMMITMENT, SAMPLE_DEPOSIT_VALUE, { value: SAMPLE_ETHER_VALUE })],
+    shm_st: ["EthShm", INITIAL_ROOT, (c) => c.shieldedTransfer.populateTransaction(SAMPLE_COMMITMENT, SAMPLE_COMMITMENT, zkProof, SAMPLE_DEPOSIT_VALUE)],
+    sha_dep: ["EthSha", INITIAL_ROOT, (c) => c.deposit.populateTransaction(SAMPLE_COMMITMENT, zkProof, SAMPLE_DEPOSIT_VALUE, { value: SAMPLE_ETHER_VALUE })],
+    sha_st: ["EthSha", INITIAL_ROOT, (c) => c.shieldedTransfer.populateTransaction(SAMPLE_COMMITMENT, zkProof, SAMPLE_DEPOSIT_VALUE)],
+};
+
+async function deploy(name, ...args) {
+    const factory = await ethers.getContractFactory(name);
+    const contract = await factory.deploy(...args);
+    await contract.waitForDeployment();
+    return contract;
+}
+
+async function main() {
+    const target = process.env.GAS_BENCH_TARGET;
+    if (!(target in TARGETS)) {
+        throw new Error(`GAS_BENCH_TARGET must be one of ${Object.keys(TARGETS).join(", ")}`);
+    }
+    const [contractName, lastArg, call] = TARGETS[target];
+
+    const poseidon2 = await deploy("Poseidon2Yul");
+    const verifier1 = await deploy("Groth16Verifier");
+    const verifier2 = await deploy("Groth16Verifier");
+    const pool = await deploy(contractName, await verifier1.getAddress(), await verifier2.getAddress(), await poseidon2.getAddress(), lastArg);
+    const tx = await call(pool);
+
+    // A fresh sender whose key the signer can use; hardhat and anvil both accept hardhat_setBalance
+    const sender = ethers.Wallet.createRandom();
+    await ethers.provider.send("hardhat_setBalance", [sender.address, "0x" + ethers.parseEther("1000000").toString(16)]);
+    const estimate = await ethers.provider.estimateGas({ ...tx, from: sender.address });
+    const network = await ethers.provider.getNetwork();
+    const fee = await ethers.provider.getFeeData();
+
+    const plan = {
+        target,
+        contract: await pool.getAddress(),
+        chainId: network.chainId.toString(),
+        sender: sender.address,
+        privateKey: sender.privateKey,
+        tx: {
+            to: tx.to,
+            data: tx.data,
+            value: (tx.value || 0n).toString(),
+            // MMR inserts cost more as the insert stack grows; leave ample headroom
+            gasLimit: (estimate * 3n).toString(),
+            maxFeePerGas: (fee.maxFeePerGas * 2n).toString(),
+            maxPriorityFeePerGas: (fee.maxPriorityFeePerGas || 0n).toString(),
+        },
+    };
+    fs.writeFileSync(process.env.GAS_BENCH_OUTPUT, JSON.stringify(plan, null, 2));
+    console.log(`${contractName} deployed at ${plan.contract}; sender ${sender.address}`);
+}
+
+main()
+    .then(() => process.exit(0))
+    .catch((error) => {
+        console.error("Error:", error);
+        process.exit(1);
+    });
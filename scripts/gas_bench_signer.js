@@ -0,0 +1,44 @@
+'use strict';
+const fs = require("fs");
+const readline = require("readline");
+const { ethers } = require("ethers");
+
+/**
+ * Long-lived signer for stealthhub/gas_bench.py: signs the transaction of a plan written by
+ * scripts/gas_bench_prepare.js for a run of nonces.
+ * Usage: node scripts/gas_bench_signer.js <plan.json>
+ * Request:  one JSON line {"start": nonce, "count": n}
+ * Response: n lines of raw signed transactions (0x...), in nonce order
+ */
+async function main() {
+    const plan = JSON.parse(fs.readFileSync(process.argv[2], "utf8"));
+    const wallet = new ethers.Wallet(plan.privateKey);
+    const base = {
+        type: 2,
+        chainId: BigInt(plan.chainId),
+        to: plan.tx.to,
+        data: plan.tx.data,
+        value: BigInt(plan.tx.value),
+        gasLimit: BigInt(plan.tx.gasLimit),
+        maxFeePerGas: BigInt(plan.tx.maxFeePerGas),
+        maxPriorityFeePerGas: BigInt(plan.tx.maxPriorityFeePerGas),
+    };
+
+    const lines = readline.createInterface({ input: process.stdin });
+    for await (const line of lines) {
+        if (!line.trim()) continue;
+        const { start, count } = JSON.parse(line);
+        const signed = [];
+        for (let nonce = start; nonce < start + count; nonce++) {
+            signed.push(await wallet.signTransaction({ ...base, nonce }));
+        }
+        process.stdout.write(signed.join("\n") + "\n");
+    }
+}
+
+main()
+    .then(() => process.exit(0))
+    .catch((error) => {
+        console.error("Error:", error);
+        process.exit(1);
+    });
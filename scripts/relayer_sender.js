@@ -0,0 +1,55 @@
+'use strict';
+const readline = require("readline");
+const { ethers } = require("ethers");
+
+/**
+ * Long-lived withdraw sender for stealthhub/relayer.py. Encodes withdraw() of Shi / Shm / Sha and
+ * sends it from the node's first account; requests are handled concurrently and answered as
+ * their receipts arrive.
+ * Usage: node scripts/relayer_sender.js <rpc url> <pool address>
+ * Request:  one JSON line {"id", "proof": [pA, pB, pC, pubSignals], "root", "nullifierHash",
+ *           "recipient", "relayer", "fee", "refund", "asset"}
+ * Response: one JSON line {"id", "hash", "gasUsed", "status"} or {"id", "error"}
+ */
+const ABI = [
+    "function withdraw((uint256[2] pA, uint256[2][2] pB, uint256[2] pC, uint256[1] pubSignals) proof, bytes32 root, bytes32 nullifierHash, address recipient, address relayer, uint256 fee, uint256 refund, uint256 asset) payable",
+];
+
+function reply(message) {
+    process.stdout.write(JSON.stringify(message) + "\n");
+}
+
+async function main() {
+    const provider = new ethers.JsonRpcProvider(process.argv[2]);
+    // One nonce sequence for all in-flight withdrawals
+    const signer = new ethers.NonceManager(await provider.getSigner(0));
+    const pool = new ethers.Contract(process.argv[3], ABI, signer);
+
+    const lines = readline.createInterface({ input: process.stdin });
+    const pending = [];
+    for await (const line of lines) {
+        if (!line.trim()) continue;
+        const request = JSON.parse(line);
+        pending.push((async () => {
+            try {
+                const [pA, pB, pC, pubSignals] = request.proof;
+                const tx = await pool.withdraw(
+                    { pA, pB, pC, pubSignals }, request.root, request.nullifierHash, request.recipient,
+                    request.relayer, request.fee, request.refund, request.asset,
+                );
+                const receipt = await tx.wait();
+                reply({ id: request.id, hash: tx.hash, gasUsed: receipt.gasUsed.toString(), status: receipt.status });
+            } catch (error) {
+                reply({ id: request.id, error: String(error && error.shortMessage || error && error.message || error) });
+            }
+        })());
+    }
+    await Promise.all(pending);
+}
+
+main()
+    .then(() => process.exit(0))
+    .catch((error) => {
+        console.error("Error:", error);
+        process.exit(1);
+    });
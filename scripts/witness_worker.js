@@ -0,0 +1,58 @@
+'use strict';
+const fs = require("fs");
+const path = require("path");
+
+/**
+ * Long-lived witness worker for stealthhub/witness.py. Compiles <name>_js/<name>.wasm once and
+ * then answers requests on stdin/stdout until stdin closes.
+ * Usage: node scripts/witness_worker.js <path/to/name.wasm>
+ * Request:  u32 LE length, JSON input signals
+ * Response: u8 status (0 wtns, 1 error, 2 ready), u32 LE length, payload
+ */
+const OK = 0;
+const ERROR = 1;
+const READY = 2;
+
+// The generated calculator logs circuit output with console.log; stdout carries the framing
+console.log = console.error;
+
+function reply(status, payload) {
+    const header = Buffer.alloc(5);
+    header.writeUInt8(status, 0);
+    header.writeUInt32LE(payload.length, 1);
+    fs.writeSync(1, header);
+    fs.writeSync(1, payload);
+}
+
+async function main() {
+    const wasmPath = path.resolve(process.argv[2]);
+    const builder = require(path.join(path.dirname(wasmPath), "witness_calculator.js"));
+    const calculator = await builder(fs.readFileSync(wasmPath));
+    reply(READY, Buffer.alloc(0));
+
+    let pending = Buffer.alloc(0);
+    let queue = Promise.resolve();
+    process.stdin.on("data", (chunk) => {
+        pending = Buffer.concat([pending, chunk]);
+        while (pending.length >= 4 && pending.length >= 4 + pending.readUInt32LE(0)) {
+            const length = pending.readUInt32LE(0);
+            const request = pending.subarray(4, 4 + length).toString("utf8");
+            pending = pending.subarray(4 + length);
+            // One witness at a time: the wasm instance holds a single signal memory
+            queue = queue.then(async () => {
+                try {
+                    const wtns = await calculator.calculateWTNSBin(JSON.parse(request), 0);
+                    reply(OK, Buffer.from(wtns.buffer, wtns.byteOffset, wtns.byteLength));
+                } catch (error) {
+                    reply(ERROR, Buffer.from(String(error && error.message || error), "utf8"));
+                }
+            });
+        }
+    });
+    process.stdin.on("end", () => queue.then(() => process.exit(0)));
+}
+
+main().catch((error) => {
+    console.error("Error:", error);
+    process.exit(1);
+});
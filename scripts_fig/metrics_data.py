@@ -57,5 +57,12 @@ data = {
 
 base_dir = os.path.dirname(os.path.abspath(__file__))
 output_data_path = os.path.join(base_dir, '../data/metrics_data.json')
+text = json.dumps(data, indent=2)
+
+# Rewrite only on change, so figures built from this file are not re-rendered for nothing
+if os.path.exists(output_data_path):
+    with open(output_data_path, 'r') as f:
+        if f.read() == text:
+            raise SystemExit(0)
 with open(output_data_path, 'w') as f:
-    json.dump(data, f, indent=2)
\ No newline at end of file
+    f.write(text)
\ No newline at end of file
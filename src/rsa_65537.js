@@ -1,4 +1,5 @@
-const { prime, modInv, modPow } = require('bigint-crypto-utils');
+const { modInv, modPow } = require('bigint-crypto-utils');
+const { pool_prime } = require("./utils");
 
 // RSA class for const exp = 65537
 class RSA_65537 {
@@ -33,8 +34,8 @@ class RSA_65537 {
     // Static method to initialize the RSA with random parameters
     static async initialize(bitLength) {
         // console.debug(`Initializing RSA with bit lengths: p, q=${bitLength}`);
-        const p = await prime(bitLength); // Generate a random prime for p
-        const q = await prime(bitLength); // Generate a random prime for q
+        const p = await pool_prime(bitLength); // Take a random prime for p
+        const q = await pool_prime(bitLength); // Take a random prime for q
         // console.debug(`Generated parameters: p=${p}, q=${q}`);
         return new RSA_65537(p, q, bitLength);
     }
@@ -1,5 +1,7 @@
 const buildPoseidon = require("circomlibjs").buildPoseidonOpt;
-const { randBetween } = require('bigint-crypto-utils');
+const fs = require("fs");
+const path = require("path");
+const { randBetween, prime } = require('bigint-crypto-utils');
 const poseidon2Constants = require("./poseidon2_constants.js");
 const { utils, getCurveFromName } = require("ffjavascript");
 const { MAT_DIAG3_M_1, MAT_INTERNAL3, RC3 } = utils.unstringifyBigInts(poseidon2Constants);
@@ -102,6 +104,38 @@ function generateRabinMillerInput(N, k) {
     };
 }
 
+/**
+ * Pop a pre-generated prime from the prime pool filled by stealthhub/prime_pool.py
+ * (directory STEALTHHUB_PRIME_POOL or data/prime_pool), generating one in-process
+ * when the pool bucket is missing or empty
+ * @param {number} bitLength - Bit length of the prime
+ * @returns {Promise<bigint>} A probable prime of `bitLength` bits
+ */
+async function pool_prime(bitLength) {
+    const root = process.env.STEALTHHUB_PRIME_POOL || path.join(__dirname, "../data/prime_pool");
+    const bucket = path.join(root, String(bitLength));
+    let names = [];
+    try {
+        names = fs.readdirSync(bucket).filter(name => name.endsWith(".prime")).sort();
+    } catch (error) {
+        return await prime(bitLength);
+    }
+
+    for (const name of names) {
+        // Claim the file with a rename so concurrent consumers never share a prime
+        const claimed = path.join(bucket, `${name}.claim-${process.pid}`);
+        try {
+            fs.renameSync(path.join(bucket, name), claimed);
+        } catch (error) {
+            continue;
+        }
+        const value = BigInt(fs.readFileSync(claimed, "utf8").trim());
+        fs.unlinkSync(claimed);
+        return value;
+    }
+    return await prime(bitLength);
+}
+
 function bigintToBitsArray(bigint, bitLength) {
     const bits = [];
     for (let i = 0; i < bitLength; i++) {
@@ -128,6 +162,8 @@ function swap(arr, index1, index2) {
 module.exports = {
     bigint_to_array,
     generateRabinMillerInput,
+    getPoseidon2Params,
+    pool_prime,
     poseidon_hash,
     poseidon2_hash,
     bigintToBitsArray,
@@ -1,5 +1,4 @@
-const { prime } = require('bigint-crypto-utils');
-const { bigint_to_array, poseidon2_hash } = require("./utils");
+const { bigint_to_array, poseidon2_hash, pool_prime } = require("./utils");
 // UTXO class for const exp = 65537
 class UTXO {
     constructor(rsa_65537, secret, root, merkle_proof, chunk_size, chunk_num, secret_hash) {
@@ -16,7 +15,7 @@ class UTXO {
     // Static method to mint a UTXO with a secret (plaintext message)
     // output the ciphertext commitment
     static async mint(rsa_65537, mt, chunk_size, chunk_num) {
-        const secret = await prime(rsa_65537.bitLength); // Generate a random prime as plaintext
+        const secret = await pool_prime(rsa_65537.bitLength); // Take a random prime as plaintext (pre-generated when the pool is filled)
         const secret_array = bigint_to_array(chunk_size, chunk_num, secret);
         const secret_hash = await poseidon2_hash([secret_array[0], 1, 1]);
         const commitment = secret_hash[0];
@@ -0,0 +1,2 @@
+# Python tooling for StealthHub: off-chain services, benchmarks and input generation
+# that complement the Circom circuits (circuits/), contracts (contracts/) and JS helpers (src/).
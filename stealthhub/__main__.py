@@ -0,0 +1,5 @@
+import sys
+
+from stealthhub.cli import main
+
+sys.exit(main())
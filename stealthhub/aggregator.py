@@ -0,0 +1,200 @@
+import json
+import os
+import threading
+import time
+
+from stealthhub.mt import MerkleTree, ZERO_VALUE
+from stealthhub.qmt import QuadMerkleTree
+
+# Batch lifecycle: open -> sealed (witness inputs built) -> proving -> submitted -> confirmed | failed
+OPEN = "open"
+SEALED = "sealed"
+PROVING = "proving"
+SUBMITTED = "submitted"
+CONFIRMED = "confirmed"
+FAILED = "failed"
+STATES = (OPEN, SEALED, PROVING, SUBMITTED, CONFIRMED, FAILED)
+TREES = {2: MerkleTree, 4: QuadMerkleTree}
+
+
+def _decimal(value):
+    return [_decimal(v) for v in value] if isinstance(value, list) else str(value)
+
+
+class Batch:
+    def __init__(self, batch_id, opened_at):
+        self.id = batch_id
+        self.state = OPEN
+        self.commitments = []
+        self.arrivals = []
+        self.opened_at = opened_at
+        self.sealed_at = None
+        self.reason = None
+        self.root1 = None
+        self.root2 = None
+        self.tree = None
+        self.inputs = None
+
+    @property
+    def size(self):
+        return len(self.commitments)
+
+    def waits(self):
+        # Time each commitment spent buffered before its batch was sealed
+        return [self.sealed_at - t for t in self.arrivals]
+
+
+class BatchAggregator:
+    # Buffers SH-A commitments and seals a batch once `number` commitments are queued or the
+    # oldest one has waited `max_delay` seconds. Each sealed batch becomes one off-chain tree
+    # (layer 2, depth level2) whose root is inserted into the layer 1 tree (depth level1), and
+    # carries the inputs of MultiMerkleTreeCheckerPoseidon2(number, level1, level2), or with
+    # arity=4 of MultiQuadMerkleTreeCheckerPoseidon2 where level1 and level2 count quad levels.
+    def __init__(self, number, level1, level2, max_delay=30.0, zero=ZERO_VALUE, clock=time.monotonic, on_seal=None,
+                 arity=2):
+        if number > arity ** level2:
+            raise ValueError(f"a batch of {number} does not fit a layer 2 tree of depth {level2}")
+        self.tree_class = TREES[arity]
+        self.number = number
+        self.level1 = level1
+        self.level2 = level2
+        self.max_delay = max_delay
+        self.zero = zero
+        self.clock = clock
+        self.on_seal = on_seal
+        self.layer1 = self.tree_class(level1, zero)
+        self.batches = []
+        self._lock = threading.Lock()
+        self._open = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def submit(self, commitment):
+        # Returns (batch id, position in batch); seals the batch when it reaches the size cap
+        with self._lock:
+            now = self.clock()
+            if self._open is None:
+                self._open = Batch(len(self.batches), now)
+                self.batches.append(self._open)
+            batch = self._open
+            batch.commitments.append(commitment)
+            batch.arrivals.append(now)
+            position = batch.size - 1
+            sealed = self._seal("size") if batch.size >= self.number else None
+        if sealed is not None and self.on_seal:
+            self.on_seal(sealed)
+        return batch.id, position
+
+    def poll(self):
+        # Seals the open batch if its oldest commitment has reached the deadline
+        with self._lock:
+            batch = self._open
+            if batch is None or self.clock() - batch.arrivals[0] < self.max_delay:
+                return None
+            sealed = self._seal("deadline")
+        if self.on_seal:
+            self.on_seal(sealed)
+        return sealed
+
+    def flush(self):
+        # Seals whatever is buffered regardless of size or deadline
+        with self._lock:
+            if self._open is None:
+                return None
+            sealed = self._seal("flush")
+        if self.on_seal:
+            self.on_seal(sealed)
+        return sealed
+
+    def _seal(self, reason):
+        batch = self._open
+        self._open = None
+        batch.sealed_at = self.clock()
+        batch.reason = reason
+        batch.inputs = self._witness_inputs(batch)
+        batch.state = SEALED
+        return batch
+
+    def _witness_inputs(self, batch):
+        layer2 = self.tree_class(self.level2, self.zero)
+        for commitment in batch.commitments:
+            layer2.insert(commitment)
+        batch.root2 = layer2.root
+        batch.tree = layer2
+        index1, batch.root1 = self.layer1.insert(batch.root2)
+        path1 = self.layer1.path(index1)
+
+        # Short batches are padded with empty layer 2 slots, whose leaf is the zero value
+        leaves = batch.commitments + [self.zero] * (self.number - batch.size)
+        paths2 = [layer2.path(i) for i in range(self.number)]
+        return {
+            "leaves": [str(x) for x in leaves],
+            "root1": [str(batch.root1)] * self.number,
+            "pathElements1": [_decimal(path1[0]) for _ in range(self.number)],
+            "pathIndices1": [list(path1[1]) for _ in range(self.number)],
+            "root2": [str(batch.root2)] * self.number,
+            "pathElements2": [_decimal(p[0]) for p in paths2],
+            "pathIndices2": [list(p[1]) for p in paths2],
+        }
+
+    def mark(self, batch_id, state):
+        if state not in STATES:
+            raise ValueError(f"unknown batch state {state}")
+        self.batches[batch_id].state = state
+
+    def write_inputs(self, batch, path):
+        with open(path, "w") as f:
+            json.dump(batch.inputs, f, indent=2)
+
+    def start(self, interval=0.1):
+        # Background deadline checks; size-triggered seals happen inline in submit()
+        def loop():
+            while not self._stop.wait(interval):
+                self.poll()
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def summary(self, batch_gas=None):
+        # Amortised gas per deposit against buffering latency over all sealed batches
+        sealed = [b for b in self.batches if b.sealed_at is not None]
+        waits = sorted(w for b in sealed for w in b.waits())
+        deposits = sum(b.size for b in sealed)
+        result = {
+            "batches": len(sealed),
+            "deposits": deposits,
+            "mean_batch_size": deposits / len(sealed) if sealed else 0,
+            "by_reason": {r: sum(1 for b in sealed if b.reason == r) for r in ("size", "deadline", "flush")},
+            "wait_p50": _percentile(waits, 50),
+            "wait_p99": _percentile(waits, 99),
+            "wait_max": waits[-1] if waits else None,
+        }
+        if batch_gas is not None and deposits:
+            result["gas_per_deposit"] = batch_gas * len(sealed) / deposits
+        return result
+
+
+def _percentile(values, q):
+    if not values:
+        return None
+    k = min(len(values) - 1, max(0, int(round(q / 100 * (len(values) - 1)))))
+    return values[k]
+
+
+if __name__ == "__main__":
+    # Seal one multi_merkle_4_4_4 batch and write its witness inputs next to the other circuit inputs
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    aggregator = BatchAggregator(4, 4, 4)
+    for commitment in range(1, 5):
+        aggregator.submit(commitment)
+    output_path = os.path.join(base_dir, '../circuit_input/multi_merkle_4_4_4.json')
+    aggregator.write_inputs(aggregator.batches[0], output_path)
+    print(json.dumps(aggregator.summary(), indent=2))
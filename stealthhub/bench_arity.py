@@ -0,0 +1,158 @@
+import argparse
+import json
+import math
+import os
+import random
+import shutil
+import subprocess
+import time
+
+from stealthhub.circom import read_r1cs_header
+from stealthhub.models import fit_metric, load_metrics
+from stealthhub.mt import MerkleTree
+from stealthhub.poseidon2 import FIELD_SIZE, hash2, hash4
+from stealthhub.qmt import QuadMerkleTree
+from stealthhub.tracing import Tracer, groth16_pipeline
+
+# Binary (hash2, t=3) against arity-4 (hash4, t=4) Merkle paths for trees of 2^height leaves:
+# an arity-4 tree needs ceil(height / 2) levels. Per level the binary checker is one Poseidon2
+# (80 S-boxes, 240 constraints) plus DualMux (3); the quad checker one t=4 permutation (88 S-boxes,
+# 264) plus QuadMux (9). Constraints are read from compiled circuits when circom is installed and
+# taken from these counts otherwise; proof time is measured with --prove and otherwise predicted
+# from the prove_runtime fit on data/metrics_data.json.
+base_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.join(base_dir, '..')
+target_dir = os.path.join(repo_dir, '.target')
+output_path = os.path.join(repo_dir, 'data', 'arity_bench.json')
+
+HEIGHTS = list(range(20, 32))
+LEVEL_CONSTRAINTS = {2: 240 + 3, 4: 264 + 9}
+CHECKERS = {2: "MerkleTreeCheckerPoseidon2", 4: "QuadMerkleTreeCheckerPoseidon2"}
+TREES = {2: MerkleTree, 4: QuadMerkleTree}
+
+CIRCUIT_TEMPLATE = """pragma circom 2.1.6;
+
+include "{include}";
+
+component main {{public [root]}} = {template}({levels});
+"""
+
+
+def tree_levels(height, arity):
+    return height if arity == 2 else math.ceil(height / 2)
+
+
+def model_constraints(levels, arity):
+    # One per level for the hash and mux, plus root === hash
+    return LEVEL_CONSTRAINTS[arity] * levels + 1
+
+
+def hash_rate(arity, count=2000, seed=0):
+    rng = random.Random(seed)
+    inputs = [[rng.randrange(FIELD_SIZE) for _ in range(arity)] for _ in range(count)]
+    fn = hash2 if arity == 2 else hash4
+    t = time.perf_counter()
+    for x in inputs:
+        fn(*x)
+    return count / (time.perf_counter() - t)
+
+
+def path_input(levels, arity, seed=0):
+    # One random leaf at index 0 of an otherwise empty tree; every level still costs one hash
+    rng = random.Random(seed)
+    tree = TREES[arity](levels)
+    leaf = rng.randrange(FIELD_SIZE)
+    tree.insert(leaf)
+    elements, indices = tree.path(0)
+    assert tree.verify(leaf, tree.root, elements, indices)
+    decimal = (lambda e: [str(x) for x in e]) if arity == 4 else str
+    return {"leaf": str(leaf), "root": str(tree.root), "pathElements": [decimal(e) for e in elements],
+            "pathIndices": [str(i) for i in indices]}
+
+
+def compile_checker(levels, arity):
+    # Returns (circuit name relative to the repo, constraints) or None without circom
+    if shutil.which("circom") is None:
+        return None
+    name = f"arity{arity}_checker_{levels}"
+    os.makedirs(target_dir, exist_ok=True)
+    with open(os.path.join(target_dir, f"{name}.circom"), "w") as f:
+        f.write(CIRCUIT_TEMPLATE.format(include=os.path.join(repo_dir, "circuits", "utils.circom"),
+                                        template=CHECKERS[arity], levels=levels))
+    subprocess.run(["circom", os.path.join(target_dir, f"{name}.circom"), "--r1cs", "--output", target_dir],
+                   check=True, capture_output=True)
+    return os.path.join(".target", name), read_r1cs_header(os.path.join(target_dir, f"{name}.r1cs"))["n_constraints"]
+
+
+def prove(circuit_name, levels, arity, ptau):
+    input_name = os.path.basename(circuit_name)
+    with open(os.path.join(repo_dir, "circuit_input", f"{input_name}.json"), "w") as f:
+        json.dump(path_input(levels, arity), f, indent=2)
+    tracer = Tracer()
+    groth16_pipeline(tracer, circuit_name, ptau, input_name)
+    return next(s["wall"] for s in tracer.stages if s["name"] == "3.1 prove")
+
+
+def run(heights=HEIGHTS, do_compile=True, do_prove=False, ptau="pot15_final", metrics=None):
+    rates = {arity: hash_rate(arity) for arity in (2, 4)}
+    predict = fit_metric(metrics, "Poseidon2", "prove_runtime") if metrics else None
+    rows = []
+    for height in heights:
+        row = {"height": height}
+        for arity in (2, 4):
+            levels = tree_levels(height, arity)
+            compiled = compile_checker(levels, arity) if do_compile else None
+            constraints = compiled[1] if compiled else model_constraints(levels, arity)
+            entry = {
+                "levels": levels,
+                "constraints": constraints,
+                "constraints_measured": compiled is not None,
+                "hashes_per_sec": rates[arity],
+                "paths_per_sec": rates[arity] / levels,
+            }
+            if predict is not None:
+                entry["prove_s_predicted"] = predict(constraints)
+            if do_prove and compiled:
+                entry["prove_s"] = prove(compiled[0], levels, arity, ptau)
+            row[f"arity{arity}"] = entry
+        row["constraint_ratio"] = row["arity4"]["constraints"] / row["arity2"]["constraints"]
+        rows.append(row)
+    return rows
+
+
+def report(rows):
+    lines = [f"{'h':>3s} {'lv2':>4s} {'lv4':>4s} {'constr2':>8s} {'constr4':>8s} {'ratio':>6s} "
+             f"{'paths2/s':>9s} {'paths4/s':>9s} {'prove2_s':>9s} {'prove4_s':>9s}"]
+    for row in rows:
+        b, q = row["arity2"], row["arity4"]
+        prove2 = b.get("prove_s", b.get("prove_s_predicted", float("nan")))
+        prove4 = q.get("prove_s", q.get("prove_s_predicted", float("nan")))
+        lines.append(f"{row['height']:3d} {b['levels']:4d} {q['levels']:4d} {b['constraints']:8d} {q['constraints']:8d} "
+                     f"{row['constraint_ratio']:6.3f} {b['paths_per_sec']:9.1f} {q['paths_per_sec']:9.1f} "
+                     f"{prove2:9.3f} {prove4:9.3f}")
+    measured = rows and rows[0]["arity2"]["constraints_measured"]
+    proved = rows and "prove_s" in rows[0]["arity2"]
+    lines.append(f"constraints {'from compiled r1cs' if measured else 'from the per-level model (circom not found)'}; "
+                 f"prove time {'measured' if proved else 'predicted from data/metrics_data.json'}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Binary vs arity-4 Poseidon2 Merkle paths: constraints, hash rate, proof time")
+    parser.add_argument("--heights", type=int, nargs="+", default=HEIGHTS, help="log2 of the leaf capacity")
+    parser.add_argument("--no-compile", action="store_true", help="use the constraint model even if circom exists")
+    parser.add_argument("--prove", action="store_true", help="run the Groth16 pipeline on each checker (needs snarkjs)")
+    parser.add_argument("--ptau", default="pot15_final")
+    parser.add_argument("--metrics", default=os.path.join(repo_dir, 'data', 'metrics_data.json'))
+    parser.add_argument("--output", default=output_path)
+    args = parser.parse_args(argv)
+
+    metrics = load_metrics(args.metrics) if os.path.exists(args.metrics) else None
+    rows = run(args.heights, not args.no_compile, args.prove, args.ptau, metrics)
+    print(report(rows))
+    with open(args.output, "w") as f:
+        json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
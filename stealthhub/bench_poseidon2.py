@@ -0,0 +1,217 @@
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+
+from stealthhub.circom import read_r1cs_header, read_wtns
+from stealthhub.poseidon2 import FIELD_SIZE, permute_batch, yul_hash
+
+# Poseidon2 lives in four places: this engine, the `poseidon2` npm package used by
+# src/utils.js, circuits/poseidon2.circom and contracts/Poseidon2Yul.sol. The first three
+# compute the t=3 compression Poseidon2([l, r, 1])[0]; the contract is a t=4 sponge, checked
+# against its Python model (yul_hash) and reported separately from the t=3 group.
+base_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.join(base_dir, '..')
+target_dir = os.path.join(repo_dir, '.target')
+output_path = os.path.join(repo_dir, 'data', 'poseidon2_bench.json')
+
+BATCH_SIZES = [1, 16, 256, 1024]
+
+CIRCUIT_TEMPLATE = """pragma circom 2.0.0;
+
+include "{include}";
+
+template Poseidon2Bench(n) {{
+    signal input inputs[n][3];
+    signal output out[n];
+
+    component h[n];
+    for (var i = 0; i < n; i++) {{
+        h[i] = Poseidon2(3, 1);
+        for (var j = 0; j < 3; j++) {{
+            h[i].inputs[j] <== inputs[i][j];
+        }}
+        out[i] <== h[i].out[0];
+    }}
+}}
+
+component main = Poseidon2Bench({n});
+"""
+
+
+def _failure(proc, default):
+    # Node prints a stack trace followed by its version; the first Error line is the useful one
+    lines = proc.stderr.strip().splitlines()
+    return next((line.strip() for line in lines if "Error" in line), lines[0] if lines else default)
+
+
+def make_vectors(n, seed=0):
+    rng = random.Random(seed)
+    return [[rng.randrange(FIELD_SIZE), rng.randrange(FIELD_SIZE), 1] for _ in range(n)]
+
+
+def bench_python(vectors, repeat=1):
+    t = time.perf_counter()
+    for _ in range(repeat):
+        outputs = [state[0] for state in permute_batch(vectors)]
+    seconds = (time.perf_counter() - t) / repeat
+    return {"outputs": outputs, "seconds": seconds, "hashes_per_sec": len(vectors) / seconds}
+
+
+def bench_js(vectors, repeat=1):
+    if shutil.which("node") is None:
+        return {"skipped": "node not found"}
+    with tempfile.TemporaryDirectory() as tmp:
+        inp = os.path.join(tmp, "vectors.json")
+        out = os.path.join(tmp, "out.json")
+        with open(inp, "w") as f:
+            json.dump({"vectors": [[str(x) for x in v] for v in vectors], "repeat": repeat}, f)
+        proc = subprocess.run(["node", os.path.join(repo_dir, "scripts", "bench_poseidon2.js"), inp, out],
+                              cwd=repo_dir, capture_output=True, text=True)
+        if proc.returncode != 0:
+            return {"skipped": _failure(proc, "node failed")}
+        with open(out) as f:
+            result = json.load(f)
+    outputs = [int(x) for x in result["outputs"]]
+    return {"outputs": outputs, "seconds": result["seconds"], "hashes_per_sec": len(vectors) / result["seconds"]}
+
+
+def bench_circuit(vectors):
+    # Compiles n parallel Poseidon2(3, 1) hashers and reads constraints from the r1cs header;
+    # the witness doubles as the circuit's answer for the shared vectors
+    n = len(vectors)
+    if shutil.which("circom") is None or shutil.which("node") is None:
+        return {"skipped": "circom or node not found"}
+    name = f"poseidon2_bench_{n}"
+    os.makedirs(target_dir, exist_ok=True)
+    circuit = os.path.join(target_dir, f"{name}.circom")
+    with open(circuit, "w") as f:
+        f.write(CIRCUIT_TEMPLATE.format(include=os.path.join(repo_dir, "circuits", "poseidon2.circom"), n=n))
+    subprocess.run(["circom", circuit, "--r1cs", "--wasm", "--output", target_dir], check=True, capture_output=True)
+    header = read_r1cs_header(os.path.join(target_dir, f"{name}.r1cs"))
+
+    gen_dir = os.path.join(target_dir, f"{name}_js")
+    inputs = os.path.join(target_dir, f"{name}_input.json")
+    witness = os.path.join(target_dir, f"{name}.wtns")
+    with open(inputs, "w") as f:
+        json.dump({"inputs": [[str(x) for x in v] for v in vectors]}, f)
+    t = time.perf_counter()
+    subprocess.run(["node", os.path.join(gen_dir, "generate_witness.js"), os.path.join(gen_dir, f"{name}.wasm"),
+                    inputs, witness], check=True, capture_output=True)
+    seconds = time.perf_counter() - t
+    outputs = read_wtns(witness)[1:n + 1]
+    return {
+        "outputs": outputs,
+        "constraints": header["n_constraints"],
+        "constraints_per_hash": header["n_constraints"] / n,
+        "witness_seconds": seconds,
+    }
+
+
+def bench_yul(vectors, network="localhost"):
+    # Gas per Poseidon2Yul call on a running hardhat node (npx hardhat node)
+    hardhat = os.path.join(repo_dir, "node_modules", ".bin", "hardhat")
+    if not os.path.exists(hardhat):
+        return {"skipped": "hardhat not installed (npm install)"}
+    pairs = [v[:2] for v in vectors]
+    with tempfile.TemporaryDirectory() as tmp:
+        inp = os.path.join(tmp, "vectors.json")
+        out = os.path.join(tmp, "gas.json")
+        with open(inp, "w") as f:
+            json.dump({"vectors": [[str(x) for x in v] for v in pairs]}, f)
+        env = dict(os.environ, POSEIDON2_VECTORS=inp, POSEIDON2_GAS_OUTPUT=out)
+        proc = subprocess.run([hardhat, "run", "scripts/bench_poseidon2_gas.js", "--network", network],
+                              cwd=repo_dir, env=env, capture_output=True, text=True)
+        if proc.returncode != 0:
+            return {"skipped": _failure(proc, "hardhat failed")}
+        with open(out) as f:
+            result = json.load(f)
+    # Execution gas: estimate minus the 21000 base and calldata (4 gas per zero byte, 16 otherwise)
+    execution = []
+    for pair, gas in zip(pairs, result["gas"]):
+        calldata = b"".join(x.to_bytes(32, "big") for x in pair)
+        execution.append(int(gas) - 21000 - sum(4 if b == 0 else 16 for b in calldata))
+    return {
+        "outputs": [int(x) for x in result["outputs"]],
+        "expected": [yul_hash(p) for p in pairs],
+        "gas": [int(g) for g in result["gas"]],
+        "execution_gas_per_hash": sum(execution) / len(execution),
+    }
+
+
+def run(batch_sizes=BATCH_SIZES, repeat=3, seed=0, js=True, circuit=True, yul=True, network="localhost"):
+    results = []
+    for n in batch_sizes:
+        vectors = make_vectors(n, seed)
+        row = {"batch": n, "python": bench_python(vectors, repeat)}
+        if js:
+            row["js"] = bench_js(vectors, repeat)
+        if circuit:
+            row["circuit"] = bench_circuit(vectors)
+        if yul:
+            row["yul"] = bench_yul(vectors, network)
+
+        reference = row["python"]["outputs"]
+        row["agree_t3"] = {impl: row[impl]["outputs"] == reference
+                           for impl in ("js", "circuit") if impl in row and "outputs" in row[impl]}
+        if "yul" in row and "outputs" in row["yul"]:
+            row["agree_yul"] = row["yul"]["outputs"] == row["yul"]["expected"]
+            # The contract hashes with a different construction than the circuits verify
+            row["yul_matches_circuit_hash"] = row["yul"]["outputs"] == reference
+        results.append(row)
+    return results
+
+
+def report(results):
+    lines = [f"{'batch':>6s} {'py h/s':>10s} {'js h/s':>10s} {'constr/hash':>12s} {'gas/hash':>10s}  agreement"]
+    for row in results:
+        js = row.get("js", {})
+        circuit = row.get("circuit", {})
+        yul = row.get("yul", {})
+        agree = " ".join(f"{k}={'ok' if v else 'DIFF'}" for k, v in row["agree_t3"].items())
+        if "agree_yul" in row:
+            agree += f" yul={'ok' if row['agree_yul'] else 'DIFF'}"
+        lines.append(
+            f"{row['batch']:6d} {row['python']['hashes_per_sec']:10.0f} "
+            f"{js.get('hashes_per_sec', float('nan')):10.0f} "
+            f"{circuit.get('constraints_per_hash', float('nan')):12.1f} "
+            f"{yul.get('execution_gas_per_hash', float('nan')):10.0f}  {agree}"
+        )
+    for row in results:
+        for impl in ("js", "circuit", "yul"):
+            if "skipped" in row.get(impl, {}):
+                lines.append(f"batch {row['batch']}: {impl} skipped ({row[impl]['skipped']})")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark and cross-check the Poseidon2 implementations")
+    parser.add_argument("--batch", type=int, nargs="+", default=BATCH_SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-js", action="store_true")
+    parser.add_argument("--no-circuit", action="store_true")
+    parser.add_argument("--no-yul", action="store_true")
+    parser.add_argument("--network", default="localhost")
+    parser.add_argument("--output", default=output_path)
+    args = parser.parse_args(argv)
+
+    results = run(args.batch, args.repeat, args.seed, not args.no_js, not args.no_circuit, not args.no_yul, args.network)
+    print(report(results))
+    # Drop per-vector outputs from the stored summary
+    for row in results:
+        for impl in ("python", "js", "circuit", "yul"):
+            if impl in row:
+                row[impl] = {k: v for k, v in row[impl].items() if k not in ("outputs", "expected")}
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    mismatch = any(not all(r["agree_t3"].values()) or r.get("agree_yul") is False for r in results)
+    return 1 if mismatch else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,52 @@
+import struct
+
+# Readers for the binary files produced by circom and snarkjs (iden3 binfileutils layout):
+# magic, u32 version, u32 section count, then sections of (u32 type, u64 size, payload)
+
+
+def _sections(data, magic):
+    if data[:4] != magic:
+        raise ValueError(f"not a {magic.decode()} file")
+    _, n_sections = struct.unpack_from("<II", data, 4)
+    offset = 12
+    sections = {}
+    for _ in range(n_sections):
+        kind, size = struct.unpack_from("<IQ", data, offset)
+        offset += 12
+        sections.setdefault(kind, []).append((offset, size))
+        offset += size
+    return sections
+
+
+def read_r1cs_header(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    offset, _ = _sections(data, b"r1cs")[1][0]
+    (n8,) = struct.unpack_from("<I", data, offset)
+    prime = int.from_bytes(data[offset + 4:offset + 4 + n8], "little")
+    offset += 4 + n8
+    n_wires, n_pub_out, n_pub_in, n_prv_in, n_labels, n_constraints = struct.unpack_from("<IIIIQI", data, offset)
+    return {
+        "prime": prime,
+        "n_wires": n_wires,
+        "n_pub_out": n_pub_out,
+        "n_pub_in": n_pub_in,
+        "n_prv_in": n_prv_in,
+        "n_labels": n_labels,
+        "n_constraints": n_constraints,
+    }
+
+
+def parse_wtns(data):
+    # Witness values in signal order; index 0 is the constant 1, outputs follow
+    sections = _sections(data, b"wtns")
+    offset, _ = sections[1][0]
+    (n8,) = struct.unpack_from("<I", data, offset)
+    (n_witness,) = struct.unpack_from("<I", data, offset + 4 + n8)
+    offset, _ = sections[2][0]
+    return [int.from_bytes(data[offset + i * n8:offset + (i + 1) * n8], "little") for i in range(n_witness)]
+
+
+def read_wtns(path):
+    with open(path, "rb") as f:
+        return parse_wtns(f.read())
@@ -0,0 +1,94 @@
+import time
+
+_T0 = time.perf_counter()
+
+import argparse  # noqa: E402
+import importlib  # noqa: E402
+import sys  # noqa: E402
+
+# Subcommands resolve to "module:function" strings and are imported only when invoked, so
+# `python -m stealthhub <cmd>` never pays for numpy, matplotlib or the tree engines of another
+# command. Each function takes the remaining argv.
+COMMANDS = {
+    "figures": ("stealthhub.figures:main", "re-render stale figures from scripts_fig/ into figure/"),
+    "inputs": ("stealthhub.cli:inputs", "write circuit_input/<name>.json for benchmark circuits"),
+    "tree": ("stealthhub.mt:main", "compare per-leaf and batched Merkle inserts"),
+    "index": ("stealthhub.indexer:main", "replay pool events into a snapshot and time cold start"),
+    "paths": ("stealthhub.paths:main", "time batched Merkle path serving with pinned top levels"),
+    "plan": ("stealthhub.planner:main", "pick SH-A batch size, tree height and hash under budgets"),
+    "powmod": ("stealthhub.limbs:main", "bulk PowerModAnyExp inputs, intermediate chains and checks"),
+    "primality": ("stealthhub.rabin_miller:main", "bulk Rabin-Miller inputs checked against the primality circuits"),
+    "primes": ("stealthhub.prime_pool:main", "run or pop from the prime pool"),
+    "relay": ("stealthhub.relayer:main", "run withdrawals through the staged asyncio relayer pipeline"),
+    "bench": ({
+        "arity": ("stealthhub.bench_arity:main", "binary vs arity-4 Poseidon2 Merkle paths"),
+        "gas": ("stealthhub.gas_bench:main", "pipelined gasUsed sampling over JSON-RPC"),
+        "nullifiers": ("stealthhub.indexed_tree:main", "indexed nullifier tree vs the nullifierHashes mapping"),
+        "poseidon2": ("stealthhub.bench_poseidon2:main", "cross-check and benchmark the Poseidon2 implementations"),
+        "regression": ("stealthhub.regression:main", "gate benchmark runs against the stored baseline"),
+        "simulate": ("stealthhub.simulator:main", "simulate SH-I / SH-M / SH-A throughput"),
+        "trace": ("stealthhub.tracing:main", "trace the Groth16 pipeline with RSS / CPU sampling"),
+        "witness": ("stealthhub.witness:main", "time the warm witness pool against node per witness"),
+    }, "benchmarks and performance tooling"),
+}
+
+
+def inputs(argv):
+    from stealthhub.inputs import ensure_input
+
+    parser = argparse.ArgumentParser(prog="stealthhub inputs", description=COMMANDS["inputs"][1])
+    parser.add_argument("names", nargs="+", help="e.g. multi_merkle_4_4_4 poseidon2_3_test")
+    args = parser.parse_args(argv)
+    for name in args.names:
+        print(ensure_input(name))
+    return 0
+
+
+def _resolve(target):
+    module_name, func_name = target.split(":")
+    t = time.perf_counter()
+    module = importlib.import_module(module_name)
+    return getattr(module, func_name), time.perf_counter() - t
+
+
+def _usage(table, prog):
+    width = max(len(name) for name in table)
+    lines = [f"usage: {prog} [--timing] <command> [args...]", "", "commands:"]
+    lines += [f"  {name:{width}s}  {entry[1]}" for name, entry in table.items()]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    timing = False
+
+    table, prog = COMMANDS, "stealthhub"
+    while True:
+        # --timing belongs to the dispatcher only before the command name; later it is the command's
+        while argv and argv[0] == "--timing":
+            timing = True
+            argv.pop(0)
+        if not argv or argv[0] in ("-h", "--help"):
+            print(_usage(table, prog))
+            return 0
+        name = argv.pop(0)
+        if name not in table:
+            print(_usage(table, prog), file=sys.stderr)
+            return 2
+        target = table[name][0]
+        prog = f"{prog} {name}"
+        if isinstance(target, dict):
+            table = target
+            continue
+        break
+
+    startup = time.perf_counter() - _T0
+    func, import_time = _resolve(target)
+    t = time.perf_counter()
+    try:
+        status = func(argv)
+    finally:
+        if timing:
+            print(f"[{prog}] cli startup {startup * 1e3:.1f} ms, command import {import_time * 1e3:.1f} ms, "
+                  f"run {time.perf_counter() - t:.3f} s", file=sys.stderr)
+    return status or 0
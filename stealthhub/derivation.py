@@ -0,0 +1,43 @@
+from functools import lru_cache
+
+from stealthhub.poseidon2 import permute_batch
+from stealthhub.utils import bigint_to_array
+
+
+class NoteDeriver:
+    # Derives UTXO commitments and nullifier hashes for many notes at once, as UTXO.mint and
+    # UTXO.getNullifierHash in src/utxo.js do one note at a time:
+    #   commitment    = Poseidon2([secret[0], 1, 1])[0]
+    #   nullifierHash = Poseidon2([inv[0], secret[0], 1])[0]
+    # Limb decompositions are cached per value, so a key's `inv` is split once per wallet.
+    def __init__(self, chunk_size, chunk_num, cache_size=65536):
+        self.chunk_size = chunk_size
+        self.chunk_num = chunk_num
+        self._limbs = lru_cache(maxsize=cache_size)(self._decompose)
+
+    def _decompose(self, x):
+        return tuple(bigint_to_array(self.chunk_size, self.chunk_num, x))
+
+    def limbs(self, x):
+        return self._limbs(x)
+
+    def commitments(self, secrets):
+        states = [[self._limbs(secret)[0], 1, 1] for secret in secrets]
+        return [state[0] for state in permute_batch(states)]
+
+    def nullifiers(self, notes):
+        # notes: iterable of (inv, secret)
+        states = [[self._limbs(inv)[0], self._limbs(secret)[0], 1] for inv, secret in notes]
+        return [state[0] for state in permute_batch(states)]
+
+    def derive(self, notes):
+        # Returns [(commitment, nullifierHash)] for (inv, secret) pairs in one Poseidon2 batch
+        notes = list(notes)
+        states = [[self._limbs(secret)[0], 1, 1] for _, secret in notes]
+        states += [[self._limbs(inv)[0], self._limbs(secret)[0], 1] for inv, secret in notes]
+        out = [state[0] for state in permute_batch(states)]
+        n = len(notes)
+        return list(zip(out[:n], out[n:]))
+
+    def cache_info(self):
+        return self._limbs.cache_info()
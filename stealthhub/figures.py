@@ -0,0 +1,233 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib import metadata
+
+# Incremental build of scripts_fig/ into figure/. Every script names its files the same way,
+# `input_data_path` / `output_data_path = os.path.join(base_dir, '../...')`, so the graph is read
+# from the sources: a script depends on whichever script writes one of its inputs (the heat maps on
+# metrics_data.py). The manifest records, per script, the hash of its source, of each input and of
+# the style environment (plotting library versions and matplotlibrc) it was last rendered with; a
+# script is stale when any of these differ or one of its outputs is missing. Stale scripts of the
+# same depth run in parallel.
+base_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.normpath(os.path.join(base_dir, '..'))
+fig_dir = os.path.join(repo_dir, 'scripts_fig')
+manifest_path = os.path.join(repo_dir, 'figure', '.build.json')
+
+PATH_RE = re.compile(r"(input|output)_data_path\s*=\s*os\.path\.join\(base_dir,\s*['\"]([^'\"]+)['\"]\)")
+STYLE_PACKAGES = ("matplotlib", "seaborn", "pandas", "numpy")
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _repo_path(path):
+    return os.path.relpath(os.path.normpath(os.path.join(fig_dir, path)), repo_dir)
+
+
+def figure_scripts():
+    # metrics_data.py and fig_*.py; _fig_*.py are drafts that write nothing
+    names = sorted(n[:-3] for n in os.listdir(fig_dir) if n.startswith("fig_") and n.endswith(".py"))
+    return ["metrics_data"] + names
+
+
+def build_graph(names=None):
+    # {name: {"script", "inputs", "outputs", "deps"}} with repo-relative paths
+    graph = {}
+    for name in names or figure_scripts():
+        script = os.path.join(fig_dir, f"{name}.py")
+        with open(script) as f:
+            source = f.read()
+        files = {"input": [], "output": []}
+        for kind, path in PATH_RE.findall(source):
+            files[kind].append(_repo_path(path))
+        graph[name] = {"script": os.path.relpath(script, repo_dir), "inputs": files["input"],
+                       "outputs": files["output"], "deps": []}
+    writers = {out: name for name, node in graph.items() for out in node["outputs"]}
+    for name, node in graph.items():
+        node["deps"] = sorted({writers[i] for i in node["inputs"] if i in writers and writers[i] != name})
+    return graph
+
+
+def depths(graph):
+    depth = {}
+
+    def visit(name, seen=()):
+        if name in seen:
+            raise ValueError(f"figure scripts depend on each other in a cycle through {name}")
+        if name not in depth:
+            depth[name] = 1 + max((visit(d, seen + (name,)) for d in graph[name]["deps"]), default=-1)
+        return depth[name]
+
+    for name in graph:
+        visit(name)
+    return depth
+
+
+def style_signature():
+    style = {}
+    for package in STYLE_PACKAGES:
+        try:
+            style[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            style[package] = None
+    rc = os.environ.get("MATPLOTLIBRC") or os.path.join(os.path.expanduser("~"), ".config", "matplotlib", "matplotlibrc")
+    if os.path.isdir(rc):
+        rc = os.path.join(rc, "matplotlibrc")
+    style["matplotlibrc"] = _sha256(rc) if os.path.isfile(rc) else None
+    style["backend"] = "Agg"
+    return style
+
+
+def signature(node, style):
+    inputs = {}
+    for path in node["inputs"]:
+        full = os.path.join(repo_dir, path)
+        inputs[path] = _sha256(full) if os.path.exists(full) else None
+    return {"code": _sha256(os.path.join(repo_dir, node["script"])), "inputs": inputs, "style": style}
+
+
+def stale_reason(node, record, sig):
+    if record is None:
+        return "never built"
+    missing = [out for out in node["outputs"] if not os.path.exists(os.path.join(repo_dir, out))]
+    if missing:
+        return f"missing {', '.join(missing)}"
+    if record.get("code") != sig["code"]:
+        return "script changed"
+    changed = [path for path, digest in sig["inputs"].items() if record.get("inputs", {}).get(path) != digest]
+    if changed:
+        return f"input changed: {', '.join(changed)}"
+    if record.get("style") != sig["style"]:
+        return "style changed"
+    return None
+
+
+def load_manifest(path=manifest_path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, path=manifest_path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def render(node):
+    # Non-interactive backend so plt.show() at the end of each script returns immediately
+    env = dict(os.environ, MPLBACKEND="Agg")
+    t = time.perf_counter()
+    proc = subprocess.run([sys.executable, os.path.join(repo_dir, node["script"])], env=env,
+                          capture_output=True, text=True)
+    return proc.returncode, proc.stderr, time.perf_counter() - t
+
+
+def build(targets=None, force=False, jobs=None, dry_run=False, manifest_file=manifest_path, log=print):
+    # Brings `targets` (default every script) and their upstream scripts up to date. Returns
+    # {name: "built" | "fresh" | "failed" | "skipped" | "stale"}.
+    graph = build_graph()
+    wanted = set()
+    pending = list(targets or graph)
+    while pending:
+        name = pending.pop()
+        if name not in graph:
+            raise KeyError(name)
+        if name not in wanted:
+            wanted.add(name)
+            pending.extend(graph[name]["deps"])
+    depth = depths(graph)
+    manifest = load_manifest(manifest_file)
+    style = style_signature()
+    status = {}
+
+    for level in sorted({depth[name] for name in wanted}):
+        batch = []
+        for name in sorted(n for n in wanted if depth[n] == level):
+            node = graph[name]
+            if any(status[d] in ("failed", "skipped") for d in node["deps"]):
+                status[name] = "skipped"
+                log(f"{name}: skipped, an upstream script failed")
+                continue
+            # Signatures are taken after the upstream level ran, so rewritten inputs are seen here
+            sig = signature(node, style)
+            missing = [path for path, digest in sig["inputs"].items() if digest is None]
+            if missing:
+                status[name] = "skipped"
+                log(f"{name}: skipped, missing input {', '.join(missing)}")
+                continue
+            reason = "forced" if force else stale_reason(node, manifest.get(name), sig)
+            if reason is None:
+                status[name] = "fresh"
+                continue
+            log(f"{name}: {reason}")
+            batch.append((name, sig))
+        if dry_run:
+            status.update((name, "stale") for name, _ in batch)
+            continue
+        with ThreadPoolExecutor(jobs or os.cpu_count() or 1) as executor:
+            results = executor.map(lambda item: render(graph[item[0]]), batch)
+            for (name, sig), (code, stderr, elapsed) in zip(batch, results):
+                if code != 0:
+                    status[name] = "failed"
+                    manifest.pop(name, None)
+                    log(f"{name}: failed with exit status {code}\n{stderr.rstrip()}")
+                    continue
+                status[name] = "built"
+                manifest[name] = dict(sig, outputs=graph[name]["outputs"])
+                log(f"{name}: built {', '.join(graph[name]['outputs'])} in {elapsed:.1f}s")
+        save_manifest(manifest, manifest_file)
+    return status
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="stealthhub figures",
+                                     description="Re-render the figures in figure/ whose script, data or style changed")
+    parser.add_argument("names", nargs="*", help="scripts_fig/<name>.py without the suffix; default all")
+    parser.add_argument("--list", action="store_true", help="print each script with its inputs, outputs and state")
+    parser.add_argument("--dry-run", action="store_true", help="report stale figures without rendering")
+    parser.add_argument("--force", action="store_true", help="re-render even if up to date")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="parallel renders (default: CPU count)")
+    parser.add_argument("--manifest", default=manifest_path)
+    args = parser.parse_args(argv)
+
+    graph = build_graph()
+    for name in args.names:
+        if name not in graph:
+            parser.error(f"unknown figure script {name}")
+    if args.list:
+        manifest = load_manifest(args.manifest)
+        style = style_signature()
+        for name, node in graph.items():
+            if node["deps"] and any(stale_reason(graph[d], manifest.get(d), signature(graph[d], style)) for d in node["deps"]):
+                state = "stale upstream"
+            else:
+                state = stale_reason(node, manifest.get(name), signature(node, style)) or "up to date"
+            print(f"{name}: {', '.join(node['inputs']) or '-'} -> {', '.join(node['outputs']) or '-'} ({state})")
+        return 0
+
+    t = time.perf_counter()
+    status = build(args.names, args.force, args.jobs, args.dry_run, args.manifest)
+    counts = {s: sum(1 for v in status.values() if v == s) for s in ("built", "stale", "fresh", "failed", "skipped")}
+    print(", ".join(f"{n} {s}" for s, n in counts.items() if n) + f" in {time.perf_counter() - t:.1f}s")
+    return 1 if counts["failed"] or counts["skipped"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
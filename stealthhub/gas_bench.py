@@ -0,0 +1,207 @@
+import argparse
+import http.client
+import json
+import os
+import queue
+import subprocess
+import tempfile
+import threading
+import time
+from collections import defaultdict, deque
+from urllib.parse import urlparse
+
+from stealthhub.gastrace import GasTraceWriter, read_gas_trace
+
+# Pipelined replacement for the serial `await tx.wait()` loops of scripts/test3 ... test8: a node
+# signer pre-signs the same call for consecutive nonces, up to `window` transactions are in flight
+# on a local hardhat / anvil node, and receipts are fetched in JSON-RPC batch requests.
+base_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.join(base_dir, '..')
+data_dir = os.path.join(repo_dir, 'data')
+signer_js = os.path.join(repo_dir, 'scripts', 'gas_bench_signer.js')
+# Tree inserts per transaction of each target: Shm.shieldedTransfer inserts both commitments,
+# Sha.shieldedTransfer only commitment1
+TARGETS = {"shi_dep": 1, "shi_st": 2, "shm_dep": 1, "shm_st": 2, "sha_dep": 1, "sha_st": 1}
+
+
+class RpcError(RuntimeError):
+    pass
+
+
+class RpcClient:
+    # JSON-RPC over one persistent HTTP connection
+    def __init__(self, url="http://127.0.0.1:8545", timeout=60):
+        parsed = urlparse(url)
+        self.path = parsed.path or "/"
+        self.conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=timeout)
+        self._id = 0
+
+    def _post(self, body):
+        self.conn.request("POST", self.path, json.dumps(body), {"Content-Type": "application/json"})
+        response = self.conn.getresponse()
+        return json.loads(response.read())
+
+    def call(self, method, params=()):
+        return self.batch([(method, list(params))])[0]
+
+    def batch(self, calls):
+        start = self._id
+        body = [{"jsonrpc": "2.0", "id": start + i, "method": m, "params": list(p)} for i, (m, p) in enumerate(calls)]
+        self._id += len(calls)
+        replies = self._post(body)
+        if isinstance(replies, dict):
+            raise RpcError(replies.get("error", replies))
+        results = [None] * len(calls)
+        for reply in replies:
+            if "error" in reply:
+                raise RpcError(f"{calls[reply['id'] - start][0]}: {reply['error']}")
+            results[reply["id"] - start] = reply["result"]
+        return results
+
+
+class Signer:
+    # scripts/gas_bench_signer.js; chunks are signed ahead on a thread while earlier ones are sent
+    def __init__(self, plan_path, start, count, chunk, ahead=4):
+        self.proc = subprocess.Popen(["node", signer_js, plan_path], cwd=repo_dir, stdin=subprocess.PIPE,
+                                     stdout=subprocess.PIPE, text=True)
+        self.chunks = queue.Queue(maxsize=ahead)
+        self._thread = threading.Thread(target=self._run, args=(start, count, chunk), daemon=True)
+        self._thread.start()
+
+    def _run(self, start, count, chunk):
+        try:
+            for nonce in range(start, start + count, chunk):
+                n = min(chunk, start + count - nonce)
+                self.proc.stdin.write(json.dumps({"start": nonce, "count": n}) + "\n")
+                self.proc.stdin.flush()
+                raws = [self.proc.stdout.readline().strip() for _ in range(n)]
+                if not all(raws):
+                    raise RuntimeError("gas bench signer exited")
+                self.chunks.put(raws)
+        except Exception as e:
+            self.chunks.put(e)
+
+    def next(self):
+        item = self.chunks.get()
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    def close(self):
+        self.proc.stdin.close()
+        self.proc.wait()
+
+
+def prepare(target, network="localhost"):
+    hardhat = os.path.join(repo_dir, "node_modules", ".bin", "hardhat")
+    if not os.path.exists(hardhat):
+        raise SystemExit("hardhat is not installed; run npm install or pass --plan")
+    fd, plan_path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    env = dict(os.environ, GAS_BENCH_TARGET=target, GAS_BENCH_OUTPUT=plan_path)
+    subprocess.run([hardhat, "run", "scripts/gas_bench_prepare.js", "--network", network], cwd=repo_dir, env=env, check=True)
+    return plan_path
+
+
+def next_nonce(rpc, plan):
+    return int(rpc.call("eth_getTransactionCount", [plan["sender"], "pending"]), 16)
+
+
+def run(rpc, plan_path, start, count, writer, window=1024, chunk=128, poll=0.05, progress=None):
+    # Sends `count` pre-signed transactions from nonce `start` and appends gasUsed in nonce order
+    signer = Signer(plan_path, start, count, chunk)
+    pending = deque()
+    sent = 0
+    done = 0
+    try:
+        while done < count:
+            while sent < count and len(pending) < window:
+                raws = signer.next()
+                pending.extend(rpc.batch([("eth_sendRawTransaction", [raw]) for raw in raws]))
+                sent += len(raws)
+            head = [pending[i] for i in range(min(chunk, len(pending)))]
+            receipts = rpc.batch([("eth_getTransactionReceipt", [h]) for h in head])
+            gas = []
+            for tx_hash, receipt in zip(head, receipts):
+                if receipt is None:
+                    break
+                if int(receipt["status"], 16) != 1:
+                    raise RpcError(f"transaction {tx_hash} reverted")
+                gas.append(int(receipt["gasUsed"], 16))
+            if not gas:
+                time.sleep(poll)
+                continue
+            writer.append(gas)
+            for _ in gas:
+                pending.popleft()
+            done += len(gas)
+            if progress:
+                progress(done, count)
+    finally:
+        signer.close()
+    return done
+
+
+def popcount_profile(gas, first_index=1, inserts_per_tx=1):
+    # Mmr.sol hashes popcount(currentIndex) times per insert; currentIndex starts at 1. Transaction
+    # i makes inserts first_index + i * inserts_per_tx onwards and is grouped by its total hashes.
+    groups = defaultdict(list)
+    for i, g in enumerate(gas):
+        index = first_index + i * inserts_per_tx
+        groups[sum(bin(index + j).count("1") for j in range(inserts_per_tx))].append(g)
+    return {k: (len(v), sum(v) / len(v), min(v), max(v)) for k, v in sorted(groups.items())}
+
+
+def print_progress(current, total, label="gas bench"):
+    print(f"\r{label} progress: {current}/{total} ({current / total * 100:.2f}%)", end="", flush=True)
+    if current == total:
+        print()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pipelined gasUsed sampling over JSON-RPC into a binary trace")
+    parser.add_argument("target", choices=TARGETS, help="which scripts/test*.js measurement to repeat")
+    parser.add_argument("--count", type=int, default=65536)
+    parser.add_argument("--window", type=int, default=1024, help="transactions in flight")
+    parser.add_argument("--chunk", type=int, default=128, help="transactions per batch request")
+    parser.add_argument("--rpc", default="http://127.0.0.1:8545")
+    parser.add_argument("--network", default="localhost", help="hardhat network used to deploy")
+    parser.add_argument("--plan", help="reuse a plan from scripts/gas_bench_prepare.js instead of deploying")
+    parser.add_argument("--output", help="default data/<target>_gas.bin")
+    parser.add_argument("--append", action="store_true",
+                        help="extend the trace of an earlier run on the same --plan instead of overwriting it")
+    args = parser.parse_args(argv)
+    if args.append and not args.plan:
+        parser.error("--append needs the --plan of the run being extended")
+
+    # A plan written by prepare() holds the sender's private key; it is removed once the run ends
+    plan_path = args.plan or prepare(args.target, args.network)
+    try:
+        with open(plan_path) as f:
+            plan = json.load(f)
+        output = args.output or os.path.join(data_dir, f"{args.target}_gas.bin")
+        rpc = RpcClient(args.rpc)
+        # The plan's sender is the only one calling its pool, so its nonce counts the calls before
+        start = next_nonce(rpc, plan)
+
+        t = time.perf_counter()
+        with GasTraceWriter(output, start, args.append) as writer:
+            done = run(rpc, plan_path, start, args.count, writer, args.window, args.chunk, progress=print_progress)
+        elapsed = time.perf_counter() - t
+    finally:
+        if not args.plan:
+            os.remove(plan_path)
+    print(f"{done} transactions in {elapsed:.1f}s ({done / elapsed:.0f} tx/s); trace "
+          f"{'appended to' if args.append else 'written to'} {output}")
+
+    if args.target.startswith(("shm", "sha")):
+        first, gas = read_gas_trace(output)
+        per_tx = TARGETS[args.target]
+        print(f"{'popcount':>8s} {'n':>8s} {'mean':>10s} {'min':>8s} {'max':>8s}"
+              + (f"  (summed over the {per_tx} inserts of each transaction)" if per_tx > 1 else ""))
+        for k, (n, mean, lo, hi) in popcount_profile(gas, first * per_tx + 1, per_tx).items():
+            print(f"{k:8d} {n:8d} {mean:10.0f} {lo:8d} {hi:8d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import os
+import struct
+import sys
+from array import array
+
+# Binary gasUsed trace: a 16-byte header (magic "SHGT", u16 version, u16 record size, u64 sender
+# nonce of the first record) followed by one little-endian u32 gasUsed per transaction in nonce
+# order. A record is a transaction, which may make more than one tree insert.
+# Appending records never touches the header, so a trace can be streamed and read while growing.
+# A new writer truncates the file unless `append` is set, in which case the existing trace must end
+# right before `start`, so records of another run or deployment are never mixed in.
+MAGIC = b"SHGT"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQ")
+RECORD = 4
+
+
+class GasTraceWriter:
+    def __init__(self, path, start=0, append=False):
+        if append and os.path.exists(path) and os.path.getsize(path) >= HEADER.size:
+            first, records = read_gas_trace(path)
+            if first + len(records) != start:
+                raise ValueError(f"{path} holds records {first}..{first + len(records) - 1}; "
+                                 f"cannot append from {start}")
+            self.f = open(path, "ab")
+            self.f.truncate(HEADER.size + len(records) * RECORD)
+        else:
+            self.f = open(path, "wb")
+            self.f.write(HEADER.pack(MAGIC, VERSION, RECORD, start))
+
+    def append(self, values):
+        records = array("I", values)
+        if sys.byteorder == "big":
+            records.byteswap()
+        self.f.write(records.tobytes())
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_gas_trace(path):
+    # Returns (index of the first record, array of gasUsed)
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, size, start = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION or size != RECORD:
+        raise ValueError(f"{path} is not a version {VERSION} gas trace")
+    body = data[HEADER.size:]
+    records = array("I")
+    records.frombytes(body[:len(body) - len(body) % RECORD])
+    if sys.byteorder == "big":
+        records.byteswap()
+    return start, records
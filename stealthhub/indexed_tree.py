@@ -0,0 +1,275 @@
+import argparse
+import bisect
+import heapq
+import json
+import os
+import random
+import time
+
+from stealthhub.models import fit_metric, load_metrics, load_variant_gas
+from stealthhub.mt import ROOT_HISTORY_SIZE, MerkleTree
+from stealthhub.paths import PathService
+from stealthhub.poseidon2 import hash2
+
+# Indexed (sorted linked-leaf) nullifier tree: the alternative to `mapping(bytes32 => bool)
+# nullifierHashes` in Shi.sol / Shm.sol / Sha.sol. Each leaf commits to a spent nullifier and the next
+# larger one, hash2(value, next_value), with next_value 0 past the largest; leaf 0 is the (0, min)
+# sentinel and empty slots are 0. A nullifier x is unspent when some leaf (low, next) has
+# low < x and (x < next or next == 0), so one Merkle path proves non-membership and inserting x
+# rewrites that low leaf and appends (x, next). Values are the low VALUE_BITS bits of the
+# nullifier hash, so circomlib's LessThan(252) can compare them.
+base_dir = os.path.dirname(os.path.abspath(__file__))
+output_path = os.path.join(base_dir, '../data/nullifier_bench.json')
+
+VALUE_BITS = 252
+DEPTH = 32
+
+# Constraints of the circuit pieces, as in circuits/utils.circom and circomlib
+HASH = 240          # HashLeftRightPoseidon2
+LEVEL = HASH + 3    # one MerkleTreeCheckerPoseidon2 level: hash plus DualMux
+NUM2BITS = VALUE_BITS
+LESS_THAN = VALUE_BITS + 1
+IS_ZERO = 2
+OR = 1
+
+# EIP-2929 / EIP-2200 / EIP-3529 storage costs, and the Groth16 verifier cost of one public signal
+COLD_SLOAD = 2100
+SSTORE_SET = 20000      # zero to non-zero, slot already warm
+SSTORE_RESET = 2900     # non-zero to non-zero, slot already warm
+ECMUL = 6000
+ECADD = 150
+CALLDATA_WORD = 32 * 16
+PUBLIC_SIGNAL = ECMUL + ECADD + CALLDATA_WORD
+
+
+def leaf_hash(value, next_value):
+    return hash2(value, next_value)
+
+
+def nullifier_key(nullifier_hash):
+    return int(nullifier_hash) & ((1 << VALUE_BITS) - 1)
+
+
+class IndexedNullifierTree:
+    def __init__(self, depth=DEPTH, history_size=ROOT_HISTORY_SIZE):
+        self.depth = depth
+        self.tree = MerkleTree(depth, zero=0, history_size=history_size)
+        self.values = [0]
+        self.next_values = [0]
+        self.sorted = [0]
+        self.index_of = {0: 0}
+        self.tree.insert(leaf_hash(0, 0))
+
+    @property
+    def root(self):
+        return self.tree.root
+
+    def __len__(self):
+        return len(self.values) - 1
+
+    def __contains__(self, value):
+        return value in self.index_of and value != 0
+
+    def low_leaf(self, value):
+        # Index of the leaf whose gap holds `value`
+        if value in self.index_of:
+            raise ValueError(f"nullifier {value} is already spent")
+        return self.index_of[self.sorted[bisect.bisect_left(self.sorted, value) - 1]]
+
+    def _check(self, values):
+        for value in values:
+            if not 0 < value < 1 << VALUE_BITS:
+                raise ValueError(f"nullifier {value} is outside 1..2^{VALUE_BITS} - 1")
+            if value in self.index_of:
+                raise ValueError(f"nullifier {value} is already spent")
+        if len(set(values)) != len(values):
+            raise ValueError("duplicate nullifiers in one batch")
+
+    def proofs(self, values):
+        # Non-membership proofs of many nullifiers against the current root; low leaves shared by
+        # several nullifiers and their common siblings are read once
+        self._check(values)
+        lows = [self.low_leaf(value) for value in values]
+        paths = PathService(self.tree, cache_nodes=0).paths(lows)
+        return [{
+            "nullifier": value,
+            "lowIndex": low,
+            "lowValue": self.values[low],
+            "lowNextValue": self.next_values[low],
+            "pathElements": elements,
+            "pathIndices": bits,
+        } for value, low, (elements, bits) in zip(values, lows, paths)]
+
+    def verify(self, proof, root):
+        low, upper, value = proof["lowValue"], proof["lowNextValue"], proof["nullifier"]
+        if not (low < value and (value < upper or upper == 0)):
+            return False
+        return self.tree.verify(leaf_hash(low, upper), root, proof["pathElements"], proof["pathIndices"])
+
+    def insert(self, value):
+        # One nullifier, with the witness of a circuit that checks non-membership, rewrites the low
+        # leaf and appends the new one: the low leaf before the update with its path, then the
+        # (empty) path of the new slot after the update
+        self._check([value])
+        proof = self.proofs([value])[0]
+        low = proof["lowIndex"]
+        old_root = self.root
+        index = len(self.values)
+        self.values.append(value)
+        self.next_values.append(self.next_values[low])
+        self.next_values[low] = value
+        self.index_of[value] = index
+        bisect.insort(self.sorted, value)
+        self.tree.update_batch({low: leaf_hash(self.values[low], value)})
+        new_elements, new_bits = self.tree.path(index)
+        self.tree.update_batch({index: leaf_hash(value, self.next_values[index])})
+        return dict(proof, oldRoot=old_root, newIndex=index, newPathElements=new_elements,
+                    newPathIndices=new_bits, newRoot=self.root)
+
+    def insert_batch(self, values):
+        # Bulk insertion: new leaves are appended in ascending order, each low leaf is rewritten
+        # once, and every dirty node is hashed once for the whole batch. Returns (first index, root).
+        self._check(values)
+        new = sorted(values)
+        start = len(self.values)
+        changes = {}
+        previous = None
+        for k, value in enumerate(new):
+            pos = bisect.bisect_left(self.sorted, value)
+            upper = self.sorted[pos] if pos < len(self.sorted) else 0
+            if k + 1 < len(new) and (upper == 0 or new[k + 1] < upper):
+                upper = new[k + 1]
+            # Only the first new nullifier of each gap rewrites the old low leaf
+            if pos != previous:
+                previous = pos
+                low = self.index_of[self.sorted[pos - 1]]
+                self.next_values[low] = value
+                changes[low] = leaf_hash(self.values[low], value)
+            self.values.append(value)
+            self.next_values.append(upper)
+            self.index_of[value] = start + k
+            changes[start + k] = leaf_hash(value, upper)
+        self.sorted = list(heapq.merge(self.sorted, new))
+        return start, self.tree.update_batch(changes)
+
+
+def insert_constraints(depth=DEPTH):
+    # Per nullifier of a batched circuit that runs IndexedNullifierTree.insert in sequence:
+    # non-membership (low leaf hash, path, range check of x, low < x, x < next or next == 0),
+    # low leaf rewrite on the same siblings, then the new slot proven empty and filled
+    non_membership = HASH + depth * LEVEL + 1 + NUM2BITS + 2 * LESS_THAN + IS_ZERO + OR
+    low_update = HASH + depth * LEVEL
+    append = HASH + 2 * depth * LEVEL
+    return {"non_membership": non_membership, "low_update": low_update, "append": append,
+            "total": non_membership + low_update + append}
+
+
+def withdraw_gas(batch):
+    # Nullifier bookkeeping per withdrawal. The mapping reads and sets one cold slot per note; the
+    # tree reads and rewrites its root slot once per batch and adds the old and new root as
+    # public signals of the batched proof.
+    mapping = COLD_SLOAD + SSTORE_SET
+    per_batch = COLD_SLOAD + SSTORE_RESET + 2 * PUBLIC_SIGNAL
+    return {"mapping": mapping, "indexed": per_batch / batch, "indexed_per_batch": per_batch}
+
+
+def engine_rates(count, batch, depth, seed=0):
+    # The last batch is inserted again one by one, in the ascending order insert_batch uses, and
+    # must reach the same root
+    rng = random.Random(seed)
+    count = max(1, count // batch) * batch
+    values = [rng.randrange(1, 1 << VALUE_BITS) for _ in range(count)]
+    tree = IndexedNullifierTree(depth)
+    t = time.perf_counter()
+    for i in range(0, count, batch):
+        tree.insert_batch(values[i:i + batch])
+    bulk = count / (time.perf_counter() - t)
+
+    single_tree = IndexedNullifierTree(depth)
+    for i in range(0, count - batch, batch):
+        single_tree.insert_batch(values[i:i + batch])
+    t = time.perf_counter()
+    for value in sorted(values[-batch:]):
+        witness = single_tree.insert(value)
+    single = batch / (time.perf_counter() - t)
+    assert single_tree.root == tree.root
+    assert single_tree.tree.verify(leaf_hash(witness["lowValue"], witness["lowNextValue"]), witness["oldRoot"],
+                                   witness["pathElements"], witness["pathIndices"])
+
+    fresh = [rng.randrange(1, 1 << VALUE_BITS) for _ in range(batch)]
+    t = time.perf_counter()
+    proofs = tree.proofs(fresh)
+    proving = batch / (time.perf_counter() - t)
+    assert all(tree.verify(p, tree.root) for p in proofs)
+    return {"bulk_inserts_per_s": bulk, "witnessed_inserts_per_s": single, "proofs_per_s": proving}
+
+
+def run(batches, depth=DEPTH, count=4096, metrics=None, variant=None):
+    predict = fit_metric(metrics, "Poseidon2", "prove_runtime") if metrics else None
+    measured = None
+    if variant:
+        try:
+            measured = load_variant_gas(variant)["transfer"].mean
+        except FileNotFoundError:
+            measured = None
+    per_note = insert_constraints(depth)
+    rows = []
+    for batch in batches:
+        gas = withdraw_gas(batch)
+        row = {
+            "batch": batch,
+            "depth": depth,
+            "constraints_per_note": per_note["total"],
+            "constraints_per_batch": per_note["total"] * batch,
+            "gas_mapping": gas["mapping"],
+            "gas_indexed": gas["indexed"],
+            "gas_saved": gas["mapping"] - gas["indexed"],
+        }
+        if predict is not None:
+            row["extra_prove_s_predicted"] = predict(per_note["total"] * batch) - predict(0)
+        if measured is not None:
+            row["withdraw_gas_measured"] = measured
+            row["withdraw_gas_indexed"] = measured - gas["mapping"] + gas["indexed"]
+        rows.append(row)
+    return {"constraints": per_note, "engine": engine_rates(count, max(batches), depth), "rows": rows}
+
+
+def report(result):
+    c = result["constraints"]
+    lines = [f"constraints per nullifier: non-membership {c['non_membership']}, low leaf update {c['low_update']}, "
+             f"append {c['append']}, total {c['total']}"]
+    e = result["engine"]
+    lines.append(f"engine: {e['bulk_inserts_per_s']:.0f} bulk inserts/s, {e['witnessed_inserts_per_s']:.0f} witnessed inserts/s, "
+                 f"{e['proofs_per_s']:.0f} batched non-membership proofs/s")
+    lines.append(f"{'batch':>6s} {'constr':>10s} {'+prove_s':>9s} {'gas_map':>8s} {'gas_idx':>8s} {'saved':>8s} {'withdraw':>9s}")
+    for row in result["rows"]:
+        prove = row.get("extra_prove_s_predicted", float("nan"))
+        withdraw = row.get("withdraw_gas_indexed")
+        withdraw = "-" if withdraw is None else f"{withdraw:.0f}"
+        lines.append(f"{row['batch']:6d} {row['constraints_per_batch']:10d} {prove:9.2f} {row['gas_mapping']:8d} "
+                     f"{row['gas_indexed']:8.0f} {row['gas_saved']:8.0f} {withdraw:>9s}")
+    lines.append("gas from EIP-2929 storage and Groth16 public-signal costs; constraints from the per-component model; "
+                 "prove time extrapolated from data/metrics_data.json")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Indexed nullifier tree against the nullifierHashes mapping: gas, constraints, engine speed")
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 4, 16, 64, 256])
+    parser.add_argument("--depth", type=int, default=DEPTH)
+    parser.add_argument("--count", type=int, default=4096, help="nullifiers inserted to time the engine")
+    parser.add_argument("--variant", choices=["shi", "shm", "sha"], default="shi",
+                        help="apply the difference to this variant's measured withdraw gas when present")
+    parser.add_argument("--metrics", default=os.path.join(base_dir, '../data/metrics_data.json'))
+    parser.add_argument("--output", default=output_path)
+    args = parser.parse_args(argv)
+
+    metrics = load_metrics(args.metrics) if os.path.exists(args.metrics) else None
+    result = run(args.batches, args.depth, args.count, metrics, args.variant)
+    print(report(result))
+    with open(args.output, "w") as f:
+        json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+
+from stealthhub.mmr import RightMerkleTree
+from stealthhub.mt import Frontier
+from stealthhub.poseidon2 import FIELD_SIZE
+from stealthhub import snapshot
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+snapshot_path = os.path.join(base_dir, '../data/indexer.snapshot')
+
+
+def _int(x):
+    return int(x, 0) if isinstance(x, str) else int(x)
+
+
+class EventIndexer:
+    # Follows Deposit / ShieldedTransfer / Withdrawal events of Shi, Shm or Sha. The Imt pools are
+    # tracked with a Frontier, whose roots are hash2 roots rather than the contract's (see mt.py), so
+    # is_known_root answers for those roots, not for Imt.sol's isKnownRoot. Events are dicts
+    # in the shape ethers returns from queryFilter ({"event", "blockNumber", "logIndex", "args"}),
+    # and must arrive in chain order; anything at or before the cursor is skipped, so replaying an
+    # overlapping range after a restart is harmless.
+    #
+    # The last `reorg_depth` blocks keep an undo journal: the tree's per-insert undo records, the
+    # nullifiers added and the cursor before the block. rollback(block) reverts them newest first,
+    # so a reorg costs the nodes the orphaned blocks changed instead of a replay from genesis. An
+    # event whose blockHash differs from the one journaled for its block, or a log resent with
+    # `removed: true`, rolls back automatically. A reorg onto a branch without pool events sends
+    # neither, so a poller calls check_chain(rpc) on every poll before ingesting the new logs.
+    def __init__(self, tree, nullifiers=None, cursor=(0, -1), path=None, every=0, reorg_depth=64):
+        self.tree = tree
+        self.nullifiers = nullifiers if nullifiers is not None else snapshot.NullifierSet()
+        self.cursor = cursor
+        self.every = every
+        self.lock = threading.Lock()
+        self.blocks = deque(maxlen=reorg_depth)
+        self._last_block = cursor[0]
+        self.writer = snapshot.SnapshotWriter(path, self._written) if path else None
+
+    @classmethod
+    def load(cls, path, hash_fn=None, every=0, verify=True, reorg_depth=64):
+        # The journal is not persisted: a reorg deeper than the snapshot cursor needs a rebuild
+        state = snapshot.Snapshot(path, verify)
+        return cls(state.tree(hash_fn), state.nullifiers(), state.cursor, path, every, reorg_depth)
+
+    def _reorged(self, number, block_hash):
+        # An already ingested block with another hash, or events in a journaled block range that
+        # had none on the branch we followed
+        if block_hash is None or not self.blocks or number > self.cursor[0]:
+            return False
+        for block in reversed(self.blocks):
+            if block["number"] == number:
+                return block["hash"] is not None and block["hash"] != block_hash
+            if block["number"] < number:
+                break
+        return number > self.blocks[0]["cursor"][0]
+
+    def ingest(self, event):
+        position = (event["blockNumber"], event["logIndex"])
+        if event.get("removed"):
+            # The node resends logs of orphaned blocks with removed: true
+            if position <= self.cursor:
+                self.rollback(position[0] - 1)
+            return False
+        if self._reorged(position[0], event.get("blockHash")):
+            self.rollback(position[0] - 1)
+        if position <= self.cursor:
+            return False
+        args = event["args"]
+        with self.lock:
+            if self.blocks.maxlen:
+                if not self.blocks or self.blocks[-1]["number"] != position[0]:
+                    self.blocks.append({"number": position[0], "hash": event.get("blockHash"), "cursor": self.cursor,
+                                        "tree": [], "nullifiers": []})
+                block = self.blocks[-1]
+                self.tree.journal = block["tree"]
+            else:
+                block = None
+            if event["event"] == "Deposit":
+                self.tree.insert(_int(args["commitment"]))
+            elif event["event"] == "ShieldedTransfer":
+                # Sha inserts only commitment1
+                for key in ("commitment1", "commitment2"):
+                    if key in args:
+                        self.tree.insert(_int(args[key]))
+            elif event["event"] == "Withdrawal":
+                nullifier = _int(args["nullifierHash"])
+                if self.nullifiers.add(nullifier) and block is not None:
+                    block["nullifiers"].append(nullifier)
+            self.cursor = position
+        if self.every and position[0] - self._last_block >= self.every:
+            self.save()
+        return True
+
+    def ingest_all(self, events):
+        return sum(self.ingest(event) for event in events)
+
+    def check_chain(self, rpc):
+        # Compares every journaled block hash with the canonical one from eth_getBlockByNumber and
+        # rolls back from the oldest block that changed. Returns the number of blocks undone.
+        with self.lock:
+            journaled = [(b["number"], b["hash"]) for b in self.blocks if b["hash"] is not None]
+        if not journaled:
+            return 0
+        canonical = rpc.batch([("eth_getBlockByNumber", [hex(number), False]) for number, _ in journaled])
+        for (number, block_hash), block in zip(journaled, canonical):
+            if block is None or int(block["hash"], 16) != int(block_hash, 16):
+                return self.rollback(number - 1)
+        return 0
+
+    def rollback(self, block):
+        # Reverts every event after `block`; returns the number of blocks undone
+        with self.lock:
+            undone = [b for b in self.blocks if b["number"] > block]
+            cursor = undone[0]["cursor"] if undone else self.cursor
+            if cursor[0] > block:
+                raise ValueError(f"cannot roll back to block {block}: journal starts after it, rebuild the index")
+            for record in reversed(undone):
+                for change in reversed(record["tree"]):
+                    self.tree.undo(change)
+                for nullifier in record["nullifiers"]:
+                    self.nullifiers.discard(nullifier)
+                self.blocks.pop()
+            self.tree.journal = None
+            self.cursor = cursor
+            self._last_block = min(self._last_block, cursor[0])
+        return len(undone)
+
+    def is_spent(self, nullifier):
+        return nullifier in self.nullifiers
+
+    def is_known_root(self, root):
+        return self.tree.is_known_root(root)
+
+    def save(self, wait=False):
+        # Copies the state under the lock and hands it to the writer thread
+        if self.writer is None:
+            raise ValueError("indexer has no snapshot path")
+        # Submitted under the lock, so _written sees whether a newer capture is still queued
+        with self.lock:
+            state = snapshot.capture(self.tree, self.nullifiers, self.cursor)
+            self._last_block = self.cursor[0]
+            self.writer.submit(state)
+        if wait:
+            self.writer.flush()
+
+    def _written(self, path, state):
+        # Switch the nullifier base to the file just written and drop what it now holds
+        base = snapshot.Snapshot(path, verify=False).sections[snapshot.NULLIFIERS]
+        with self.lock:
+            self.nullifiers.rebase(base, self.writer.pending)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def make_tree(kind, depth):
+    return Frontier(depth) if kind == "imt" else RightMerkleTree(0)
+
+
+def synthetic_events(deposits, withdrawals, per_block=4, seed=0, first_block=1, branch=0):
+    # `branch` only changes the block hashes, so two seeds on different branches make a fork
+    rng = random.Random(seed)
+    kinds = ["Deposit"] * deposits + ["Withdrawal"] * withdrawals
+    rng.shuffle(kinds)
+    events = []
+    for i, kind in enumerate(kinds):
+        key = "commitment" if kind == "Deposit" else "nullifierHash"
+        block = first_block + i // per_block
+        events.append({
+            "event": kind,
+            "blockNumber": block,
+            "blockHash": f"0x{branch:02x}{block:062x}",
+            "logIndex": i % per_block,
+            "args": {key: hex(rng.randrange(FIELD_SIZE))},
+        })
+    return events
+
+
+def fork(events, depth, seed=1, per_block=4):
+    # The same chain with its last `depth` blocks replaced by a branch with other events
+    tip = events[-1]["blockNumber"]
+    first = tip - depth + 1
+    orphaned = [e for e in events if e["blockNumber"] >= first]
+    deposits = sum(e["event"] == "Deposit" for e in orphaned)
+    branch = synthetic_events(deposits, len(orphaned) - deposits, per_block, seed, first, branch=1)
+    return [e for e in events if e["blockNumber"] < first] + branch, branch
+
+
+def load_events(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay pool events into a snapshot, or time replay vs snapshot load")
+    parser.add_argument("--events", help="JSON lines of ethers events; default synthetic")
+    parser.add_argument("--tree", choices=["imt", "mmr"], default="imt")
+    parser.add_argument("--depth", type=int, default=20)
+    parser.add_argument("--deposits", type=int, default=500)
+    parser.add_argument("--withdrawals", type=int, default=20000)
+    parser.add_argument("--snapshot", default=snapshot_path)
+    parser.add_argument("--every", type=int, default=0, help="write a snapshot every N blocks while replaying")
+    parser.add_argument("--reorg", type=int, default=0, help="then switch the last N blocks to another branch")
+    args = parser.parse_args(argv)
+
+    events = load_events(args.events) if args.events else synthetic_events(args.deposits, args.withdrawals)
+    t = time.perf_counter()
+    indexer = EventIndexer(make_tree(args.tree, args.depth), path=args.snapshot, every=args.every)
+    indexer.ingest_all(events)
+    replay = time.perf_counter() - t
+    indexer.save(wait=True)
+    indexer.close()
+
+    t = time.perf_counter()
+    restored = EventIndexer.load(args.snapshot)
+    load = time.perf_counter() - t
+    restored.close()
+    assert restored.tree.roots == indexer.tree.roots and restored.cursor == indexer.cursor
+    assert all(restored.is_spent(_int(e["args"]["nullifierHash"])) for e in events if e["event"] == "Withdrawal")
+
+    print(f"events={len(events)} nullifiers={len(restored.nullifiers)} size={os.path.getsize(args.snapshot)} bytes")
+    print(f"replay={replay:.3f}s snapshot load={load * 1000:.2f}ms")
+
+    if args.reorg:
+        canonical, branch = fork(events, args.reorg)
+        reorged = EventIndexer(make_tree(args.tree, args.depth), reorg_depth=args.reorg + 1)
+        reorged.ingest_all(events)
+        t = time.perf_counter()
+        reorged.ingest_all(branch)
+        undo = time.perf_counter() - t
+        t = time.perf_counter()
+        rebuilt = EventIndexer(make_tree(args.tree, args.depth), reorg_depth=0)
+        rebuilt.ingest_all(canonical)
+        rebuild = time.perf_counter() - t
+        assert reorged.tree.roots == rebuilt.tree.roots and reorged.cursor == rebuilt.cursor
+        assert len(reorged.nullifiers) == len(rebuilt.nullifiers)
+        assert all(reorged.is_spent(_int(e["args"]["nullifierHash"])) for e in canonical if e["event"] == "Withdrawal")
+        print(f"reorg of {args.reorg} blocks ({len(branch)} events): rollback + re-apply={undo * 1000:.2f}ms "
+              f"rebuild from genesis={rebuild:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
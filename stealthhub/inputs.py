@@ -0,0 +1,37 @@
+import json
+import os
+import re
+
+# Inputs of the benchmarked circuits, written to circuit_input/<name>.json when no JS test has
+# produced them yet. Generators are imported only for the input kind that needs them, so
+# `stealthhub inputs` stays light: the primality generator pulls in numpy.
+base_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.join(base_dir, '..')
+input_dir = os.path.join(repo_dir, 'circuit_input')
+
+
+def ensure_input(input_name):
+    path = os.path.join(input_dir, f"{input_name}.json")
+    if os.path.exists(path):
+        return path
+    match = re.fullmatch(r"multi_(quad_)?merkle_(\d+)_(\d+)_(\d+)", input_name)
+    if match:
+        from stealthhub.aggregator import BatchAggregator
+
+        number, level1, level2 = map(int, match.groups()[1:])
+        aggregator = BatchAggregator(number, level1, level2, arity=4 if match.group(1) else 2)
+        for commitment in range(1, number + 1):
+            aggregator.submit(commitment)
+        aggregator.write_inputs(aggregator.batches[0], path)
+        return path
+    if input_name == "poseidon2_3_test":
+        with open(path, "w") as f:
+            json.dump({"inputs": ["1", "1", "1"]}, f, indent=2)
+        return path
+
+    from stealthhub.rabin_miller import circuit_configs, write_input
+
+    if input_name not in circuit_configs():
+        raise FileNotFoundError(f"no input for {input_name}; run its JS test to write {path}")
+    write_input(input_name, path)
+    return path
@@ -0,0 +1,163 @@
+import argparse
+import json
+import os
+import random
+import re
+import time
+
+import numpy as np
+
+from stealthhub.primality import random_prime
+from stealthhub.utils import bigint_to_array
+
+# Bulk conversion between big integers and the (chunk_size, chunk_num) limb arrays of the
+# bigInt circuits, plus the intermediates of PowerModAnyExp. Arrays are (count, chunk_num) uint64,
+# least significant limb first like bigint_to_array; values are reduced mod 2^(n*k) the same way.
+base_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.join(base_dir, '..')
+circuit_dir = os.path.join(repo_dir, 'test', 'circuits')
+input_dir = os.path.join(repo_dir, 'circuit_input')
+
+_NATIVE = {8: "<u1", 16: "<u2", 32: "<u4", 64: "<u8"}
+
+
+def _bytes(values, n, k):
+    width = (n * k + 7) // 8
+    mask = (1 << (n * k)) - 1
+    data = b"".join((x & mask).to_bytes(width, "little") for x in values)
+    return np.frombuffer(data, dtype=np.uint8).reshape(-1, width)
+
+
+def to_limbs(values, n, k):
+    if n > 64:
+        raise ValueError(f"chunk size {n} does not fit in uint64 limbs")
+    values = list(values)
+    if not values:
+        return np.zeros((0, k), dtype=np.uint64)
+    raw = _bytes(values, n, k)
+    if n in _NATIVE:
+        return raw.view(_NATIVE[n]).astype(np.uint64)
+    # Odd chunk sizes: regroup the little-endian bit stream into n-bit limbs
+    bits = np.unpackbits(raw, axis=1, bitorder="little")[:, :n * k].reshape(len(values), k, n)
+    weights = np.left_shift(np.uint64(1), np.arange(n, dtype=np.uint64))
+    return (bits.astype(np.uint64) * weights).sum(axis=2, dtype=np.uint64)
+
+
+def from_limbs(limbs, n):
+    limbs = np.asarray(limbs, dtype=np.uint64)
+    count, k = limbs.shape
+    if n in _NATIVE:
+        data = limbs.astype(_NATIVE[n]).tobytes()
+        width = n * k // 8
+    else:
+        shifts = np.arange(n, dtype=np.uint64)
+        bits = ((limbs[:, :, None] >> shifts) & np.uint64(1)).astype(np.uint8).reshape(count, n * k)
+        data = np.packbits(bits, axis=1, bitorder="little").tobytes()
+        width = (n * k + 7) // 8
+    return [int.from_bytes(data[i * width:(i + 1) * width], "little") for i in range(count)]
+
+
+def modexp_chain(base, exp, modulus, bits):
+    # SquareAndMultiply steps of PowerModAnyExp: current starts at 1, bits are taken most
+    # significant first, and step i gives square = current^2 and next = square * base^bit (mod p)
+    squares = []
+    nexts = []
+    current = 1
+    for i in range(bits - 1, -1, -1):
+        square = current * current % modulus
+        current = square * base % modulus if (exp >> i) & 1 else square
+        squares.append(square)
+        nexts.append(current)
+    return squares, nexts
+
+
+def chain_limbs(bases, exps, moduli, bits, n, k):
+    # Intermediates for many exponentiations as (count, bits, k) arrays
+    squares = []
+    nexts = []
+    for base, exp, modulus in zip(bases, exps, moduli):
+        s, t = modexp_chain(base, exp, modulus, bits)
+        squares += s
+        nexts += t
+    return {
+        "square": to_limbs(squares, n, k).reshape(-1, bits, k),
+        "next": to_limbs(nexts, n, k).reshape(-1, bits, k),
+    }
+
+
+def pow_mod_inputs(bases, exps, moduli, n, k):
+    # Input dicts for PowerModAnyExp with limbs as decimal strings, as circom expects
+    base = to_limbs(bases, n, k).astype(str).tolist()
+    modulus = to_limbs(moduli, n, k).astype(str).tolist()
+    return [{"base": b, "exp": str(e), "modulus": m} for b, e, m in zip(base, exps, modulus)]
+
+
+def check_outputs(bases, exps, moduli, outputs, n, k):
+    # Boolean per row: does the out[] limb array equal base^exp mod modulus
+    expected = to_limbs([pow(b, e, m) for b, e, m in zip(bases, exps, moduli)], n, k)
+    return (expected == np.asarray(outputs, dtype=np.uint64)).all(axis=1)
+
+
+def circuit_configs(directory=circuit_dir):
+    # {name: (chunk_size, chunk_num, bits)} from `component main = PowerModAnyExp(...)`
+    configs = {}
+    pattern = re.compile(r"component\s+main\s*=\s*PowerModAnyExp\((\d+),\s*(\d+),\s*(\d+)\)")
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".circom"):
+            with open(os.path.join(directory, name)) as f:
+                match = pattern.search(f.read())
+            if match:
+                configs[name[:-7]] = tuple(int(x) for x in match.groups())
+    return configs
+
+
+def random_instances(count, n, k, bits, rng=None):
+    # One RSA modulus per batch as in test/circom_mod_pow.test.js; exponents are primes of `bits`
+    # bits (65537 when bits == 17) and bases random values below the modulus
+    rng = rng or random.Random(0)
+    half = n * k // 2
+    modulus = random_prime(half, rng=rng) * random_prime(half, rng=rng)
+    exp = 65537 if bits == 17 else random_prime(bits, rng=rng)
+    bases = [rng.randrange(2, modulus) for _ in range(count)]
+    return bases, [exp] * count, [modulus] * count
+
+
+def main(argv=None):
+    configs = circuit_configs()
+    parser = argparse.ArgumentParser(description="Bulk PowerModAnyExp inputs, intermediate chains and output checks")
+    parser.add_argument("circuit", choices=sorted(configs))
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--write", action="store_true", help="write the first input to circuit_input/<circuit>.json")
+    args = parser.parse_args(argv)
+    n, k, bits = configs[args.circuit]
+
+    bases, exps, moduli = random_instances(args.count, n, k, bits, random.Random(args.seed))
+
+    t = time.perf_counter()
+    scalar = [bigint_to_array(n, k, x) for x in bases]
+    t_scalar = time.perf_counter() - t
+    t = time.perf_counter()
+    limbs = to_limbs(bases, n, k)
+    t_bulk = time.perf_counter() - t
+    assert limbs.tolist() == scalar and from_limbs(limbs, n) == bases
+
+    t = time.perf_counter()
+    inputs = pow_mod_inputs(bases, exps, moduli, n, k)
+    chain = chain_limbs(bases, exps, moduli, bits, n, k)
+    ok = check_outputs(bases, exps, moduli, chain["next"][:, -1], n, k)
+    t_chain = time.perf_counter() - t
+    assert ok.all()
+
+    print(f"{args.circuit}: chunk_size={n} chunk_num={k} bits={bits} count={args.count}")
+    print(f"limbs: bigint_to_array {t_scalar * 1000:.1f} ms, bulk {t_bulk * 1000:.1f} ms")
+    print(f"inputs + {bits}-step chains + output check: {t_chain * 1000:.1f} ms")
+    if args.write:
+        path = os.path.join(input_dir, f"{args.circuit}.json")
+        with open(path, "w") as f:
+            json.dump(inputs[0], f, indent=2)
+        print(f"Input written to {path}")
+
+
+if __name__ == "__main__":
+    main()
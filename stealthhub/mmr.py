@@ -0,0 +1,76 @@
+from stealthhub.poseidon2 import hash2
+
+# Mmr.sol constants; src/rmt.js keeps the last 10 roots
+MAX_DEPTH = 32
+ROOT_HISTORY_SIZE = 10
+
+
+class RightMerkleTree:
+    # Port of RightMerkleTree in src/rmt.js and Mmr.sol. insert_stack holds one node per one bit
+    # of current_index; inserting hashes the new leaf up through the stack and then pops the
+    # nodes that the new leaf completes. When `journal` is a list, every insert appends the popped
+    # stack nodes and the evicted root, which is all undo() needs.
+    def __init__(self, init_root, hash_fn=hash2, history_size=ROOT_HISTORY_SIZE):
+        self.hash_fn = hash_fn
+        self.init_root = init_root
+        self.current_root = init_root
+        self.current_index = 1
+        self.insert_stack = [init_root]
+        self.history_size = history_size
+        self.roots = [init_root]
+        self.journal = None
+
+    @classmethod
+    def from_state(cls, init_root, insert_stack, roots, current_index, history_size=ROOT_HISTORY_SIZE, hash_fn=hash2):
+        tree = cls.__new__(cls)
+        tree.hash_fn = hash_fn
+        tree.init_root = init_root
+        tree.current_root = roots[-1]
+        tree.current_index = current_index
+        tree.insert_stack = list(insert_stack)
+        tree.history_size = history_size
+        tree.roots = list(roots)
+        tree.journal = None
+        return tree
+
+    @property
+    def next_index(self):
+        return self.current_index + 1
+
+    def insert(self, commitment):
+        count_hash = bin(self.current_index).count("1")
+        if len(self.insert_stack) != count_hash:
+            raise ValueError("insertStack length mismatch")
+        right = [commitment]
+        for i in range(count_hash):
+            right.append(self.hash_fn(self.insert_stack[i], right[i]))
+        self.current_root = right[-1]
+        self.roots.append(self.current_root)
+        evicted = self.roots.pop(0) if len(self.roots) > self.history_size else None
+
+        self.current_index += 1
+        if self.next_index % 2 == 0:
+            low = 0
+            stack = [commitment] + self.insert_stack
+        else:
+            low = (self.current_index & -self.current_index).bit_length() - 1
+            stack = [right[low]] + self.insert_stack[low:]
+        if len(stack) > MAX_DEPTH:
+            raise ValueError("insertStack overflow")
+        if self.journal is not None:
+            self.journal.append((self.insert_stack[:low], evicted))
+        self.insert_stack = stack
+        return self.current_index, self.current_root
+
+    def undo(self, record):
+        # The new stack is one node followed by a suffix of the old one
+        popped, evicted = record
+        self.insert_stack = popped + self.insert_stack[1:]
+        self.roots.pop()
+        if evicted is not None:
+            self.roots.insert(0, evicted)
+        self.current_root = self.roots[-1]
+        self.current_index -= 1
+
+    def is_known_root(self, root):
+        return root != 0 and root in self.roots
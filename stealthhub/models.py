@@ -0,0 +1,123 @@
+import json
+import math
+import os
+
+from stealthhub.gastrace import read_gas_trace
+
+# Cost models fitted to the measurements already in the repo: gas traces written by
+# scripts/test*.js and Groth16 metrics written by scripts_fig/metrics_data.py.
+base_dir = os.path.dirname(os.path.abspath(__file__))
+data_dir = os.path.join(base_dir, '../data')
+
+# Constraints per 2-to-1 hash, the `base` of C = base * 4^u * h in scripts_fig/fig_*_constraints.py
+HASH_CONSTRAINTS = {
+    "MiMC": 1320,
+    "GMiMC": 678,
+    "Poseidon": 240,
+    "Poseidon2": 240,
+    "Neptune": 228,
+}
+
+# Gas traces per variant, as written by scripts/test3_shi_dep.js ... test8_sha_st.js
+VARIANTS = {
+    "shi": {"deposit": "shi_dep_31_gas_used.json", "transfer": "shi_st_31_gas_used.json", "root_history": 30, "batched": False},
+    "shm": {"deposit": "shm_dep_16_31_gas_used.json", "transfer": "shm_st_16_31_gas_used.json", "root_history": None, "batched": False},
+    "sha": {"deposit": "sha_dep_16_31_gas_used.json", "transfer": "sha_st_16_31_gas_used.json", "root_history": None, "batched": True},
+}
+
+
+def merkle_constraints(levels, hash_name="Poseidon2"):
+    return HASH_CONSTRAINTS[hash_name] * levels
+
+
+def multi_merkle_constraints(number, level1, level2, hash_name="Poseidon2"):
+    # MultiMerkleTreeCheckerPoseidon2(number, level1, level2): one path per tree layer per leaf
+    return number * merkle_constraints(level1 + level2, hash_name)
+
+
+class GasModel:
+    # Replays a measured per-insert gas trace; MMR costs depend on the insert index, so the
+    # trace is indexed rather than averaged
+    def __init__(self, samples):
+        if not samples:
+            raise ValueError("empty gas trace")
+        self.samples = [int(x) for x in samples]
+
+    def cost(self, index):
+        return self.samples[index % len(self.samples)]
+
+    @property
+    def mean(self):
+        return sum(self.samples) / len(self.samples)
+
+    @classmethod
+    def load(cls, path):
+        if path.endswith(".bin"):
+            # Binary traces from stealthhub/gas_bench.py
+            return cls(read_gas_trace(path)[1])
+        with open(path, 'r') as f:
+            data = json.load(f)
+        # Each script stores a single list under mmrGas or imtGas
+        (samples,) = data.values()
+        return cls(samples)
+
+
+def load_variant_gas(variant, directory=data_dir):
+    spec = VARIANTS[variant]
+    paths = {op: os.path.join(directory, spec[op]) for op in ("deposit", "transfer")}
+    missing = [p for p in paths.values() if not os.path.exists(p)]
+    if missing:
+        raise FileNotFoundError(f"missing gas measurements {missing}; run the scripts in scripts/ first (README section 2)")
+    return {op: GasModel.load(p) for op, p in paths.items()}
+
+
+class Affine:
+    # y = c + m * x, fitted by least squares; suits prove time (fixed start-up cost plus per constraint work)
+    def __init__(self, c, m):
+        self.c = c
+        self.m = m
+
+    def __call__(self, x):
+        return self.c + self.m * x
+
+    @classmethod
+    def fit(cls, xs, ys):
+        n = len(xs)
+        mx = sum(xs) / n
+        my = sum(ys) / n
+        m = sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / sum((x - mx) ** 2 for x in xs)
+        return cls(my - m * mx, m)
+
+
+class PowerLaw:
+    # y = a * x^k, fitted by least squares in log-log space
+    def __init__(self, a, k):
+        self.a = a
+        self.k = k
+
+    def __call__(self, x):
+        return self.a * x ** self.k
+
+    @classmethod
+    def fit(cls, xs, ys):
+        lx = [math.log(x) for x in xs]
+        ly = [math.log(y) for y in ys]
+        n = len(lx)
+        mx = sum(lx) / n
+        my = sum(ly) / n
+        k = sum((x - mx) * (y - my) for x, y in zip(lx, ly)) / sum((x - mx) ** 2 for x in lx)
+        return cls(math.exp(my - k * mx), k)
+
+
+def load_metrics(path=os.path.join(data_dir, 'metrics_data.json')):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def fit_metric(metrics, hash_name="Poseidon2", metric="prove_runtime", model=Affine):
+    # Rows of metrics_data.json are Merkle trees of `height`, i.e. 2^height - 1 hashes.
+    # Predictions far beyond the measured 2^8 - 1 hashes are extrapolations.
+    rows = metrics[hash_name]
+    xs = [HASH_CONSTRAINTS[hash_name] * (2 ** r["height"] - 1) for r in rows]
+    ys = [r[metric] for r in rows]
+    return model.fit(xs, ys)
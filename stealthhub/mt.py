@@ -0,0 +1,308 @@
+import argparse
+import time
+
+from stealthhub.poseidon2 import hash2
+
+# ZERO_VALUE of contracts/Imt.sol (keccak256("tornado") % FIELD_SIZE)
+ZERO_VALUE = 21663839004416932945382355908790599225266501822907911457504978515578255421292
+ROOT_HISTORY_SIZE = 30
+
+
+def build_zeros(zero, depth, hash_fn=hash2):
+    # zeros[i] is the root of an empty subtree of height i
+    zeros = [zero]
+    for _ in range(depth):
+        zeros.append(hash_fn(zeros[-1], zeros[-1]))
+    return zeros
+
+
+class MerkleTree:
+    # Incremental Merkle tree with Poseidon2 (hash2 over build_zeros, not the zeros table of Imt.sol),
+    # filled left to right and following the path convention of MerkleTreeCheckerPoseidon2 (pathIndices[i] = 1 when the node is a right child).
+    # Unlike MT in src/mt.js every node is kept, so a path can be produced for any leaf.
+    # When `journal` is a list, every insert appends an undo record for undo().
+    def __init__(self, depth, zero=ZERO_VALUE, hash_fn=hash2, history_size=ROOT_HISTORY_SIZE):
+        self.depth = depth
+        self.hash_fn = hash_fn
+        self.zeros = build_zeros(zero, depth, hash_fn)
+        self.levels = [[] for _ in range(depth + 1)]
+        self.history_size = history_size
+        self.roots = [self.zeros[depth]]
+        self.journal = None
+
+    @property
+    def next_index(self):
+        return len(self.levels[0])
+
+    @property
+    def root(self):
+        return self.roots[-1]
+
+    def node(self, level, index):
+        nodes = self.levels[level]
+        return nodes[index] if index < len(nodes) else self.zeros[level]
+
+    def insert(self, leaf):
+        index = self.next_index
+        if index >= 2 ** self.depth:
+            raise ValueError("Merkle tree is full. No more leaves can be added")
+        if self.journal is not None:
+            self.journal.append(self._undo_record(index))
+        self.levels[0].append(leaf)
+        current = leaf
+        i = index
+        for level in range(self.depth):
+            if i % 2 == 0:
+                current = self.hash_fn(current, self.zeros[level])
+            else:
+                current = self.hash_fn(self.levels[level][i - 1], current)
+            i //= 2
+            nodes = self.levels[level + 1]
+            if i < len(nodes):
+                nodes[i] = current
+            else:
+                nodes.append(current)
+        self._push_root(current)
+        return index, current
+
+    def insert_batch(self, leaves, all_roots=False):
+        # Inserts consecutive leaves, re-hashing every dirty internal node exactly once
+        # (about b + h hashes for b leaves instead of b * h). The contract records one root per
+        # insert but keeps only the last ROOT_HISTORY_SIZE, so by default only those roots are
+        # rebuilt; `all_roots` rebuilds one per leaf. Returns (index of the first leaf, roots),
+        # where roots belong to the last len(roots) leaves of the batch.
+        start = self.next_index
+        end = start + len(leaves)
+        if end > 2 ** self.depth:
+            raise ValueError("Merkle tree is full. No more leaves can be added")
+        if not leaves:
+            return start, []
+        first = start if all_roots else max(start, end - self.history_size)
+        if self.journal is not None:
+            self.journal.append(self._undo_record(start))
+        self.levels[0].extend(leaves)
+
+        lo, hi = start, end - 1
+        for level in range(self.depth):
+            nodes = self.levels[level + 1]
+            lo //= 2
+            hi //= 2
+            for parent in range(lo, hi + 1):
+                value = self.hash_fn(self.node(level, 2 * parent), self.node(level, 2 * parent + 1))
+                if parent < len(nodes):
+                    nodes[parent] = value
+                else:
+                    nodes.append(value)
+
+        roots = [self._prefix_root(index) for index in range(first, end - 1)]
+        roots.append(self.levels[self.depth][0])
+        for root in roots:
+            self._push_root(root)
+        return start, roots
+
+    def update_batch(self, changes):
+        # Sets leaves {index: leaf}, overwriting existing ones and appending new ones without gaps,
+        # re-hashes every dirty internal node once and records one root. Not journaled.
+        if self.journal is not None:
+            raise ValueError("update_batch is not journaled")
+        if not changes:
+            return self.root
+        end = max(self.next_index, max(changes) + 1)
+        if end > 2 ** self.depth:
+            raise ValueError("Merkle tree is full. No more leaves can be added")
+        if any(i not in changes for i in range(self.next_index, end)):
+            raise ValueError("appended leaves must be contiguous")
+        leaves = self.levels[0]
+        leaves.extend([self.zeros[0]] * (end - len(leaves)))
+        for index, leaf in changes.items():
+            leaves[index] = leaf
+
+        dirty = sorted({index // 2 for index in changes})
+        for level in range(self.depth):
+            nodes = self.levels[level + 1]
+            for parent in dirty:
+                value = self.hash_fn(self.node(level, 2 * parent), self.node(level, 2 * parent + 1))
+                if parent < len(nodes):
+                    nodes[parent] = value
+                else:
+                    nodes.append(value)
+            dirty = sorted({parent // 2 for parent in dirty})
+        self._push_root(self.levels[self.depth][0])
+        return self.root
+
+    def _prefix_root(self, index):
+        # Root of the tree holding leaves 0..index. Left siblings are complete subtrees, so their
+        # final nodes apply; the node itself is final up to the level where `index` stops being
+        # the last leaf of its subtree (its trailing one bits).
+        level = 0
+        while level < self.depth and (index >> level) & 1:
+            level += 1
+        current = self.levels[level][index >> level]
+        i = index >> level
+        for level in range(level, self.depth):
+            if i % 2 == 0:
+                current = self.hash_fn(current, self.zeros[level])
+            else:
+                current = self.hash_fn(self.levels[level][i - 1], current)
+            i //= 2
+        return current
+
+    def _push_root(self, root):
+        self.roots.append(root)
+        if len(self.roots) > self.history_size:
+            del self.roots[0]
+
+    def _undo_record(self, lo):
+        # Inserting from leaf lo on only appends nodes, except the first parent on each level,
+        # which may already hold a partial hash; keep those and the whole root ring, which holds
+        # at most history_size roots however many the insert pushes
+        overwritten = []
+        for level in range(1, self.depth + 1):
+            lo //= 2
+            nodes = self.levels[level]
+            overwritten.append(nodes[lo] if lo < len(nodes) else None)
+        return self.next_index, overwritten, list(self.roots)
+
+    def undo(self, record):
+        # Reverts the insert that produced `record`; records must be undone newest first
+        start, overwritten, roots = record
+        del self.levels[0][start:]
+        lo = start
+        for level, old in enumerate(overwritten, 1):
+            lo //= 2
+            nodes = self.levels[level]
+            if old is None:
+                del nodes[lo:]
+            else:
+                del nodes[lo + 1:]
+                nodes[lo] = old
+        self.roots[:] = roots
+
+    def is_known_root(self, root):
+        return root != 0 and root in self.roots
+
+    def path(self, index):
+        # Returns (pathElements, pathIndices) from leaf level to the root; empty slots hold zeros[0]
+        if not 0 <= index < 2 ** self.depth:
+            raise IndexError(f"leaf {index} is outside a tree of depth {self.depth}")
+        elements = []
+        indices = []
+        for level in range(self.depth):
+            elements.append(self.node(level, index ^ 1))
+            indices.append(index & 1)
+            index //= 2
+        return elements, indices
+
+    def verify(self, leaf, root, elements, indices):
+        current = leaf
+        for element, bit in zip(elements, indices):
+            current = self.hash_fn(element, current) if bit else self.hash_fn(current, element)
+        return current == root
+
+
+class Frontier:
+    # Frontier only, laid out like Imt.sol: filledSubtrees, nextIndex and a roots ring indexed by
+    # currentRootIndex, with roots[0] starting as zeros[depth - 1] as in the contract constructor.
+    # Enough to follow inserts and check roots in O(depth) memory, but not to build paths. Its roots
+    # are those of hash_fn over build_zeros (hash2 by default, as the circuits hash), not the on-chain
+    # roots: Imt.sol hashes with callPoseidon2Yul over its own hard-coded zeros table.
+    def __init__(self, depth, zero=ZERO_VALUE, hash_fn=hash2, history_size=ROOT_HISTORY_SIZE):
+        self.depth = depth
+        self.hash_fn = hash_fn
+        self.zeros = build_zeros(zero, depth, hash_fn)
+        self.filled_subtrees = self.zeros[:depth]
+        self.roots = [0] * history_size
+        self.roots[0] = self.zeros[depth - 1]
+        self.current_root_index = 0
+        self.next_index = 0
+        self.journal = None
+
+    @classmethod
+    def from_state(cls, depth, zeros, filled_subtrees, roots, current_root_index, next_index, hash_fn=hash2):
+        frontier = cls.__new__(cls)
+        frontier.depth = depth
+        frontier.hash_fn = hash_fn
+        frontier.zeros = list(zeros)
+        frontier.filled_subtrees = list(filled_subtrees)
+        frontier.roots = list(roots)
+        frontier.current_root_index = current_root_index
+        frontier.next_index = next_index
+        frontier.journal = None
+        return frontier
+
+    @property
+    def root(self):
+        return self.roots[self.current_root_index]
+
+    def insert(self, leaf):
+        index = self.next_index
+        if index >= 2 ** self.depth:
+            raise ValueError("Merkle tree is full. No more leaves can be added")
+        changed = []
+        current = leaf
+        i = index
+        for level in range(self.depth):
+            if i % 2 == 0:
+                changed.append((level, self.filled_subtrees[level]))
+                self.filled_subtrees[level] = current
+                current = self.hash_fn(current, self.zeros[level])
+            else:
+                current = self.hash_fn(self.filled_subtrees[level], current)
+            i //= 2
+        self.current_root_index = (self.current_root_index + 1) % len(self.roots)
+        if self.journal is not None:
+            self.journal.append((changed, self.roots[self.current_root_index]))
+        self.roots[self.current_root_index] = current
+        self.next_index = index + 1
+        return index, current
+
+    def undo(self, record):
+        # Restores the filledSubtrees entries and the ring slot an insert overwrote
+        changed, old_root = record
+        for level, value in changed:
+            self.filled_subtrees[level] = value
+        self.roots[self.current_root_index] = old_root
+        self.current_root_index = (self.current_root_index - 1) % len(self.roots)
+        self.next_index -= 1
+
+    def is_known_root(self, root):
+        return root != 0 and root in self.roots
+
+
+class _CountingHash:
+    def __init__(self, hash_fn=hash2):
+        self.hash_fn = hash_fn
+        self.calls = 0
+
+    def __call__(self, left, right):
+        self.calls += 1
+        return self.hash_fn(left, right)
+
+
+def main(argv=None):
+    # Compares per-leaf inserts against one dirty-path batch insert on the same leaves
+    parser = argparse.ArgumentParser(description="Hash count and time of per-leaf vs batched Merkle inserts")
+    parser.add_argument("--depth", type=int, default=31)
+    parser.add_argument("--batch", type=int, default=1024)
+    parser.add_argument("--prefill", type=int, default=5, help="leaves inserted before the batch")
+    args = parser.parse_args(argv)
+
+    leaves = list(range(1, args.batch + 1))
+    for label, batched, all_roots in (("per-leaf", False, False), ("batch", True, False), ("batch+all", True, True)):
+        counter = _CountingHash()
+        tree = MerkleTree(args.depth, hash_fn=counter)
+        for leaf in range(args.prefill):
+            tree.insert(leaf)
+        counter.calls = 0
+        t = time.perf_counter()
+        if batched:
+            tree.insert_batch(leaves, all_roots)
+        else:
+            for leaf in leaves:
+                tree.insert(leaf)
+        elapsed = time.perf_counter() - t
+        print(f"{label:12s} hashes={counter.calls:8d} time={elapsed:.3f}s root={hex(tree.root)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+import argparse
+import mmap
+import os
+import queue
+import random
+import struct
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from stealthhub.mt import MerkleTree
+from stealthhub.snapshot import WORD, from_word, to_word
+
+# Batched Merkle paths for withdrawals. A node store is anything with `depth`, `zeros` and
+# node(level, index): a MerkleTree, or a NodeFile written from one and mapped read-only.
+# PathService pins the top levels of the store as Python ints and serves a batch of leaf
+# indices level by level, reading each distinct sibling once however many paths share it.
+MAGIC = b"SHND"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQ")
+
+
+def level_sizes(depth, next_index):
+    return [-(-next_index >> level) for level in range(depth + 1)]
+
+
+class NodeFile:
+    # header (magic "SHND", version, depth, leaf count), zeros[0..depth], then every level from the
+    # leaves up, each node a 32-byte big-endian word as in stealthhub/snapshot.py
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.depth, self.next_index = HEADER.unpack_from(self.buf, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} node file")
+        self.zeros = [from_word(self.buf[HEADER.size + i * WORD:HEADER.size + (i + 1) * WORD])
+                      for i in range(self.depth + 1)]
+        self.sizes = level_sizes(self.depth, self.next_index)
+        self.offsets = []
+        offset = HEADER.size + (self.depth + 1) * WORD
+        for size in self.sizes:
+            self.offsets.append(offset)
+            offset += size * WORD
+
+    @staticmethod
+    def write(tree, path):
+        sizes = level_sizes(tree.depth, tree.next_index)
+        tmp = f"{path}.tmp-{os.getpid()}"
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, tree.depth, tree.next_index))
+            f.write(b"".join(map(to_word, tree.zeros)))
+            for level, size in enumerate(sizes):
+                f.write(b"".join(to_word(tree.node(level, i)) for i in range(size)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def node(self, level, index):
+        if index >= self.sizes[level]:
+            return self.zeros[level]
+        start = self.offsets[level] + index * WORD
+        return from_word(self.buf[start:start + WORD])
+
+    def close(self):
+        self.buf.close()
+
+
+class PathService:
+    # Levels from the root down are pinned while they fit in `cache_nodes`; call refresh() after
+    # the store grows. paths() is read-only and safe to call from many threads.
+    def __init__(self, store, cache_nodes=1 << 16):
+        self.store = store
+        self.depth = store.depth
+        self.cache_nodes = cache_nodes
+        self.refresh()
+
+    def refresh(self):
+        sizes = level_sizes(self.depth, self.store.next_index)
+        cache = {}
+        budget = self.cache_nodes
+        for level in range(self.depth - 1, -1, -1):
+            if sizes[level] > budget:
+                break
+            cache[level] = [self.store.node(level, i) for i in range(sizes[level])]
+            budget -= sizes[level]
+        self.cache = cache
+        self.pinned_from = min(cache, default=self.depth)
+
+    def node(self, level, index):
+        nodes = self.cache.get(level)
+        if nodes is None:
+            return self.store.node(level, index)
+        return nodes[index] if index < len(nodes) else self.store.zeros[level]
+
+    def paths(self, indices):
+        # (pathElements, pathIndices) per leaf index, as MerkleTree.path returns them
+        for index in indices:
+            if not 0 <= index < 2 ** self.depth:
+                raise IndexError(f"leaf {index} is outside a tree of depth {self.depth}")
+        elements = [[] for _ in indices]
+        current = list(indices)
+        for level in range(self.depth):
+            siblings = {i ^ 1 for i in current}
+            values = {i: self.node(level, i) for i in siblings}
+            for path, i in zip(elements, current):
+                path.append(values[i ^ 1])
+            current = [i >> 1 for i in current]
+        bits = [[(index >> level) & 1 for level in range(self.depth)] for index in indices]
+        return list(zip(elements, bits))
+
+    def path(self, index):
+        return self.paths([index])[0]
+
+    @property
+    def root(self):
+        # A property, as on MerkleTree, so either can stand for a layer in multi_withdraw_paths
+        return self.node(self.depth, 0)
+
+
+class PathServer:
+    # Coalesces path requests from many threads: submit() returns a Future, and one worker drains
+    # everything queued so far into a single PathService.paths() call
+    def __init__(self, service, max_batch=4096):
+        self.service = service
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, index):
+        future = Future()
+        self._queue.put((index, future))
+        return future
+
+    def path(self, index):
+        return self.submit(index).result()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+            try:
+                results = self.service.paths([index for index, _ in batch])
+            except Exception:
+                # Serve one by one so a bad index fails only its own request
+                for index, future in batch:
+                    try:
+                        future.set_result(self.service.path(index))
+                    except Exception as e:
+                        future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+
+def multi_withdraw_paths(layer1, layer2, notes, nullifier_hashes):
+    # Tree and nullifier signals of MultiWithdraw(number, level1, level2) for notes given as
+    # (batch, position), one nullifier hash each: `layer1` serves the tree of batch roots,
+    # layer2[batch] the batch's own tree. Either may be a MerkleTree or a PathService.
+    if len(nullifier_hashes) != len(notes):
+        raise ValueError(f"{len(notes)} notes but {len(nullifier_hashes)} nullifier hashes")
+    if not isinstance(layer1, PathService):
+        layer1 = PathService(layer1)
+    batches = [batch for batch, _ in notes]
+    paths1 = layer1.paths(batches)
+    paths2 = [layer2[batch].path(position) for batch, position in notes]
+    root1 = layer1.root
+    return {
+        "leaves": [str(layer2[batch].node(0, position)) for batch, position in notes],
+        "root1": [str(root1)] * len(notes),
+        "pathElements1": [[str(x) for x in p[0]] for p in paths1],
+        "pathIndices1": [list(p[1]) for p in paths1],
+        "root2": [str(layer2[batch].root) for batch in batches],
+        "pathElements2": [[str(x) for x in p[0]] for p in paths2],
+        "pathIndices2": [list(p[1]) for p in paths2],
+        "nullifierHash": [str(x) for x in nullifier_hashes],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time batched Merkle path serving from a node file with pinned top levels")
+    parser.add_argument("--depth", type=int, default=20)
+    parser.add_argument("--leaves", type=int, default=4096)
+    parser.add_argument("--batch", type=int, default=1000, help="leaf indices per request")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--clients", type=int, default=64, help="threads requesting single paths through PathServer")
+    parser.add_argument("--cache-nodes", type=int, default=1 << 16)
+    parser.add_argument("--store", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), '../data/paths.nodes'))
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    tree = MerkleTree(args.depth)
+    t = time.perf_counter()
+    tree.insert_batch([rng.randrange(1, 2 ** 250) for _ in range(args.leaves)])
+    NodeFile.write(tree, args.store)
+    print(f"tree of {args.leaves} leaves, depth {args.depth}: built and written in {time.perf_counter() - t:.2f}s")
+
+    store = NodeFile(args.store)
+    service = PathService(store, args.cache_nodes)
+    pinned = sum(len(v) for v in service.cache.values())
+    print(f"levels {service.pinned_from}..{args.depth - 1} pinned ({pinned} nodes), levels below from {args.store}")
+
+    requests = [[rng.randrange(args.leaves) for _ in range(args.batch)] for _ in range(args.requests)]
+    t = time.perf_counter()
+    for indices in requests:
+        service.paths(indices)
+    batched = (time.perf_counter() - t) / (args.batch * args.requests)
+    t = time.perf_counter()
+    for index in requests[0]:
+        tree.path(index)
+    single = (time.perf_counter() - t) / args.batch
+
+    for index in requests[0][:50]:
+        assert service.path(index) == tree.path(index)
+        assert tree.verify(tree.node(0, index), tree.root, *service.path(index))
+
+    server = PathServer(service)
+    flat = [i for indices in requests for i in indices]
+    t = time.perf_counter()
+    with ThreadPoolExecutor(args.clients) as executor:
+        list(executor.map(server.path, flat))
+    concurrent = (time.perf_counter() - t) / len(flat)
+    server.close()
+    store.close()
+
+    print(f"batched paths: {batched * 1e6:.1f} us/note; MerkleTree.path one at a time: {single * 1e6:.1f} us/note")
+    print(f"{args.clients} concurrent clients through PathServer: {concurrent * 1e6:.1f} us/note")
+
+
+if __name__ == "__main__":
+    main()
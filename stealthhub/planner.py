@@ -0,0 +1,181 @@
+import argparse
+import json
+import math
+import os
+
+from stealthhub.models import (
+    HASH_CONSTRAINTS,
+    Affine,
+    PowerLaw,
+    data_dir,
+    fit_metric,
+    load_metrics,
+    load_variant_gas,
+    multi_merkle_constraints,
+)
+
+# Searches SH-A configurations for the cheapest proof per deposit that fits a latency, RAM and
+# gas budget. A batch of b deposits is one MultiMerkleTreeChecker(number=b, level1, level2)
+# proof: every leaf sits in a 2^level2 batch subtree whose root is a leaf of the 2^level1 layer-1
+# tree, so b <= 2^level2 and the pool holds 2^(level1 + level2) notes.
+#
+#   constraints  C = base * b * (level1 + level2)                 (scripts_fig/fig_*_constraints.py)
+#   public       leaves and root1, one each per deposit           (what a verifier of the batch reads)
+#   prove time, RAM, setup                   fitted on data/metrics_data.json against C
+#   latency      (b - 1) / deposit rate + prove time + one block  (first deposit of a batch)
+#   gas          one SH-A deposit transaction per batch, shared by its b deposits
+TEMPLATES = {"Poseidon2": "MultiMerkleTreeCheckerPoseidon2"}
+MAX_PTAU = 28  # largest Hermez powers-of-tau ceremony file
+MAX_HEIGHT = 31  # Imt.sol requires levels < 32
+MODELS = {"affine": Affine, "power": PowerLaw}
+
+
+def ptau_power(constraints, public=0):
+    # snarkjs setup needs 2^power > constraints + public signals
+    return (constraints + public).bit_length()
+
+
+def public_signals(batch):
+    # circom_main makes leaves[number] and root1[number] public; the template has no outputs
+    return 2 * batch
+
+
+def measured_range(metrics, hash_name):
+    return max(HASH_CONSTRAINTS[hash_name] * (2 ** r["height"] - 1) for r in metrics[hash_name])
+
+
+class Planner:
+    def __init__(self, metrics, batch_gas=None, model=Affine):
+        self.metrics = metrics
+        self.batch_gas = batch_gas
+        self.fits = {
+            h: {m: fit_metric(metrics, h, m, model) for m in ("prove_runtime", "prove_ram_MB", "setup_runtime", "setup_ram_MB")}
+            for h in HASH_CONSTRAINTS if h in metrics
+        }
+
+    def evaluate(self, hash_name, batch, level1, level2, rate=None, block_time=12.0):
+        fit = self.fits[hash_name]
+        constraints = multi_merkle_constraints(batch, level1, level2, hash_name)
+        prove = fit["prove_runtime"](constraints)
+        wait = (batch - 1) / rate if rate else 0.0
+        power = ptau_power(constraints, public_signals(batch))
+        return {
+            "hash": hash_name,
+            "number": batch,
+            "level1": level1,
+            "level2": level2,
+            "capacity": 2 ** (level1 + level2),
+            "constraints": constraints,
+            "ptau": f"pot{power}_final" if power <= MAX_PTAU else None,
+            "prove_s": prove,
+            "prove_s_per_deposit": prove / batch,
+            "prove_ram_MB": fit["prove_ram_MB"](constraints),
+            "setup_s": fit["setup_runtime"](constraints),
+            "setup_ram_MB": fit["setup_ram_MB"](constraints),
+            "latency_s": wait + prove + block_time,
+            "gas_per_deposit": self.batch_gas / batch if self.batch_gas is not None else None,
+            "extrapolated": constraints > measured_range(self.metrics, hash_name),
+            "template": TEMPLATES.get(hash_name),
+        }
+
+    def candidates(self, capacity, hashes=None, max_batch=1024, max_height=MAX_HEIGHT, rate=None, block_time=12.0):
+        # Every height from the smallest that holds `capacity` notes up to `max_height`, and every
+        # batch size b; level2 is the smallest subtree holding b. plan() applies the budgets.
+        min_height = max(1, math.ceil(math.log2(capacity)))
+        for height in range(min_height, max(min_height, max_height) + 1):
+            batch = 1
+            while batch <= max_batch:
+                level2 = max(1, math.ceil(math.log2(batch)))
+                if level2 < height:
+                    for hash_name in hashes or self.fits:
+                        yield self.evaluate(hash_name, batch, height - level2, level2, rate, block_time)
+                batch *= 2
+
+    def plan(self, capacity, latency=None, ram=None, gas=None, include_setup=False, **kwargs):
+        feasible = []
+        rejected = []
+        for row in self.candidates(capacity, **kwargs):
+            reasons = []
+            if latency is not None and row["latency_s"] > latency:
+                reasons.append("latency")
+            peak = max(row["prove_ram_MB"], row["setup_ram_MB"]) if include_setup else row["prove_ram_MB"]
+            if ram is not None and peak > ram:
+                reasons.append("ram")
+            if gas is not None and row["gas_per_deposit"] is not None and row["gas_per_deposit"] > gas:
+                reasons.append("gas")
+            if row["ptau"] is None:
+                reasons.append("ptau")
+            (rejected if reasons else feasible).append(dict(row, rejected=reasons))
+        # Cheapest prover time per deposit first; measured over extrapolated, then less gas
+        feasible.sort(key=lambda r: (r["prove_s_per_deposit"], r["extrapolated"], r["gas_per_deposit"] or 0))
+        return feasible, rejected
+
+
+def circom_main(row):
+    if row["template"] is None:
+        return None
+    return (f"component main {{public [leaves, root1]}} = "
+            f"{row['template']}({row['number']}, {row['level1']}, {row['level2']});")
+
+
+def report(rows, limit=10):
+    lines = [f"{'hash':10s} {'b':>5s} {'l1':>3s} {'l2':>3s} {'constraints':>12s} {'ptau':>12s} {'prove_s':>8s} "
+             f"{'s/dep':>7s} {'RAM_MB':>8s} {'lat_s':>8s} {'gas/dep':>9s}"]
+    for r in rows[:limit]:
+        gas = f"{r['gas_per_deposit']:9.0f}" if r["gas_per_deposit"] is not None else f"{'-':>9s}"
+        lines.append(
+            f"{r['hash']:10s} {r['number']:5d} {r['level1']:3d} {r['level2']:3d} {r['constraints']:12d} "
+            f"{r['ptau'] or '-':>12s} {r['prove_s']:8.2f} {r['prove_s_per_deposit']:7.3f} "
+            f"{r['prove_ram_MB']:8.0f} {r['latency_s']:8.1f} {gas}{' *' if r['extrapolated'] else ''}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pick (batch size, tree height, hash) for SH-A under latency, RAM and gas budgets")
+    parser.add_argument("--capacity", type=int, default=2 ** 20, help="notes the pool must hold")
+    parser.add_argument("--latency", type=float, default=None, help="seconds from deposit to inclusion")
+    parser.add_argument("--ram", type=float, default=None, help="prover RAM budget in MB")
+    parser.add_argument("--gas", type=float, default=None, help="gas per deposit")
+    parser.add_argument("--rate", type=float, default=2000.0, help="deposits per hour")
+    parser.add_argument("--block-time", type=float, default=12.0)
+    parser.add_argument("--hashes", nargs="+", choices=sorted(HASH_CONSTRAINTS), default=None)
+    parser.add_argument("--max-batch", type=int, default=1024)
+    parser.add_argument("--max-height", type=int, default=MAX_HEIGHT,
+                        help="tallest tree (level1 + level2) to try; the search starts at the smallest that holds --capacity")
+    parser.add_argument("--include-setup", action="store_true", help="apply the RAM budget to setup too")
+    parser.add_argument("--model", choices=sorted(MODELS), default="affine")
+    parser.add_argument("--batch-gas", type=float, default=None, help="gas of one SH-A deposit; default measured mean")
+    parser.add_argument("--data-dir", default=data_dir)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--output", help="write the ranked plan as JSON")
+    args = parser.parse_args(argv)
+
+    batch_gas = args.batch_gas
+    if batch_gas is None:
+        try:
+            batch_gas = load_variant_gas("sha", args.data_dir)["deposit"].mean
+        except FileNotFoundError as e:
+            print(f"gas budget ignored: {e}")
+    planner = Planner(load_metrics(os.path.join(args.data_dir, 'metrics_data.json')), batch_gas, MODELS[args.model])
+    feasible, rejected = planner.plan(
+        args.capacity, args.latency, args.ram, args.gas, args.include_setup,
+        hashes=args.hashes, max_batch=args.max_batch, max_height=args.max_height, rate=args.rate / 3600.0, block_time=args.block_time,
+    )
+
+    print(report(feasible, args.limit))
+    print(f"{len(feasible)} feasible, {len(rejected)} rejected; * = beyond the measured constraint range")
+    if feasible:
+        # Cheapest configuration that has a circuit template to compile
+        best = next((r for r in feasible if r["template"]), feasible[0])
+        print(f"\nRecommended: {best['hash']} number={best['number']} level1={best['level1']} level2={best['level2']}, "
+              f"{best['constraints']} constraints, {best['ptau']}.ptau")
+        line = circom_main(best)
+        print(line if line else f"no MultiMerkle template for {best['hash']} in circuits/utils.circom")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"feasible": feasible, "rejected": rejected}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import functools
+import json
+import os
+import re
+
+# BN254 scalar field, as FIELD_SIZE in contracts/Imt.sol
+FIELD_SIZE = 21888242871839275222246405745257275088548364400416034343698204186575808495617
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+constants_path = os.path.join(base_dir, '../src/poseidon2_constants.json')
+yul_path = os.path.join(base_dir, '../contracts/Poseidon2Yul.sol')
+
+
+class Poseidon2Params:
+    def __init__(self, t, diag, rc, d=5, rounds_f=8, rounds_p=56):
+        self.t = t
+        self.d = d
+        self.rounds_f = rounds_f
+        self.rounds_p = rounds_p
+        self.diag = diag
+        self.rc = rc
+
+
+def load_params(path=constants_path):
+    # Same parameter set as getPoseidon2Params(3, 5, 8, 56, ...) in src/utils.js
+    with open(path, 'r') as f:
+        data = json.load(f)
+    diag = [int(x, 16) for x in data["MAT_DIAG3_M_1"]]
+    rc = [[int(x, 16) for x in row] for row in data["RC3"]]
+    return Poseidon2Params(3, diag, rc)
+
+
+def load_yul_params(path=yul_path):
+    # The t=4 parameter set hard-coded in contracts/Poseidon2Yul.sol, read back from its
+    # round-constant additions and internal_m_multiplication diagonal
+    with open(path, 'r') as f:
+        source = f.read()
+    adds = re.findall(r"state(\d) := addmod\(state\1, (0x[0-9a-fA-F]+), PRIME\)", source)
+    diag = [int(x, 16) for x in re.findall(r"mulmod\(state\d, (0x[0-9a-fA-F]+), PRIME\)", source)[:4]]
+    rounds_f, rounds_p = 8, 56
+    half = rounds_f // 2 * 4
+    full = [int(c, 16) for _, c in adds[:half]], [int(c, 16) for _, c in adds[half + rounds_p:]]
+    partial = [int(c, 16) for _, c in adds[half:half + rounds_p]]
+    rc = [full[0][i:i + 4] for i in range(0, half, 4)]
+    rc += [[c, 0, 0, 0] for c in partial]
+    rc += [full[1][i:i + 4] for i in range(0, half, 4)]
+    return Poseidon2Params(4, diag, rc, rounds_f=rounds_f, rounds_p=rounds_p)
+
+
+PARAMS3 = load_params()
+
+
+@functools.lru_cache(maxsize=None)
+def yul_params():
+    # Parsed on first use, so t=3 importers never read contracts/Poseidon2Yul.sol
+    return load_yul_params()
+
+
+def __getattr__(name):
+    # YUL_PARAMS and PARAMS4 stay importable as module constants. Poseidon2 is defined for
+    # t = 2, 3 and multiples of 4, so arity-4 trees use the t=4 set
+    if name in ("YUL_PARAMS", "PARAMS4"):
+        return yul_params()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _m4(a, b, c, d):
+    # Matmul_m4 in circuits/poseidon2.circom: [[5, 7, 1, 3], [4, 6, 1, 1], [1, 3, 5, 7], [1, 1, 4, 6]]
+    t0 = a + b
+    t1 = c + d
+    t2 = 2 * b + t1
+    t3 = 2 * d + t0
+    t4 = 4 * t1 + t3
+    t5 = 4 * t0 + t2
+    return [t3 + t5, t5, t2 + t4, t4]
+
+
+def _external(state, p):
+    t = len(state)
+    if t < 4:
+        s = sum(state)
+        return [(x + s) % p for x in state]
+    # External(t) for t a multiple of 4: per-block M4, then add the column sums over blocks
+    blocks = [_m4(*state[i:i + 4]) for i in range(0, t, 4)]
+    sums = [sum(b[j] for b in blocks) for j in range(4)]
+    return [(blocks[i // 4][i % 4] + sums[i % 4]) % p for i in range(t)] if t > 4 else [x % p for x in blocks[0]]
+
+
+def permute(inputs, params=PARAMS3):
+    # Poseidon2 permutation, matching Poseidon2Ex in circuits/poseidon2.circom
+    p = FIELD_SIZE
+    t = params.t
+    half_f = params.rounds_f // 2
+    state = _external([x % p for x in inputs], p)
+
+    for r in range(half_f):
+        rc = params.rc[r]
+        state = _external([pow((state[i] + rc[i]) % p, 5, p) for i in range(t)], p)
+
+    for r in range(half_f, half_f + params.rounds_p):
+        state[0] = pow((state[0] + params.rc[r][0]) % p, 5, p)
+        s = sum(state)
+        state = [(s + state[i] * params.diag[i]) % p for i in range(t)]
+
+    for r in range(half_f + params.rounds_p, params.rounds_f + params.rounds_p):
+        rc = params.rc[r]
+        state = _external([pow((state[i] + rc[i]) % p, 5, p) for i in range(t)], p)
+
+    return state
+
+
+def yul_hash(inputs):
+    # The sponge of contracts/Poseidon2Yul.sol for up to three words of calldata:
+    # state = (inputs, 0...) with the capacity word set to (number of words) << 64
+    words = list(inputs)
+    state = words + [0] * (3 - len(words)) + [len(words) << 64]
+    return permute(state, yul_params())[0]
+
+
+def hash2(left, right):
+    # HashLeftRightPoseidon2 in circuits/utils.circom: Poseidon2([left, right, 1])[0]
+    return permute([left, right, 1])[0]
+
+
+def hash4(a, b, c, d):
+    # HashQuadPoseidon2 in circuits/utils.circom. Four children leave no slot for a constant, so
+    # this is the Poseidon2 compression mode: the permutation plus a feed-forward of the first
+    # input, without which out[0] of a bare permutation could be inverted to any preimage
+    return (permute([a, b, c, d], yul_params())[0] + a) % FIELD_SIZE
+
+
+def permute_batch(states, params=PARAMS3):
+    # Permutes many states in lockstep, round by round, so round constants and the field
+    # modulus are looked up once per round instead of once per state
+    p = FIELD_SIZE
+    t = params.t
+    rng = range(t)
+    half_f = params.rounds_f // 2
+    diag = params.diag
+
+    def full(state, rc):
+        return _external([pow((state[i] + rc[i]) % p, 5, p) for i in rng], p)
+
+    batch = [_external([x % p for x in inputs], p) for inputs in states]
+
+    for r in range(half_f):
+        rc = params.rc[r]
+        batch = [full(state, rc) for state in batch]
+
+    for r in range(half_f, half_f + params.rounds_p):
+        c = params.rc[r][0]
+        for state in batch:
+            state[0] = pow((state[0] + c) % p, 5, p)
+            s = sum(state)
+            for i in rng:
+                state[i] = (s + state[i] * diag[i]) % p
+
+    for r in range(half_f + params.rounds_p, params.rounds_f + params.rounds_p):
+        rc = params.rc[r]
+        batch = [full(state, rc) for state in batch]
+
+    return batch
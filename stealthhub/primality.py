@@ -0,0 +1,76 @@
+import random
+
+# Same base range as generateRabinMillerInput (src/utils.js): large candidates draw bases
+# from [2, 2^16] so that the witness fits the rm_primality circuits.
+BASE_BOUND = 2 ** 16
+
+# Number of bases checked by the primality_64 / primality_128 circuits
+ROUNDS = 5
+
+SMALL_PRIMES = [p for p in range(3, 1000) if all(p % q for q in range(2, int(p ** 0.5) + 1))]
+
+_sysrand = random.SystemRandom()
+
+
+def decompose(n):
+    # Calculate d and r such that n - 1 = d * 2^r, where d is odd
+    d = n - 1
+    r = 0
+    while d % 2 == 0:
+        d //= 2
+        r += 1
+    return d, r
+
+
+def draw_bases(n, k, rng=_sysrand):
+    if n <= 4:
+        # When n <= 4, a must be 2
+        return [2] * k
+    if n > BASE_BOUND:
+        return [rng.randint(2, BASE_BOUND) for _ in range(k)]
+    return [rng.randint(2, n - 2) for _ in range(k)]
+
+
+def passes_base(n, a, d, r):
+    x = pow(a, d, n)
+    if x == 1 or x == n - 1:
+        return True
+    for _ in range(r - 1):
+        x = x * x % n
+        if x == n - 1:
+            return True
+    return False
+
+
+def generate_rabin_miller_input(n, k=ROUNDS, rng=_sysrand):
+    # Python counterpart of generateRabinMillerInput in src/utils.js
+    if n < 2:
+        raise ValueError("n must be greater than or equal to 2")
+    d, r = decompose(n)
+    return {"n": n, "a": draw_bases(n, k, rng), "d": d, "r": r}
+
+
+def is_probable_prime(n, k=ROUNDS, rng=_sysrand):
+    if n < 2:
+        return False
+    if n in (2, 3):
+        return True
+    if n % 2 == 0:
+        return False
+    for p in SMALL_PRIMES:
+        if n == p:
+            return True
+        if n % p == 0:
+            return False
+    inputs = generate_rabin_miller_input(n, k, rng)
+    return all(passes_base(n, a, inputs["d"], inputs["r"]) for a in inputs["a"])
+
+
+def random_prime(bits, k=ROUNDS, rng=_sysrand):
+    # Random prime of exactly `bits` bits, as `prime(bitLength)` from bigint-crypto-utils
+    if bits < 2:
+        raise ValueError("bits must be at least 2")
+    while True:
+        candidate = rng.getrandbits(bits) | (1 << (bits - 1)) | 1
+        if is_probable_prime(candidate, k, rng):
+            return candidate
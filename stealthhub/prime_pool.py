@@ -0,0 +1,139 @@
+import argparse
+import multiprocessing
+import os
+import time
+
+from stealthhub.primality import ROUNDS, random_prime
+
+# Layout: <root>/<bits>/<name>.prime, one decimal prime per file. Files are published with
+# an atomic rename and claimed with another rename, so several producers and consumers
+# (including UTXO.mint in src/utxo.js) can share the pool without locks.
+base_dir = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ROOT = os.environ.get("STEALTHHUB_PRIME_POOL", os.path.join(base_dir, "../data/prime_pool"))
+DEFAULT_BUCKETS = (1024, 2048, 4096)
+SUFFIX = ".prime"
+
+
+def _private_dir(path):
+    # Pooled primes become UTXO secrets and RSA factors: owner-only directories and files
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    os.chmod(path, 0o700)
+
+
+class PrimePool:
+    def __init__(self, root=DEFAULT_ROOT, buckets=DEFAULT_BUCKETS, capacity=64, rounds=ROUNDS):
+        self.root = root
+        self.buckets = tuple(buckets)
+        self.capacity = capacity
+        self.rounds = rounds
+        self._stop = multiprocessing.Event()
+        self._workers = []
+        _private_dir(self.root)
+        for bits in self.buckets:
+            _private_dir(self._bucket_dir(bits))
+
+    def _bucket_dir(self, bits):
+        return os.path.join(self.root, str(bits))
+
+    def _ready(self, bits):
+        try:
+            return sorted(e.name for e in os.scandir(self._bucket_dir(bits)) if e.name.endswith(SUFFIX))
+        except FileNotFoundError:
+            return []
+
+    def size(self, bits):
+        return len(self._ready(bits))
+
+    def push(self, bits, value):
+        bucket = self._bucket_dir(bits)
+        _private_dir(bucket)
+        name = f"{time.time_ns():020d}-{os.getpid()}"
+        tmp_path = os.path.join(bucket, name + ".tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(str(value))
+        os.replace(tmp_path, os.path.join(bucket, name + SUFFIX))
+
+    def pop(self, bits, fallback=True):
+        # Claim the oldest ready prime; losing a rename race just moves on to the next file
+        bucket = self._bucket_dir(bits)
+        for name in self._ready(bits):
+            claimed = os.path.join(bucket, f"{name}.claim-{os.getpid()}")
+            try:
+                os.rename(os.path.join(bucket, name), claimed)
+            except FileNotFoundError:
+                continue
+            with open(claimed) as f:
+                value = int(f.read())
+            os.remove(claimed)
+            return value
+        if not fallback:
+            return None
+        # Pool drained: generate in-process so callers never fail, only slow down
+        return random_prime(bits, self.rounds)
+
+    def fill_once(self, bits):
+        # Add one prime to `bits` if the bucket is below capacity; returns whether it did
+        if self.size(bits) >= self.capacity:
+            return False
+        self.push(bits, random_prime(bits, self.rounds))
+        return True
+
+    def start(self, workers=None, poll=0.5):
+        workers = workers or os.cpu_count() or 1
+        self._stop.clear()
+        for _ in range(workers):
+            args = (self.root, self.buckets, self.capacity, self.rounds, self._stop, poll)
+            p = multiprocessing.Process(target=_worker, args=args, daemon=True)
+            p.start()
+            self._workers.append(p)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        for p in self._workers:
+            p.join()
+        self._workers = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _worker(root, buckets, capacity, rounds, stop, poll):
+    pool = PrimePool(root, buckets, capacity, rounds)
+    while not stop.is_set():
+        # Refill the emptiest bucket first
+        bits = min(pool.buckets, key=pool.size)
+        if not pool.fill_once(bits):
+            stop.wait(poll)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-generate bit-length-bucketed primes for UTXO minting and RSA keys")
+    parser.add_argument("--root", default=DEFAULT_ROOT)
+    parser.add_argument("--bits", type=int, nargs="+", default=list(DEFAULT_BUCKETS))
+    parser.add_argument("--capacity", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=ROUNDS)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--pop", type=int, metavar="BITS", help="pop one prime of BITS bits and exit")
+    args = parser.parse_args(argv)
+
+    pool = PrimePool(args.root, args.bits, args.capacity, args.rounds)
+    if args.pop:
+        print(pool.pop(args.pop))
+        return
+
+    pool.start(args.workers)
+    try:
+        while True:
+            print(" ".join(f"{bits}:{pool.size(bits)}/{pool.capacity}" for bits in pool.buckets), flush=True)
+            time.sleep(5)
+    except KeyboardInterrupt:
+        pool.stop()
+
+
+if __name__ == "__main__":
+    main()
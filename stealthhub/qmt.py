@@ -0,0 +1,105 @@
+from stealthhub.mt import ROOT_HISTORY_SIZE, ZERO_VALUE
+from stealthhub.poseidon2 import hash4
+
+ARITY = 4
+
+
+def build_quad_zeros(zero, levels, hash_fn=hash4):
+    # zeros[i] is the root of an empty subtree of i levels
+    zeros = [zero]
+    for _ in range(levels):
+        zeros.append(hash_fn(*[zeros[-1]] * ARITY))
+    return zeros
+
+
+class QuadMerkleTree:
+    # Arity-4 counterpart of MerkleTree: children 4i..4i+3 hash into node i with hash4, so
+    # `levels` levels hold 4^levels leaves, as many as a binary tree of depth 2 * levels. Paths
+    # follow QuadMerkleTreeCheckerPoseidon2: the three other children in position order, and the
+    # position (0..3) of the path node.
+    def __init__(self, levels, zero=ZERO_VALUE, hash_fn=hash4, history_size=ROOT_HISTORY_SIZE):
+        self.depth = levels
+        self.hash_fn = hash_fn
+        self.zeros = build_quad_zeros(zero, levels, hash_fn)
+        self.levels = [[] for _ in range(levels + 1)]
+        self.history_size = history_size
+        self.roots = [self.zeros[levels]]
+
+    @property
+    def next_index(self):
+        return len(self.levels[0])
+
+    @property
+    def root(self):
+        return self.roots[-1]
+
+    def node(self, level, index):
+        nodes = self.levels[level]
+        return nodes[index] if index < len(nodes) else self.zeros[level]
+
+    def _children(self, level, parent):
+        return [self.node(level, ARITY * parent + j) for j in range(ARITY)]
+
+    def _set(self, level, index, value):
+        nodes = self.levels[level]
+        if index < len(nodes):
+            nodes[index] = value
+        else:
+            nodes.append(value)
+
+    def insert(self, leaf):
+        index = self.next_index
+        if index >= ARITY ** self.depth:
+            raise ValueError("Merkle tree is full. No more leaves can be added")
+        self.levels[0].append(leaf)
+        i = index
+        for level in range(self.depth):
+            i //= ARITY
+            self._set(level + 1, i, self.hash_fn(*self._children(level, i)))
+        self._push_root(self.levels[self.depth][0])
+        return index, self.root
+
+    def insert_batch(self, leaves):
+        # Re-hashes every dirty node once and records only the final root
+        start = self.next_index
+        end = start + len(leaves)
+        if end > ARITY ** self.depth:
+            raise ValueError("Merkle tree is full. No more leaves can be added")
+        if not leaves:
+            return start, []
+        self.levels[0].extend(leaves)
+        lo, hi = start, end - 1
+        for level in range(self.depth):
+            lo //= ARITY
+            hi //= ARITY
+            for parent in range(lo, hi + 1):
+                self._set(level + 1, parent, self.hash_fn(*self._children(level, parent)))
+        self._push_root(self.levels[self.depth][0])
+        return start, [self.root]
+
+    def _push_root(self, root):
+        self.roots.append(root)
+        if len(self.roots) > self.history_size:
+            del self.roots[0]
+
+    def is_known_root(self, root):
+        return root != 0 and root in self.roots
+
+    def path(self, index):
+        if not 0 <= index < ARITY ** self.depth:
+            raise IndexError(f"leaf {index} is outside a tree of {self.depth} levels")
+        elements = []
+        indices = []
+        for level in range(self.depth):
+            position = index % ARITY
+            siblings = self._children(level, index // ARITY)
+            elements.append(siblings[:position] + siblings[position + 1:])
+            indices.append(position)
+            index //= ARITY
+        return elements, indices
+
+    def verify(self, leaf, root, elements, indices):
+        current = leaf
+        for siblings, position in zip(elements, indices):
+            current = self.hash_fn(*siblings[:position], current, *siblings[position:])
+        return current == root
@@ -0,0 +1,293 @@
+import argparse
+import json
+import os
+import random
+import re
+import time
+
+import numpy as np
+
+from stealthhub.limbs import to_limbs
+from stealthhub.poseidon2 import FIELD_SIZE
+from stealthhub.primality import ROUNDS, decompose, draw_bases, is_probable_prime, random_prime
+
+# Bulk inputs for RabinMillerPrimalityTest(k, nBits, maxRounds) of circuits/rm_primality.circom,
+# checked against the circuit before they are emitted. The circuit reduces every product modulo
+# the BN254 scalar field before taking it mod n, decomposes d into nBits bits and squares
+# maxRounds - 1 times. A prime therefore fails when n^2 >= p (most 128-bit n), d >= 2^nBits or
+# r > maxRounds, and a composite passes when all its bases are strong liars. Candidates are
+# replayed with those semantics as (count, k) object arrays, one step for all bases at once;
+# composites that pass get new bases, primes that fail are rejected.
+base_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.join(base_dir, '..')
+circuit_dir = os.path.join(repo_dir, 'test', 'circuits')
+input_dir = os.path.join(repo_dir, 'circuit_input')
+
+# Largest n of which n^2 still fits below the field modulus
+SAFE_BITS = (FIELD_SIZE.bit_length() - 1) // 2
+RETRIES = 8
+
+
+def circuit_configs(directory=circuit_dir):
+    # {name: (k, nBits, maxRounds)} from `component main ... = RabinMillerPrimalityTest(...)`
+    configs = {}
+    pattern = re.compile(r"component\s+main\s*(?:\{[^}]*\})?\s*=\s*RabinMillerPrimalityTest\((\d+),\s*(\d+),\s*(\d+)\)")
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".circom"):
+            with open(os.path.join(directory, name)) as f:
+                match = pattern.search(f.read())
+            if match:
+                configs[name[:-7]] = tuple(int(x) for x in match.groups())
+    return configs
+
+
+def _objects(values):
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+def _reduce(x, moduli, field):
+    return x % field % moduli if field else x % moduli
+
+
+def field_modexp(bases, exps, moduli, bits, field=FIELD_SIZE):
+    # ModularExponentiation(nBits): exponent bits least significant first, every product taken
+    # in the field and then mod n
+    result = np.ones(np.broadcast(bases, exps, moduli).shape, dtype=object)
+    current = bases
+    for i in range(bits):
+        bit = ((exps >> i) & 1).astype(bool)
+        result = _reduce(result * np.where(bit, current, 1), moduli, field)
+        current = _reduce(current * current, moduli, field)
+    return result
+
+
+def circuit_replay(n, a, d, r, n_bits, max_rounds, field=FIELD_SIZE):
+    # Signals of RabinMillerPrimalityTest for many candidates: n, d, r of shape (count,), a of
+    # shape (count, k). Returns exponentResults, powerResults (count, k, maxRounds), the per-base
+    # results (0 = base passes), isPrime and whether d fits in nBits bits.
+    n = _objects(n)[:, None]
+    d = _objects(d)[:, None]
+    r = np.asarray(r)[:, None]
+    a = np.array([_objects(row) for row in a], dtype=object).reshape(n.shape[0], -1)
+    minus_one = n - 1
+    p = field or 0
+    # Below the field every product of two residues is exact, so mod n alone gives the same values
+    wraps = field if field and any(x * x >= field for x in minus_one[:, 0]) else None
+
+    x0 = field_modexp(a, d, n, n_bits, wraps)
+    powers = [x0]
+    for _ in range(1, max_rounds):
+        powers.append(_reduce(powers[-1] * powers[-1], n, wraps))
+    base_check = (x0 - 1) * (x0 - minus_one)
+    round_check = np.ones_like(x0)
+    for j in range(1, max_rounds):
+        condition = np.where(j >= r, 1, 0).astype(object)
+        round_check = round_check * (condition + (powers[j] - minus_one) ** 2)
+        if field:
+            round_check = round_check % p
+    results = base_check * round_check
+    if field:
+        results = results % p
+    total = results.sum(axis=1)
+    return {
+        "exponentResults": x0,
+        "powerResults": np.stack(powers, axis=2),
+        "results": results,
+        "isPrime": (total % p == 0) if field else (total == 0),
+        "fits": np.array([x < 1 << n_bits for x in d[:, 0]], dtype=bool),
+    }
+
+
+def circuit_is_prime(n, a, d, r, n_bits, max_rounds, field=FIELD_SIZE):
+    # One candidate at a time with Python ints; the reference for circuit_replay
+    def reduce(x):
+        return x % field % n if field else x % n
+
+    def modexp(base, exp):
+        result, current = 1, base
+        for i in range(n_bits):
+            result = reduce(result * (current if (exp >> i) & 1 else 1))
+            current = reduce(current * current)
+        return result
+
+    if d >= 1 << n_bits:
+        return False
+    total = 0
+    for base in a:
+        x = modexp(base, d)
+        acc = 1
+        power = x
+        for j in range(1, max_rounds):
+            power = reduce(power * power)
+            acc = acc * ((j >= r) + (power - (n - 1)) ** 2)
+            acc = acc % field if field else acc
+        result = (x - 1) * (x - (n - 1)) * acc
+        total += result % field if field else result
+    return (total % field if field else total) == 0
+
+
+def failure_reason(n, d, r, n_bits, max_rounds, field=FIELD_SIZE):
+    if d >= 1 << n_bits:
+        return f"d needs more than {n_bits} bits"
+    if r > max_rounds:
+        return f"r = {r} exceeds maxRounds = {max_rounds}"
+    if field and (n - 1) ** 2 >= field:
+        return "n^2 exceeds the field, products wrap before mod n"
+    return "bases rejected"
+
+
+def generate(candidates, k, n_bits, max_rounds, expected=None, field=FIELD_SIZE, rng=None, retries=RETRIES):
+    # Inputs {"n", "a", "d", "r"} whose replayed isPrime equals `expected` (default: the candidate is
+    # a probable prime). Returns (inputs with their isPrime, rejected [(n, reason)]), in candidate order.
+    rng = rng or random.Random()
+    candidates = list(candidates)
+    if expected is None:
+        expected = [is_probable_prime(n, 2 * k, rng) for n in candidates]
+    split = [decompose(n) for n in candidates]
+    ds = [d for d, _ in split]
+    rs = [r for _, r in split]
+    bases = [draw_bases(n, k, rng) for n in candidates]
+    accepted = [None] * len(candidates)
+    unfit = set()
+    pending = list(range(len(candidates)))
+    for attempt in range(retries + 1):
+        if not pending:
+            break
+        replay = circuit_replay([candidates[i] for i in pending], [bases[i] for i in pending],
+                                [ds[i] for i in pending], [rs[i] for i in pending], n_bits, max_rounds, field)
+        retry = []
+        for row, i in enumerate(pending):
+            if not replay["fits"][row]:
+                # The circuit cannot take this n at all, whatever the answer was meant to be
+                unfit.add(i)
+                continue
+            verdict = bool(replay["isPrime"][row])
+            if verdict == bool(expected[i]):
+                accepted[i] = verdict
+            elif not expected[i] and attempt < retries:
+                # Every base was a strong liar (or hit a field coincidence): draw new ones
+                bases[i] = draw_bases(candidates[i], k, rng)
+                retry.append(i)
+        pending = retry
+
+    inputs = []
+    rejected = []
+    for i, n in enumerate(candidates):
+        if accepted[i] is None:
+            reason = failure_reason(n, ds[i], rs[i], n_bits, max_rounds, field) if expected[i] or i in unfit else \
+                f"composite passed with {retries + 1} base draws"
+            rejected.append((n, reason))
+            continue
+        inputs.append(({"n": str(n), "a": [str(x) for x in bases[i]], "d": str(ds[i]), "r": str(rs[i])}, int(accepted[i])))
+    return inputs, rejected
+
+
+def arb_input(circuit_input, n_bits, chunk_size, chunk_num):
+    # The same input in the layout of circuits/rm_arb_primality.circom: n and a as limbs, d as bits
+    n = int(circuit_input["n"])
+    d = int(circuit_input["d"])
+    return {
+        "n": to_limbs([n], chunk_size, chunk_num)[0].astype(str).tolist(),
+        "a": to_limbs([int(x) for x in circuit_input["a"]], chunk_size, chunk_num).astype(str).tolist(),
+        "d_bits": [str((d >> i) & 1) for i in range(n_bits)],
+        "r": circuit_input["r"],
+    }
+
+
+def random_candidates(count, composites, bits, rng):
+    # `count` primes of `bits` bits, then `composites` odd composites of the same size
+    primes = [random_prime(bits, rng=rng) for _ in range(count)]
+    odd = []
+    while len(odd) < composites:
+        candidate = rng.getrandbits(bits) | (1 << (bits - 1)) | 1
+        if not is_probable_prime(candidate, 2 * ROUNDS, rng):
+            odd.append(candidate)
+    return primes + odd, [True] * count + [False] * composites
+
+
+def write_input(circuit, path, seed=None):
+    # A prime input for test/circuits/<circuit>.circom, as the first case of test/primality.test.js
+    k, n_bits, max_rounds = circuit_configs()[circuit]
+    rng = random.Random(seed)
+    while True:
+        inputs, _ = generate([random_prime(min(n_bits, SAFE_BITS), rng=rng)], k, n_bits, max_rounds, [True], rng=rng)
+        if inputs:
+            break
+    with open(path, "w") as f:
+        json.dump(inputs[0][0], f, indent=2)
+    return path
+
+
+def main(argv=None):
+    configs = circuit_configs()
+    parser = argparse.ArgumentParser(description="Bulk Rabin-Miller inputs for the primality circuits, validated against the circuit")
+    parser.add_argument("circuit", choices=sorted(configs))
+    parser.add_argument("--count", type=int, default=1000, help="prime candidates")
+    parser.add_argument("--composites", type=int, default=0, help="odd composite candidates, expected isPrime = 0")
+    parser.add_argument("--bits", type=int, default=None,
+                        help=f"candidate size (default: nBits, at most {SAFE_BITS} so n^2 stays below the field)")
+    parser.add_argument("--candidates", help="file of integers, one per line, instead of random candidates")
+    parser.add_argument("--chunks", type=int, nargs=2, metavar=("CHUNK_SIZE", "CHUNK_NUMBER"),
+                        help="emit the rm_arb_primality layout (limbs, d_bits) checked with exact arithmetic")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write one {\"input\", \"isPrime\"} JSON object per line")
+    parser.add_argument("--write", action="store_true", help="write the first prime input to circuit_input/<circuit>.json")
+    args = parser.parse_args(argv)
+    k, n_bits, max_rounds = configs[args.circuit]
+    field = None if args.chunks else FIELD_SIZE
+    rng = random.Random(args.seed)
+
+    t = time.perf_counter()
+    if args.candidates:
+        with open(args.candidates) as f:
+            candidates = [int(line, 0) for line in f if line.strip()]
+        expected = None
+    else:
+        bits = args.bits or (n_bits if field is None else min(n_bits, SAFE_BITS))
+        candidates, expected = random_candidates(args.count, args.composites, bits, rng)
+    t_candidates = time.perf_counter() - t
+
+    t = time.perf_counter()
+    inputs, rejected = generate(candidates, k, n_bits, max_rounds, expected, field, rng)
+    t_batch = time.perf_counter() - t
+
+    # Cross-check a sample one candidate at a time
+    sample = inputs[:50]
+    t = time.perf_counter()
+    for circuit_input, is_prime in sample:
+        assert circuit_is_prime(int(circuit_input["n"]), [int(x) for x in circuit_input["a"]], int(circuit_input["d"]),
+                                int(circuit_input["r"]), n_bits, max_rounds, field) == bool(is_prime)
+    t_scalar = (time.perf_counter() - t) / max(1, len(sample))
+
+    print(f"{args.circuit}: k={k} nBits={n_bits} maxRounds={max_rounds}, {len(candidates)} candidates in {t_candidates:.2f}s")
+    print(f"batched generation + validation: {t_batch:.2f}s ({t_batch / max(1, len(candidates)) * 1e3:.3f} ms/candidate)"
+          + (f"; one at a time: {t_scalar * 1e3:.3f} ms/candidate" if sample else ""))
+    print(f"{len(inputs)} inputs ({sum(p for _, p in inputs)} prime, {sum(1 - p for _, p in inputs)} composite), "
+          f"{len(rejected)} rejected")
+    reasons = {}
+    for _, reason in rejected:
+        reasons[reason] = reasons.get(reason, 0) + 1
+    for reason, count in sorted(reasons.items(), key=lambda item: -item[1]):
+        print(f"  {count:6d}  {reason}")
+
+    if args.chunks:
+        inputs = [(arb_input(x, n_bits, *args.chunks), p) for x, p in inputs]
+    if args.output:
+        with open(args.output, "w") as f:
+            for circuit_input, is_prime in inputs:
+                f.write(json.dumps({"input": circuit_input, "isPrime": is_prime}) + "\n")
+        print(f"Inputs written to {args.output}")
+    if args.write:
+        first = next((x for x, p in inputs if p), None)
+        if first is None:
+            parser.error("no prime input to write")
+        path = os.path.join(input_dir, f"{args.circuit}.json")
+        with open(path, "w") as f:
+            json.dump(first, f, indent=2)
+        print(f"Input written to {path}")
+
+
+if __name__ == "__main__":
+    main()
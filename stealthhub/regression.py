@@ -0,0 +1,141 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+
+from stealthhub.inputs import ensure_input
+from stealthhub.tracing import Tracer, groth16_pipeline, repo_dir
+
+baseline_path = os.path.join(repo_dir, 'data', 'bench_baseline.json')
+
+DEFAULT_CIRCUITS = [
+    "test/circuits/multi_merkle_4_4_4",
+    "test/circuits/multi_merkle_5_5_5",
+    "test/circuits/multi_merkle_6_6_6",
+    "test/circuits/poseidon2_3_test",
+]
+
+# Same ptau files as run_groth16.sh; circuits not listed there fit in pot13
+PTAU = {"multi_merkle": "pot21_final", "multi_quad_merkle": "pot21_final"}
+DEFAULT_PTAU = "pot13_final"
+
+# Pipeline stage -> metric name, following the keys of data/metrics_data.json
+STAGE_METRICS = {
+    "1.1 compile": "compile",
+    "1.2 witness": "witness",
+    "2.1 setup": "setup",
+    "3.1 prove": "prove",
+    "3.2 verify": "verify",
+}
+
+# A metric regresses when its median grows by more than max(rel_tol * baseline median,
+# noise_k * the larger scaled MAD of either run, its absolute floor)
+REL_TOL = 0.10
+NOISE_K = 3.0
+ABS_FLOOR = {"runtime": 0.05, "ram_MB": 16.0}
+
+
+def measure(circuit_name, runs, ptau=None):
+    input_name = os.path.basename(circuit_name)
+    ensure_input(input_name)
+    ptau = ptau or next((v for k, v in PTAU.items() if input_name.startswith(k)), DEFAULT_PTAU)
+    samples = {}
+    for _ in range(runs):
+        tracer = Tracer()
+        groth16_pipeline(tracer, circuit_name, ptau, input_name)
+        for stage in tracer.stages:
+            metric = STAGE_METRICS.get(stage["name"])
+            if metric is None:
+                continue
+            samples.setdefault(f"{metric}_runtime", []).append(stage["wall"])
+            samples.setdefault(f"{metric}_ram_MB", []).append(stage["peak_rss"] / 2 ** 20)
+    return samples
+
+
+def _mad(values):
+    med = statistics.median(values)
+    return statistics.median(abs(v - med) for v in values)
+
+
+def summarise(samples):
+    return {metric: {"median": statistics.median(v), "mad": _mad(v), "samples": v} for metric, v in samples.items()}
+
+
+def compare(baseline, current, rel_tol=REL_TOL, noise_k=NOISE_K):
+    # Returns rows (circuit, metric, baseline median, current median, delta %, allowed %, ok); a metric
+    # without a baseline entry fails with None for the baseline columns
+    rows = []
+    for circuit, metrics in current.items():
+        base_metrics = baseline.get(circuit, {})
+        for metric, cur in metrics.items():
+            base = base_metrics.get(metric)
+            if base is None:
+                rows.append((circuit, metric, None, cur["median"], None, None, False))
+                continue
+            floor = ABS_FLOOR["ram_MB" if metric.endswith("ram_MB") else "runtime"]
+            # 1.4826 * MAD estimates the standard deviation for normal noise
+            noise = noise_k * 1.4826 * max(base["mad"], cur["mad"])
+            allowed = max(rel_tol * base["median"], noise, floor)
+            delta = cur["median"] - base["median"]
+            pct = delta / base["median"] * 100 if base["median"] else float("inf")
+            allowed_pct = allowed / base["median"] * 100 if base["median"] else float("inf")
+            rows.append((circuit, metric, base["median"], cur["median"], pct, allowed_pct, delta <= allowed))
+    return rows
+
+
+def report(rows):
+    lines = [f"{'circuit':24s} {'metric':18s} {'baseline':>10s} {'current':>10s} {'delta%':>8s} {'allow%':>8s}  result"]
+    for circuit, metric, base, cur, pct, allowed, ok in rows:
+        if base is None:
+            lines.append(f"{circuit:24s} {metric:18s} {'-':>10s} {cur:10.2f} {'-':>8s} {'-':>8s}  FAIL (no baseline)")
+            continue
+        lines.append(f"{circuit:24s} {metric:18s} {base:10.2f} {cur:10.2f} {pct:8.1f} {allowed:8.1f}  {'pass' if ok else 'FAIL'}")
+    failed = sum(1 for row in rows if not row[-1])
+    lines.append(f"{len(rows) - failed} passed, {failed} failed")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rerun benchmark circuits and gate on regressions against a stored baseline")
+    parser.add_argument("circuits", nargs="*", default=DEFAULT_CIRCUITS)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--ptau", default=None, help="override the ptau name for every circuit")
+    parser.add_argument("--baseline", default=baseline_path)
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--rel-tol", type=float, default=REL_TOL)
+    parser.add_argument("--noise-k", type=float, default=NOISE_K)
+    parser.add_argument("--output", help="write the comparison as JSON")
+    args = parser.parse_args(argv)
+
+    current = {os.path.basename(c): summarise(measure(c, args.runs, args.ptau)) for c in args.circuits}
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                "machine": platform.platform(),
+                "runs": args.runs,
+                "circuits": current,
+            }, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    with open(args.baseline, "r") as f:
+        baseline = json.load(f)
+    rows = compare(baseline["circuits"], current, args.rel_tol, args.noise_k)
+    print(report(rows))
+    if args.output:
+        keys = ("circuit", "metric", "baseline", "current", "delta_pct", "allowed_pct", "ok")
+        with open(args.output, "w") as f:
+            json.dump([dict(zip(keys, row)) for row in rows], f, indent=2)
+    if not rows:
+        print("no metrics compared; the gate fails", file=sys.stderr)
+        return 1
+    return 0 if all(row[-1] for row in rows) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,395 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from stealthhub.gas_bench import RpcClient
+from stealthhub.mt import MerkleTree
+from stealthhub.paths import NodeFile, PathService
+from stealthhub.witness import WitnessPool
+
+# Withdrawals as a pipeline of bounded queues: isSpent -> path -> witness -> prove -> calldata ->
+# withdraw. Each stage has its own worker count and a queue of `queue_size` jobs in front of it;
+# a full queue blocks the stage before it, so a slow prover throttles intake instead of
+# buffering without bound, while RPC-bound stages keep many requests in flight.
+base_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.join(base_dir, '..')
+sender_js = os.path.join(repo_dir, 'scripts', 'relayer_sender.js')
+
+# keccak256("isSpent(bytes32)")[:4], the same in Shi.sol, Shm.sol and Sha.sol
+IS_SPENT = "0xe5285dcc"
+
+
+class Histogram:
+    # Latencies in log-spaced buckets, `per_doubling` per factor of two upwards from `low` seconds
+    def __init__(self, low=1e-4, per_doubling=4, buckets=120):
+        self.low = low
+        self.per_doubling = per_doubling
+        self.counts = [0] * buckets
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def bound(self, i):
+        return self.low * 2 ** ((i + 1) / self.per_doubling)
+
+    def record(self, seconds):
+        i = 0 if seconds <= self.low else int(math.log2(seconds / self.low) * self.per_doubling)
+        self.counts[min(i, len(self.counts) - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q):
+        # Upper bound of the bucket holding the q-th percentile sample
+        if not self.count:
+            return None
+        rank = q / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return min(self.bound(i), self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max,
+            "buckets": {f"{self.bound(i):.6g}": n for i, n in enumerate(self.counts) if n},
+        }
+
+
+class Stage:
+    # `fn` is a coroutine function taking the job dict and filling in its results. `cleanup`, if
+    # given, releases what `fn` left on the job; the pipeline calls it for every job that fails or
+    # is cancelled, so it must tolerate jobs that never reached the stage.
+    def __init__(self, name, fn, workers=1, queue_size=None, cleanup=None):
+        self.name = name
+        self.fn = fn
+        self.cleanup = cleanup
+        self.workers = workers
+        self.queue_size = queue_size or 2 * workers
+        self.service = Histogram()
+        self.wait = Histogram()
+
+
+class StageError(RuntimeError):
+    pass
+
+
+class Pipeline:
+    def __init__(self, stages):
+        self.stages = stages
+        self.latency = Histogram()
+
+    async def run(self, jobs):
+        # Returns every job once it leaves the pipeline, finished or with job["error"] set
+        queues = [asyncio.Queue(stage.queue_size) for stage in self.stages]
+        done = []
+        submitted = []
+
+        async def worker(i, stage):
+            while True:
+                job, queued = await queues[i].get()
+                start = time.perf_counter()
+                stage.wait.record(start - queued)
+                try:
+                    await stage.fn(job)
+                except Exception as e:
+                    job["error"] = f"{stage.name}: {e}"
+                end = time.perf_counter()
+                stage.service.record(end - start)
+                if "error" in job:
+                    self._cleanup(job)
+                if "error" in job or i + 1 == len(self.stages):
+                    job["latency"] = end - job["submitted"]
+                    self.latency.record(job["latency"])
+                    done.append(job)
+                else:
+                    await queues[i + 1].put((job, end))
+                queues[i].task_done()
+
+        workers = [asyncio.create_task(worker(i, stage))
+                   for i, stage in enumerate(self.stages) for _ in range(stage.workers)]
+        try:
+            for job in jobs:
+                job["submitted"] = time.perf_counter()
+                submitted.append(job)
+                await queues[0].put((job, job["submitted"]))
+            # A stage only marks a job done after handing it on, so joining in order drains all
+            for q in queues:
+                await q.join()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            # Jobs still queued or in flight when the run was cut short
+            finished = {id(job) for job in done}
+            for job in submitted:
+                if id(job) not in finished:
+                    self._cleanup(job)
+        return done
+
+    def _cleanup(self, job):
+        for stage in self.stages:
+            if stage.cleanup is not None:
+                stage.cleanup(job)
+
+    def report(self):
+        lines = [f"{'stage':10s} {'workers':>7s} {'n':>6s} {'mean_ms':>9s} {'p50_ms':>9s} {'p99_ms':>9s} {'wait_p99_ms':>12s}"]
+        for stage in self.stages:
+            s = stage.service.summary()
+            w = stage.wait.summary()
+            if not s["count"]:
+                continue
+            lines.append(f"{stage.name:10s} {stage.workers:7d} {s['count']:6d} {s['mean'] * 1e3:9.1f} "
+                         f"{s['p50'] * 1e3:9.1f} {s['p99'] * 1e3:9.1f} {w['p99'] * 1e3:12.1f}")
+        total = self.latency.summary()
+        if total["count"]:
+            lines.append(f"{'end-to-end':10s} {'':7s} {total['count']:6d} {total['mean'] * 1e3:9.1f} "
+                         f"{total['p50'] * 1e3:9.1f} {total['p99'] * 1e3:9.1f}")
+        return "\n".join(lines)
+
+    def summary(self):
+        return {
+            "stages": {s.name: {"workers": s.workers, "queue_size": s.queue_size,
+                                "service": s.service.summary(), "wait": s.wait.summary()} for s in self.stages},
+            "end_to_end": self.latency.summary(),
+        }
+
+
+class RpcSpentCheck:
+    # isSpent(nullifierHash) as an eth_call; http.client is blocking, so each call runs on a thread
+    # with its own connection
+    def __init__(self, url, contract):
+        self.url = url
+        self.contract = contract
+
+    def _call(self, nullifier_hash):
+        data = IS_SPENT + f"{nullifier_hash:064x}"
+        result = RpcClient(self.url).call("eth_call", [{"to": self.contract, "data": data}, "latest"])
+        return int(result, 16) != 0
+
+    async def __call__(self, nullifier_hash):
+        return await asyncio.to_thread(self._call, nullifier_hash)
+
+
+class WithdrawSender:
+    # scripts/relayer_sender.js; replies come back out of order and are matched by id
+    def __init__(self, url, contract):
+        self.url = url
+        self.contract = contract
+        self.proc = None
+        self.pending = {}
+        self.error = None
+        self._next = 0
+
+    async def start(self):
+        self.proc = await asyncio.create_subprocess_exec("node", sender_js, self.url, self.contract, cwd=repo_dir,
+                                                         stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE)
+        self._reader = asyncio.create_task(self._read())
+        return self
+
+    async def _read(self):
+        # A reply that cannot be matched to a request fails every pending one, as does EOF
+        try:
+            async for line in self.proc.stdout:
+                reply = json.loads(line)
+                future = self.pending.pop(reply["id"])
+                if "error" in reply:
+                    future.set_exception(StageError(reply["error"]))
+                else:
+                    future.set_result(reply)
+            self.error = StageError("relayer sender exited")
+        except Exception as e:
+            self.error = StageError(f"bad reply from relayer sender: {e!r}")
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(self.error)
+        self.pending.clear()
+
+    async def send(self, request):
+        if self.error is not None:
+            raise self.error
+        self._next += 1
+        future = asyncio.get_running_loop().create_future()
+        self.pending[self._next] = future
+        self.proc.stdin.write((json.dumps(dict(request, id=self._next)) + "\n").encode())
+        await self.proc.stdin.drain()
+        return await future
+
+    async def close(self):
+        self.proc.stdin.close()
+        await self.proc.wait()
+        await self._reader
+
+
+async def _run(*cmd):
+    proc = await asyncio.create_subprocess_exec(*cmd, cwd=repo_dir, stdout=asyncio.subprocess.PIPE,
+                                                stderr=asyncio.subprocess.PIPE)
+    out, err = await proc.communicate()
+    if proc.returncode != 0:
+        raise StageError((err or out).decode(errors="replace").strip().splitlines()[-1])
+    return out.decode()
+
+
+def remove_job_dir(job):
+    # The witness, proof and public signals of a job
+    directory = job.pop("dir", None)
+    if directory is not None:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def withdrawal_stages(spent, paths, pool, zkey, sender, workers=None):
+    # Job dicts carry "leaf_index", "nullifier_hash", the circuit "inputs" without the path, and
+    # the withdraw() arguments "recipient", "relayer", "fee", "refund", "asset"
+    workers = dict({"spent": 16, "path": 1, "witness": pool.size, "prove": os.cpu_count() or 1,
+                    "calldata": 4, "withdraw": 16}, **(workers or {}))
+
+    async def check(job):
+        if await spent(job["nullifier_hash"]):
+            raise StageError("note already spent")
+
+    async def path(job):
+        (elements, indices), = paths.paths([job["leaf_index"]])
+        job["inputs"] = dict(job["inputs"], root=str(paths.root), pathElements=[str(x) for x in elements],
+                             pathIndices=indices)
+
+    async def witness(job):
+        job["wtns"] = await asyncio.to_thread(pool.calculate, job["inputs"])
+
+    async def prove(job):
+        job["dir"] = tempfile.mkdtemp(prefix="relay-")
+        wtns = os.path.join(job["dir"], "witness.wtns")
+        with open(wtns, "wb") as f:
+            f.write(job.pop("wtns"))
+        await _run("snarkjs", "groth16", "prove", zkey, wtns, os.path.join(job["dir"], "proof.json"),
+                   os.path.join(job["dir"], "public.json"))
+
+    async def calldata(job):
+        try:
+            out = await _run("snarkjs", "zkey", "export", "soliditycalldata", os.path.join(job["dir"], "public.json"),
+                             os.path.join(job["dir"], "proof.json"))
+            # `[pA],[pB],[pC],[pubSignals]` as printed for Groth16Verifier.verifyProof
+            job["proof"] = json.loads(f"[{out}]")
+        finally:
+            remove_job_dir(job)
+
+    async def withdraw(job):
+        job["receipt"] = await sender.send({
+            "proof": job["proof"],
+            "root": f"0x{int(job['inputs']['root']):064x}",
+            "nullifierHash": f"0x{job['nullifier_hash']:064x}",
+            **{k: job[k] for k in ("recipient", "relayer", "fee", "refund", "asset")},
+        })
+
+    fns = {"spent": check, "path": path, "witness": witness, "prove": prove, "calldata": calldata, "withdraw": withdraw}
+    cleanups = {"prove": remove_job_dir}
+    return [Stage(name, fn, workers[name], cleanup=cleanups.get(name)) for name, fn in fns.items()]
+
+
+def _burn(seconds):
+    # Stands in for snarkjs: keeps one core busy for `seconds`
+    end = time.perf_counter() + seconds
+    x = 0
+    while time.perf_counter() < end:
+        x += 1
+    return x
+
+
+def simulated_stages(paths, latencies, workers, executor):
+    # RPC and witness stages sleep, proving burns a core in a worker process, paths are real
+    def jitter(seconds):
+        return seconds * random.uniform(0.8, 1.2)
+
+    def sleeper(name):
+        async def fn(job):
+            await asyncio.sleep(jitter(latencies[name]))
+        return fn
+
+    async def path(job):
+        job["path"] = paths.paths([job["leaf_index"]])[0]
+
+    async def prove(job):
+        await asyncio.get_running_loop().run_in_executor(executor, _burn, jitter(latencies["prove"]))
+
+    fns = {"spent": sleeper("spent"), "path": path, "witness": sleeper("witness"), "prove": prove,
+           "calldata": sleeper("calldata"), "withdraw": sleeper("withdraw")}
+    return [Stage(name, fn, workers[name]) for name, fn in fns.items()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run withdrawals through the staged relayer pipeline")
+    parser.add_argument("--jobs", help="JSON lines of withdrawal jobs; default a simulated run")
+    parser.add_argument("--circuit", help="withdraw circuit under .target/ for the witness pool")
+    parser.add_argument("--zkey", help="Groth16 proving key of the circuit")
+    parser.add_argument("--nodes", help="NodeFile of the pool's tree (stealthhub/paths.py)")
+    parser.add_argument("--rpc", default="http://127.0.0.1:8545")
+    parser.add_argument("--contract", help="pool address")
+    parser.add_argument("--count", type=int, default=200, help="simulated withdrawals")
+    parser.add_argument("--provers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--prove-s", type=float, default=0.5, help="simulated proof time")
+    parser.add_argument("--rpc-s", type=float, default=0.05, help="simulated RPC round trip")
+    parser.add_argument("--output", help="write per-stage histograms as JSON")
+    args = parser.parse_args(argv)
+
+    if args.jobs:
+        with open(args.jobs) as f:
+            jobs = [json.loads(line) for line in f if line.strip()]
+        for job in jobs:
+            if isinstance(job["nullifier_hash"], str):
+                job["nullifier_hash"] = int(job["nullifier_hash"], 0)
+
+        async def real():
+            sender = await WithdrawSender(args.rpc, args.contract).start()
+            with WitnessPool(args.circuit) as pool:
+                stages = withdrawal_stages(RpcSpentCheck(args.rpc, args.contract), PathService(NodeFile(args.nodes)),
+                                           pool, args.zkey, sender, {"prove": args.provers})
+                pipeline = Pipeline(stages)
+                done = await pipeline.run(jobs)
+            await sender.close()
+            return pipeline, done
+        run = real
+    else:
+        tree = MerkleTree(20, hash_fn=lambda a, b: (a * 3 + b) % (1 << 61))
+        tree.insert_batch(list(range(1, 4097)))
+        paths = PathService(tree)
+        latencies = {"spent": args.rpc_s, "witness": 0.05, "prove": args.prove_s, "calldata": 0.02,
+                     "withdraw": 4 * args.rpc_s}
+        workers = {"spent": 16, "path": 1, "witness": args.provers, "prove": args.provers, "calldata": 4, "withdraw": 16}
+        jobs = [{"leaf_index": random.randrange(4096)} for _ in range(args.count)]
+
+        async def simulated():
+            with ProcessPoolExecutor(args.provers) as executor:
+                pipeline = Pipeline(simulated_stages(paths, latencies, workers, executor))
+                return pipeline, await pipeline.run(jobs)
+        run = simulated
+
+    t = time.perf_counter()
+    pipeline, done = asyncio.run(run())
+    elapsed = time.perf_counter() - t
+    failed = [job for job in done if "error" in job]
+    print(pipeline.report())
+    serial = sum(s.service.total for s in pipeline.stages) / max(1, len(done))
+    print(f"{len(done) - len(failed)} withdrawals, {len(failed)} failed, in {elapsed:.1f}s: "
+          f"{(len(done) - len(failed)) / elapsed * 60:.0f}/min pipelined vs {60 / serial:.0f}/min one at a time")
+    for job in failed[:5]:
+        print(f"  failed: {job['error']}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(pipeline.summary(), f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+import argparse
+import heapq
+import json
+import os
+import random
+
+from stealthhub.models import (
+    VARIANTS,
+    data_dir,
+    fit_metric,
+    load_metrics,
+    load_variant_gas,
+    merkle_constraints,
+    multi_merkle_constraints,
+)
+
+DEPOSIT = "deposit"
+WITHDRAW = "withdraw"
+
+# Event kinds, ordered so that simultaneous events resolve arrivals -> proofs -> blocks
+ARRIVAL = 0
+PROVED = 1
+BLOCK = 2
+FLUSH = 3
+
+
+def poisson_trace(duration, deposit_rate, withdraw_rate, seed=0, bursts=()):
+    # Arrival trace [(time, kind)] with rates per hour; bursts are (start, end, multiplier)
+    rng = random.Random(seed)
+    trace = []
+    for kind, rate in ((DEPOSIT, deposit_rate), (WITHDRAW, withdraw_rate)):
+        if rate <= 0:
+            continue
+        peak = rate * max([1] + [m for _, _, m in bursts]) / 3600
+        t = 0.0
+        # Thinning: sample at the peak rate and keep each arrival with probability rate(t) / peak
+        while True:
+            t += rng.expovariate(peak)
+            if t >= duration:
+                break
+            current = rate / 3600
+            for start, end, m in bursts:
+                if start <= t < end:
+                    current *= m
+            if rng.random() < current / peak:
+                trace.append((t, kind))
+    trace.sort()
+    return trace
+
+
+def load_trace(path):
+    # JSON list of [time_seconds, "deposit" | "withdraw"]
+    with open(path, 'r') as f:
+        return sorted((float(t), kind) for t, kind in json.load(f))
+
+
+class Simulator:
+    # Replays an arrival trace through one StealthHub variant. Deposits of SH-I/SH-M go straight
+    # to the mempool; SH-A deposits are batched and need one batch proof first, after which the
+    # batch is one Sha.deposit transaction inserting one commitment, its gas split across the
+    # deposits it carries. Every withdrawal
+    # needs a proof against the root at proving time; on SH-I it fails on-chain once more than
+    # ROOT_HISTORY_SIZE inserts landed in between, and is re-proved.
+    def __init__(self, variant, gas, prove_time, provers=1, block_time=12.0, block_gas_limit=30_000_000,
+                 gas_share=1.0, tree_height=31, batch_size=16, batch_level2=4, batch_delay=60.0,
+                 withdraw_gas=None):
+        spec = VARIANTS[variant]
+        self.variant = variant
+        self.gas = gas
+        self.provers = provers
+        self.block_time = block_time
+        self.block_budget = int(block_gas_limit * gas_share)
+        self.root_history = spec["root_history"]
+        self.batched = spec["batched"]
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        # Shielded-transfer gas (proof verification plus inserts) stands in for withdrawals
+        # unless a measured withdraw cost is given
+        self.withdraw_gas = withdraw_gas
+        self.withdraw_prove = prove_time(merkle_constraints(tree_height))
+        self.batch_prove = prove_time(multi_merkle_constraints(batch_size, tree_height, batch_level2))
+
+    def run(self, trace):
+        events = []
+        seq = 0
+
+        def push(t, kind, payload=None):
+            nonlocal seq
+            heapq.heappush(events, (t, kind, seq, payload))
+            seq += 1
+
+        for t, op in trace:
+            push(t, ARRIVAL, {"op": op, "arrival": t})
+        horizon = trace[-1][0] if trace else 0.0
+        push(self.block_time, BLOCK)
+
+        prover_queue = []
+        busy = 0
+        mempool = []
+        buffer = []
+        flush_at = None
+        inserts = 0
+        done = []
+        failed = 0
+        gas_used = 0
+        blocks = 0
+        full_blocks = 0
+
+        def start_proofs(now):
+            nonlocal busy
+            while busy < self.provers and prover_queue:
+                job = prover_queue.pop(0)
+                job["prove_start"] = now
+                job["root_index"] = inserts
+                busy += 1
+                push(now + job["prove_time"], PROVED, job)
+
+        def flush_batch(now):
+            nonlocal buffer, flush_at
+            if buffer:
+                prover_queue.append({"op": "batch", "items": buffer, "prove_time": self.batch_prove, "queued": now})
+                buffer = []
+            flush_at = None
+
+        while events:
+            now, kind, _, payload = heapq.heappop(events)
+            if kind == ARRIVAL:
+                if payload["op"] == DEPOSIT and not self.batched:
+                    payload["ready"] = now
+                    mempool.append(payload)
+                elif payload["op"] == DEPOSIT:
+                    buffer.append(payload)
+                    if len(buffer) >= self.batch_size:
+                        flush_batch(now)
+                    elif flush_at is None:
+                        flush_at = now + self.batch_delay
+                        push(flush_at, FLUSH, flush_at)
+                else:
+                    payload["prove_time"] = self.withdraw_prove
+                    payload["queued"] = now
+                    prover_queue.append(payload)
+            elif kind == FLUSH:
+                if flush_at == payload:
+                    flush_batch(now)
+            elif kind == PROVED:
+                busy -= 1
+                items = payload["items"] if payload["op"] == "batch" else [payload]
+                for item in items:
+                    item["ready"] = now
+                    item.setdefault("prove_wait", payload["prove_start"] - payload["queued"])
+                    item["root_index"] = payload["root_index"]
+                payload["ready"] = now
+                mempool.append(payload)
+            elif kind == BLOCK:
+                blocks += 1
+                budget = self.block_budget
+                pending = []
+                for tx in mempool:
+                    op = tx["op"]
+                    if op in (DEPOSIT, "batch"):
+                        cost = self.gas["deposit"].cost(inserts)
+                    else:
+                        cost = self.withdraw_gas or self.gas["transfer"].cost(inserts)
+                    if cost > self.block_budget:
+                        raise ValueError(f"a {op} costing {cost} gas never fits a block budget of {self.block_budget}")
+                    if cost > budget:
+                        pending.append(tx)
+                        continue
+                    budget -= cost
+                    gas_used += cost
+                    items = tx["items"] if op == "batch" else [tx]
+                    for item in items:
+                        item["gas"] = item.get("gas", 0) + cost / len(items)
+                    if op == WITHDRAW and self.root_history is not None and inserts - tx["root_index"] >= self.root_history:
+                        # Root fell out of the on-chain history: gas is spent, the proof is redone
+                        failed += 1
+                        tx["prove_time"] = self.withdraw_prove
+                        tx["queued"] = now
+                        tx.pop("prove_wait", None)
+                        prover_queue.append(tx)
+                        continue
+                    if op != WITHDRAW:
+                        inserts += 1
+                    for item in items:
+                        item["included"] = now
+                    done.extend(items)
+                if pending and budget < self.block_budget:
+                    full_blocks += 1
+                mempool = pending
+                if events or mempool or prover_queue or buffer or busy or now < horizon:
+                    push(now + self.block_time, BLOCK)
+            start_proofs(now)
+
+        return self._report(done, failed, gas_used, blocks, full_blocks)
+
+    def _report(self, done, failed, gas_used, blocks, full_blocks):
+        elapsed = max([tx["included"] for tx in done], default=0.0) or 1.0
+        report = {
+            "variant": self.variant,
+            "blocks": blocks,
+            "full_blocks": full_blocks,
+            "gas_used": gas_used,
+            "failed_proofs": failed,
+        }
+        for op in (DEPOSIT, WITHDRAW):
+            txs = [tx for tx in done if tx["op"] == op]
+            latency = sorted(tx["included"] - tx["arrival"] for tx in txs)
+            mempool_wait = sorted(tx["included"] - tx["ready"] for tx in txs)
+            prove_wait = sorted(tx["prove_wait"] for tx in txs if "prove_wait" in tx)
+            report[op] = {
+                "completed": len(txs),
+                "per_hour": len(txs) * 3600 / elapsed,
+                "latency": _percentiles(latency),
+                "mempool_wait": _percentiles(mempool_wait),
+                "prove_wait": _percentiles(prove_wait),
+                # Including the gas of failed attempts; an SH-A deposit pays its share of a batch
+                "gas_per_tx": sum(tx["gas"] for tx in txs) / len(txs) if txs else None,
+            }
+        attempts = report[WITHDRAW]["completed"] + failed
+        report["failed_proof_rate"] = failed / attempts if attempts else 0.0
+        return report
+
+
+def _percentiles(values, qs=(50, 90, 99)):
+    if not values:
+        return {f"p{q}": None for q in qs}
+    return {f"p{q}": values[min(len(values) - 1, int(q / 100 * len(values)))] for q in qs}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate sustained SH-I / SH-M / SH-A throughput under synthetic load")
+    parser.add_argument("--variants", nargs="+", default=list(VARIANTS), choices=list(VARIANTS))
+    parser.add_argument("--trace", help="JSON arrival trace; default is a Poisson trace")
+    parser.add_argument("--duration", type=float, default=3600.0)
+    parser.add_argument("--deposits", type=float, default=2000.0, help="deposits per hour")
+    parser.add_argument("--withdrawals", type=float, default=1000.0, help="withdrawals per hour")
+    parser.add_argument("--burst", type=float, nargs=3, action="append", default=[], metavar=("START", "END", "MULT"))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--provers", type=int, default=4)
+    parser.add_argument("--block-time", type=float, default=12.0)
+    parser.add_argument("--block-gas-limit", type=int, default=30_000_000)
+    parser.add_argument("--gas-share", type=float, default=1.0, help="fraction of each block available to StealthHub")
+    parser.add_argument("--tree-height", type=int, default=31)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--batch-level2", type=int, default=4)
+    parser.add_argument("--batch-delay", type=float, default=60.0)
+    parser.add_argument("--withdraw-gas", type=int, default=None)
+    parser.add_argument("--data-dir", default=data_dir)
+    args = parser.parse_args(argv)
+
+    trace = load_trace(args.trace) if args.trace else poisson_trace(
+        args.duration, args.deposits, args.withdrawals, args.seed, args.burst)
+    prove_time = fit_metric(load_metrics(os.path.join(args.data_dir, 'metrics_data.json')))
+    reports = []
+    for variant in args.variants:
+        sim = Simulator(variant, load_variant_gas(variant, args.data_dir), prove_time, args.provers,
+                        args.block_time, args.block_gas_limit, args.gas_share, args.tree_height,
+                        args.batch_size, args.batch_level2, args.batch_delay, args.withdraw_gas)
+        reports.append(sim.run(trace))
+    print(json.dumps(reports, indent=2))
+
+
+if __name__ == "__main__":
+    main()
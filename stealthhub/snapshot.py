@@ -0,0 +1,331 @@
+import bisect
+import mmap
+import os
+import struct
+import threading
+import zlib
+
+from stealthhub.mmr import MAX_DEPTH, RightMerkleTree
+from stealthhub.mt import Frontier
+
+# Versioned binary snapshot of indexer state, loaded with a single mmap:
+#
+#   header    magic "SHSN", version, tree kind, depth, root ring size, current root index,
+#             stack length, next index, cursor (block number, log index)
+#   sections  (tag, crc32, offset, count) for each array below, then a crc32 of header + table
+#   arrays    32-byte big-endian words, each starting on a 32-byte boundary
+#
+# FRONTIER holds filledSubtrees (Imt) or the insertStack in MAX_DEPTH slots (Mmr), ROOTS the root
+# ring, BASE the zero hashes (Imt) or the initial root (Mmr), and NULLIFIERS the spent nullifier
+# hashes in ascending order. Big-endian words sort like the integers they encode, so membership is
+# a binary search over the mapped bytes and nothing is decoded at load time.
+MAGIC = b"SHSN"
+VERSION = 1
+WORD = 32
+
+KIND_IMT = 0
+KIND_MMR = 1
+
+FRONTIER = 1
+ROOTS = 2
+BASE = 3
+NULLIFIERS = 4
+SECTIONS = (FRONTIER, ROOTS, BASE, NULLIFIERS)
+
+HEADER = struct.Struct("<4sHHIIIIQQQ")
+SECTION = struct.Struct("<IIQQ")
+CRC = struct.Struct("<I")
+
+
+def to_word(x):
+    return x.to_bytes(WORD, "big")
+
+
+def from_word(b):
+    return int.from_bytes(b, "big")
+
+
+class SortedWords:
+    # Read-only sequence of the 32-byte words in a mapped section, in ascending order
+    def __init__(self, buf=b"", offset=0, count=0):
+        self.buf = buf
+        self.offset = offset
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        start = self.offset + i * WORD
+        return bytes(self.buf[start:start + WORD])
+
+    def __contains__(self, word):
+        i = bisect.bisect_left(self, word)
+        return i < self.count and self[i] == word
+
+    def raw(self, lo=0, hi=None):
+        hi = self.count if hi is None else hi
+        return self.buf[self.offset + lo * WORD:self.offset + hi * WORD]
+
+
+class NullifierSet:
+    # Spent nullifiers as the sorted array of the last snapshot plus the ones seen since, minus
+    # the ones a reorg took back out. `removed` may hold nullifiers the base lacks: a snapshot
+    # captured before the removal can still bring them in, and rebase() replays the removals
+    # against whichever base it switches to.
+    def __init__(self, base=None):
+        self.base = base if base is not None else SortedWords()
+        self.added = set()
+        self.removed = set()
+
+    def __contains__(self, nullifier):
+        if nullifier in self.removed:
+            return False
+        return nullifier in self.added or to_word(nullifier) in self.base
+
+    def __len__(self):
+        in_base = sum(1 for x in self.removed if to_word(x) in self.base)
+        return len(self.base) - in_base + sum(1 for x in self.added if to_word(x) not in self.base)
+
+    def add(self, nullifier):
+        # Returns whether the nullifier was new. One re-added after a removal also goes into
+        # `added`, since the snapshot being written may already leave it out of the base.
+        if nullifier in self.removed:
+            self.removed.discard(nullifier)
+            self.added.add(nullifier)
+            return True
+        if nullifier in self:
+            return False
+        self.added.add(nullifier)
+        return True
+
+    def discard(self, nullifier):
+        # Recorded even when the base lacks it, since a snapshot in flight may hold it from `added`
+        self.added.discard(nullifier)
+        self.removed.add(nullifier)
+
+    def rebase(self, base, pending=False):
+        # Switch to a newly written base and keep only the changes it does not reflect yet. While
+        # another snapshot is still being written (`pending`), removals the new base lacks are kept
+        # for that one too.
+        self.base = base
+        self.added = {x for x in self.added if to_word(x) not in base}
+        if not pending:
+            self.removed = {x for x in self.removed if to_word(x) in base}
+
+
+def _merge(base, added, removed=()):
+    # Sorted base words with the sorted new ones spliced in and the removed ones cut out; runs of
+    # the base are copied whole. Returns (chunks, word count).
+    chunks = []
+    count = len(base)
+    lo = 0
+    for word, keep in sorted([(w, True) for w in added] + [(w, False) for w in removed]):
+        i = bisect.bisect_left(base, word, lo)
+        chunks.append(base.raw(lo, i))
+        present = i < len(base) and base[i] == word
+        if keep and not present:
+            chunks.append(word)
+            count += 1
+            lo = i
+        elif not keep and present:
+            count -= 1
+            lo = i + 1
+        else:
+            lo = i
+    chunks.append(base.raw(lo))
+    return chunks, count
+
+
+def capture(tree, nullifiers, cursor):
+    # Copies what a snapshot needs, so the caller can release its lock before encoding.
+    # The mapped base is shared, not copied: it is immutable until the next rebase.
+    if isinstance(tree, Frontier):
+        kind = KIND_IMT
+        frontier = list(tree.filled_subtrees)
+        roots = list(tree.roots)
+        base = list(tree.zeros)
+        root_index = tree.current_root_index
+        next_index = tree.next_index
+        depth = tree.depth
+    else:
+        kind = KIND_MMR
+        frontier = list(tree.insert_stack)
+        roots = list(tree.roots)
+        base = [tree.init_root]
+        root_index = len(tree.roots) - 1
+        next_index = tree.current_index
+        depth = MAX_DEPTH
+    added = sorted(nullifiers.added)
+    removed = sorted(nullifiers.removed)
+    return {
+        "kind": kind,
+        "depth": depth,
+        "history_size": tree.history_size if kind == KIND_MMR else len(tree.roots),
+        "root_index": root_index,
+        "next_index": next_index,
+        "cursor": cursor,
+        "frontier": frontier,
+        "roots": roots,
+        "base": base,
+        "nullifier_base": nullifiers.base,
+        "added": added,
+        "removed": removed,
+    }
+
+
+def encode(state):
+    # Returns the snapshot as a list of byte chunks
+    frontier = state["frontier"]
+    nullifiers, count = _merge(state["nullifier_base"], [to_word(x) for x in state["added"]],
+                               [to_word(x) for x in state["removed"]])
+    slots = state["depth"] if state["kind"] == KIND_IMT else MAX_DEPTH
+    arrays = {
+        FRONTIER: [b"".join(map(to_word, frontier)) + bytes(WORD * (slots - len(frontier)))],
+        ROOTS: [b"".join(map(to_word, state["roots"]))],
+        BASE: [b"".join(map(to_word, state["base"]))],
+        NULLIFIERS: nullifiers,
+    }
+    counts = {
+        FRONTIER: slots,
+        ROOTS: len(state["roots"]),
+        BASE: len(state["base"]),
+        NULLIFIERS: count,
+    }
+
+    header = HEADER.pack(
+        MAGIC, VERSION, state["kind"], state["depth"], state["history_size"], state["root_index"],
+        len(frontier), state["next_index"], state["cursor"][0], state["cursor"][1] + 1,
+    )
+    offset = HEADER.size + SECTION.size * len(SECTIONS) + CRC.size
+    offset += -offset % WORD
+    table = []
+    for tag in SECTIONS:
+        crc = 0
+        for chunk in arrays[tag]:
+            crc = zlib.crc32(chunk, crc)
+        table.append(SECTION.pack(tag, crc, offset, counts[tag]))
+        offset += counts[tag] * WORD
+    head = header + b"".join(table)
+    head += CRC.pack(zlib.crc32(head))
+    head += bytes(-len(head) % WORD)
+    return [head] + [chunk for tag in SECTIONS for chunk in arrays[tag]]
+
+
+def write(path, state):
+    # Written next to the target and renamed over it, so readers only ever map a complete file
+    tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    with open(tmp, "wb") as f:
+        for chunk in encode(state):
+            f.write(chunk)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class Snapshot:
+    def __init__(self, path, verify=True):
+        with open(path, "rb") as f:
+            self.buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.buf) < HEADER.size or self.buf[:4] != MAGIC:
+            raise ValueError(f"{path} is not a snapshot")
+        (_, self.version, self.kind, self.depth, self.history_size, self.root_index, self.stack_length,
+         self.next_index, block, log_index) = HEADER.unpack_from(self.buf, 0)
+        if self.version != VERSION:
+            raise ValueError(f"unsupported snapshot version {self.version}")
+        self.cursor = (block, log_index - 1)
+
+        end = HEADER.size + SECTION.size * len(SECTIONS)
+        (crc,) = CRC.unpack_from(self.buf, end)
+        if zlib.crc32(self.buf[:end]) != crc:
+            raise ValueError(f"{path}: header checksum mismatch")
+        self.sections = {}
+        for i in range(len(SECTIONS)):
+            tag, crc, offset, count = SECTION.unpack_from(self.buf, HEADER.size + i * SECTION.size)
+            if offset + count * WORD > len(self.buf):
+                raise ValueError(f"{path}: section {tag} is truncated")
+            if verify and zlib.crc32(memoryview(self.buf)[offset:offset + count * WORD]) != crc:
+                raise ValueError(f"{path}: section {tag} checksum mismatch")
+            self.sections[tag] = SortedWords(self.buf, offset, count)
+
+    def words(self, tag, count=None):
+        section = self.sections[tag]
+        return [from_word(section[i]) for i in range(len(section) if count is None else count)]
+
+    def tree(self, hash_fn=None):
+        frontier = self.words(FRONTIER, self.stack_length)
+        roots = self.words(ROOTS)
+        base = self.words(BASE)
+        kwargs = {} if hash_fn is None else {"hash_fn": hash_fn}
+        if self.kind == KIND_IMT:
+            return Frontier.from_state(self.depth, base, frontier, roots, self.root_index, self.next_index, **kwargs)
+        return RightMerkleTree.from_state(base[0], frontier, roots, self.next_index, self.history_size, **kwargs)
+
+    def nullifiers(self):
+        return NullifierSet(self.sections[NULLIFIERS])
+
+
+class SnapshotWriter:
+    # Encodes and writes snapshots on a background thread. submit() never waits: a state submitted
+    # while a write is running replaces any older pending one, so only the newest state is written.
+    # A failed write does not stop the thread; its exception is raised by the next flush() or close().
+    def __init__(self, path, on_written=None):
+        self.path = path
+        self.on_written = on_written
+        self._pending = None
+        self._cond = threading.Condition()
+        self._busy = False
+        self._stop = False
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, state):
+        with self._cond:
+            self._pending = state
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._stop:
+                    self._cond.wait()
+                if self._pending is None:
+                    return
+                state, self._pending = self._pending, None
+                self._busy = True
+            error = None
+            try:
+                write(self.path, state)
+                if self.on_written is not None:
+                    self.on_written(self.path, state)
+            except Exception as e:
+                error = e
+            with self._cond:
+                if error is not None and self._error is None:
+                    self._error = error
+                self._busy = False
+                self._cond.notify_all()
+
+    @property
+    def pending(self):
+        # Whether a newer state than the one being written is waiting
+        with self._cond:
+            return self._pending is not None
+
+    def flush(self):
+        with self._cond:
+            while self._pending is not None or self._busy:
+                self._cond.wait()
+            error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            with self._cond:
+                self._stop = True
+                self._cond.notify_all()
+            self._thread.join()
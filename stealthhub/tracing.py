@@ -0,0 +1,219 @@
+import argparse
+import json
+import os
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import psutil
+except ImportError:  # fall back to /proc on Linux; macOS needs `pip install psutil`
+    psutil = None
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.join(base_dir, '..')
+
+_ERRORS = (OSError, IndexError, ValueError) + ((psutil.Error,) if psutil is not None else ())
+_CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _proc_tree(pid):
+    # pid plus all descendants (snarkjs and generate_witness.js run under node, sometimes via a shell)
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            return [root] + root.children(recursive=True)
+        except psutil.NoSuchProcess:
+            return []
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    tree, stack = [], [pid]
+    while stack:
+        p = stack.pop()
+        tree.append(p)
+        stack.extend(children.get(p, []))
+    return tree
+
+
+def _children_cpu():
+    # CPU seconds of every terminated, reaped child and the descendants they reaped
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _sample(pid):
+    # Returns (rss bytes, cpu seconds) summed over the process tree
+    rss = 0
+    cpu = 0.0
+    for proc in _proc_tree(pid):
+        try:
+            if psutil is not None:
+                rss += proc.memory_info().rss
+                times = proc.cpu_times()
+                cpu += times.user + times.system
+            else:
+                with open(f"/proc/{proc}/stat") as f:
+                    fields = f.read().rsplit(")", 1)[1].split()
+                cpu += (int(fields[11]) + int(fields[12])) / _CLK_TCK
+                with open(f"/proc/{proc}/statm") as f:
+                    rss += int(f.read().split()[1]) * _PAGE
+        except _ERRORS:
+            continue
+    return rss, cpu
+
+
+class Tracer:
+    # Records pipeline stages as Chrome-trace "X" events and samples RSS / CPU of every
+    # subprocess as "C" counter events; load the output in chrome://tracing or ui.perfetto.dev
+    def __init__(self, interval=0.1):
+        self.interval = interval
+        self.events = []
+        self.stages = []
+        self._t0 = time.perf_counter()
+        self._stack = []
+        self._lock = threading.Lock()
+
+    def _now_us(self):
+        return (time.perf_counter() - self._t0) * 1e6
+
+    def _emit(self, event):
+        event.setdefault("pid", os.getpid())
+        event.setdefault("tid", threading.get_ident() % 2 ** 31)
+        with self._lock:
+            self.events.append(event)
+
+    @contextmanager
+    def stage(self, name, **args):
+        record = {"name": name, "parent": self._stack[-1]["name"] if self._stack else None,
+                  "peak_rss": 0, "cpu": 0.0, "samples": 0}
+        self._stack.append(record)
+        start = self._now_us()
+        try:
+            yield record
+        finally:
+            self._stack.pop()
+            record["wall"] = (self._now_us() - start) / 1e6
+            if self._stack:
+                # Roll subprocess usage up into the enclosing stage
+                parent = self._stack[-1]
+                parent["peak_rss"] = max(parent["peak_rss"], record["peak_rss"])
+                parent["cpu"] += record["cpu"]
+            self._emit({"name": name, "cat": "stage", "ph": "X", "ts": start, "dur": record["wall"] * 1e6, "args": args})
+            with self._lock:
+                self.stages.append(record)
+
+    def run(self, cmd, name=None, **popen_kwargs):
+        # Runs cmd as its own stage while a sampler thread polls the child's process tree
+        name = name or os.path.basename(cmd[0])
+        with self.stage(name, cmd=" ".join(map(str, cmd))) as record:
+            # Sampling misses descendants that exit between samples; the rusage delta over the
+            # reaped child covers them (other stages running concurrently would be counted too)
+            cpu_before = _children_cpu()
+            proc = subprocess.Popen([str(c) for c in cmd], **popen_kwargs)
+            done = threading.Event()
+
+            def sampler():
+                while not done.is_set():
+                    rss, cpu = _sample(proc.pid)
+                    if rss:
+                        now = self._now_us()
+                        record["peak_rss"] = max(record["peak_rss"], rss)
+                        record["cpu"] = max(record["cpu"], cpu)
+                        record["samples"] += 1
+                        self._emit({"name": f"{name} rss_MB", "ph": "C", "ts": now, "args": {"rss_MB": rss / 2 ** 20}})
+                        self._emit({"name": f"{name} cpu_s", "ph": "C", "ts": now, "args": {"cpu_s": cpu}})
+                    done.wait(self.interval)
+
+            thread = threading.Thread(target=sampler, daemon=True)
+            thread.start()
+            try:
+                returncode = proc.wait()
+            finally:
+                done.set()
+                thread.join()
+            record["cpu"] = max(record["cpu"], _children_cpu() - cpu_before)
+            record["returncode"] = returncode
+            if returncode != 0:
+                raise subprocess.CalledProcessError(returncode, cmd)
+            return returncode
+
+    def write(self, path):
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
+
+    def summary(self):
+        # One row per stage: wall time, peak RSS, CPU seconds and average CPU utilisation
+        rows = []
+        for s in sorted(self.stages, key=lambda s: -s["wall"]):
+            util = s["cpu"] / s["wall"] * 100 if s["wall"] and s["cpu"] else 0.0
+            rows.append((s["name"], s["wall"], s["peak_rss"] / 2 ** 20, s["cpu"], util))
+        lines = [f"{'stage':32s} {'wall_s':>10s} {'peak_MB':>10s} {'cpu_s':>10s} {'cpu%':>7s}"]
+        lines += [f"{n:32s} {w:10.2f} {r:10.1f} {c:10.2f} {u:7.1f}" for n, w, r, c, u in rows]
+        return "\n".join(lines)
+
+
+def groth16_pipeline(tracer, circuit_name, ptau_name, input_name, proof_sys="groth16", max_old_space=12000):
+    # The compile -> witness -> setup -> prove -> verify steps of run_groth16.sh, traced
+    target_dir = os.path.join(repo_dir, ".target")
+    gen_dir = os.path.join(target_dir, f"{input_name}_js")
+    circuit = os.path.join(repo_dir, f"{circuit_name}.circom")
+    ptau = os.path.join(repo_dir, ".ptau", f"{ptau_name}.ptau")
+    inputs = os.path.join(repo_dir, "circuit_input", f"{input_name}.json")
+    r1cs = os.path.join(target_dir, f"{input_name}.r1cs")
+    witness = os.path.join(target_dir, "witness.wtns")
+    zkey = os.path.join(target_dir, f"{input_name}_{proof_sys}_final.zkey")
+    vkey = os.path.join(target_dir, f"{proof_sys}_verification_key.json")
+    proof = os.path.join(target_dir, f"{proof_sys}_proof.json")
+    public = os.path.join(target_dir, f"{proof_sys}_public.json")
+    env = dict(os.environ, NODE_OPTIONS=f"--max-old-space-size={max_old_space}")
+    os.makedirs(target_dir, exist_ok=True)
+
+    with tracer.stage(f"{input_name} {proof_sys}"):
+        tracer.run(["circom", circuit, "--r1cs", "--wasm", "--sym", "--output", target_dir], "1.1 compile")
+        tracer.run(["node", os.path.join(gen_dir, "generate_witness.js"), os.path.join(gen_dir, f"{input_name}.wasm"),
+                    inputs, witness], "1.2 witness")
+        tracer.run(["snarkjs", proof_sys, "setup", r1cs, ptau, zkey], "2.1 setup", env=env)
+        tracer.run(["snarkjs", "zkey", "export", "verificationkey", zkey, vkey], "2.5 export vkey", env=env)
+        tracer.run(["snarkjs", proof_sys, "prove", zkey, witness, proof, public], "3.1 prove", env=env)
+        tracer.run(["snarkjs", proof_sys, "verify", vkey, public, proof], "3.2 verify", env=env)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Trace the Groth16 pipeline of run_groth16.sh with RSS / CPU sampling")
+    parser.add_argument("circuits", nargs="+", help="e.g. test/circuits/multi_merkle_4_4_4")
+    parser.add_argument("--ptau", default="pot21_final")
+    parser.add_argument("--proof-sys", default="groth16")
+    parser.add_argument("--interval", type=float, default=0.1, help="sampling interval in seconds")
+    parser.add_argument("--output", default=os.path.join(repo_dir, ".target", "trace.json"))
+    args = parser.parse_args(argv)
+
+    tracer = Tracer(args.interval)
+    try:
+        for circuit_name in args.circuits:
+            groth16_pipeline(tracer, circuit_name, args.ptau, os.path.basename(circuit_name), args.proof_sys)
+    finally:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        tracer.write(args.output)
+        print(tracer.summary())
+        print(f"Trace written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+def bigint_to_array(n, k, x):
+    # Split x into k limbs of n bits, least significant first (bigint_to_array in src/utils.js)
+    mask = (1 << n) - 1
+    ret = []
+    for _ in range(k):
+        ret.append(x & mask)
+        x >>= n
+    return ret
+
+
+def array_to_bigint(n, limbs):
+    x = 0
+    for limb in reversed(limbs):
+        x = (x << n) | limb
+    return x
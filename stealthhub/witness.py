@@ -0,0 +1,215 @@
+import argparse
+import json
+import os
+import queue
+import struct
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from stealthhub.circom import parse_wtns
+
+# Warm witness generation. run_groth16.sh step 1.2 starts node, loads and compiles the wasm and
+# writes witness.wtns for every proof; here each worker pays that once per circuit and then takes
+# input dicts and returns .wtns bytes in memory.
+base_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.join(base_dir, '..')
+target_dir = os.path.join(repo_dir, '.target')
+worker_js = os.path.join(repo_dir, 'scripts', 'witness_worker.js')
+
+OK = 0
+ERROR = 1
+READY = 2
+FRAME = struct.Struct("<BI")
+
+
+class WitnessError(RuntimeError):
+    pass
+
+
+def _signals(value):
+    # JSON for the calculator: ints become decimal strings, nested lists are kept
+    if isinstance(value, dict):
+        return {k: _signals(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_signals(v) for v in value]
+    return str(value)
+
+
+def _read_exact(stream, n):
+    data = stream.read(n)
+    if len(data) != n:
+        raise WitnessError("witness worker exited")
+    return data
+
+
+class WasmWorker:
+    # One node process holding the compiled circuit wasm (scripts/witness_worker.js)
+    def __init__(self, wasm):
+        self.wasm = wasm
+        self.proc = subprocess.Popen(["node", worker_js, wasm], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        status, _ = self._receive()
+        if status != READY:
+            raise WitnessError(f"witness worker for {wasm} failed to start")
+
+    def _receive(self):
+        status, length = FRAME.unpack(_read_exact(self.proc.stdout, FRAME.size))
+        return status, _read_exact(self.proc.stdout, length)
+
+    def calculate(self, inputs):
+        request = json.dumps(_signals(inputs)).encode()
+        self.proc.stdin.write(struct.pack("<I", len(request)) + request)
+        self.proc.stdin.flush()
+        status, payload = self._receive()
+        if status != OK:
+            raise WitnessError(payload.decode(errors="replace"))
+        return payload
+
+    def alive(self):
+        return self.proc.poll() is None
+
+    def close(self):
+        if self.proc.stdin:
+            self.proc.stdin.close()
+        self.proc.wait()
+
+
+class CppWorker:
+    # The `circom --c` build reads and writes files and exits, so it cannot be kept warm; it is run
+    # once per witness with the files in a tmpfs directory where one exists
+    def __init__(self, binary):
+        self.binary = binary
+        self.tmp = tempfile.mkdtemp(prefix="wtns-", dir="/dev/shm" if os.path.isdir("/dev/shm") else None)
+
+    def calculate(self, inputs):
+        inp = os.path.join(self.tmp, "input.json")
+        out = os.path.join(self.tmp, "witness.wtns")
+        with open(inp, "w") as f:
+            json.dump(_signals(inputs), f)
+        proc = subprocess.run([self.binary, inp, out], capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise WitnessError(proc.stderr.strip() or proc.stdout.strip())
+        with open(out, "rb") as f:
+            return f.read()
+
+    def alive(self):
+        return True
+
+    def close(self):
+        for name in os.listdir(self.tmp):
+            os.remove(os.path.join(self.tmp, name))
+        os.rmdir(self.tmp)
+
+
+def circuit_paths(name, directory=target_dir):
+    # Where `circom --wasm --c --output .target` puts the two builds of <name>.circom
+    return {
+        "wasm": os.path.join(directory, f"{name}_js", f"{name}.wasm"),
+        "cpp": os.path.join(directory, f"{name}_cpp", name),
+    }
+
+
+class WitnessPool:
+    # `workers` warm workers for one circuit; calculate() is thread-safe and blocks until a worker
+    # is free. A worker that dies is replaced on its next use.
+    def __init__(self, name, backend="wasm", workers=None, directory=target_dir):
+        self.name = name
+        self.backend = backend
+        self.path = circuit_paths(name, directory)[backend]
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"{self.path} not found; compile {name} with circom --{backend} first")
+        self.size = workers or os.cpu_count() or 1
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._all = []
+        with ThreadPoolExecutor(self.size) as executor:
+            for worker in executor.map(lambda _: self._spawn(), range(self.size)):
+                self._idle.put(worker)
+
+    def _spawn(self):
+        worker = WasmWorker(self.path) if self.backend == "wasm" else CppWorker(self.path)
+        with self._lock:
+            self._all.append(worker)
+        return worker
+
+    def calculate(self, inputs):
+        worker = self._idle.get()
+        try:
+            if not worker.alive():
+                worker = self._spawn()
+            return worker.calculate(inputs)
+        finally:
+            self._idle.put(worker)
+
+    def witness(self, inputs):
+        return parse_wtns(self.calculate(inputs))
+
+    def map(self, inputs_list):
+        with ThreadPoolExecutor(self.size) as executor:
+            return list(executor.map(self.calculate, inputs_list))
+
+    def close(self):
+        with self._lock:
+            workers, self._all = self._all, []
+        for worker in workers:
+            worker.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def spawn_per_witness(name, inputs, directory=target_dir):
+    # What run_groth16.sh does: a fresh node process and wasm compile per witness
+    gen_dir = os.path.join(directory, f"{name}_js")
+    with tempfile.TemporaryDirectory() as tmp:
+        inp = os.path.join(tmp, "input.json")
+        out = os.path.join(tmp, "witness.wtns")
+        with open(inp, "w") as f:
+            json.dump(_signals(inputs), f)
+        subprocess.run(["node", os.path.join(gen_dir, "generate_witness.js"), os.path.join(gen_dir, f"{name}.wasm"),
+                        inp, out], check=True, capture_output=True)
+        with open(out, "rb") as f:
+            return f.read()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time warm pooled witness generation against one node process per witness")
+    parser.add_argument("name", help="circuit under .target/, e.g. spend_1024")
+    parser.add_argument("--input", help="default circuit_input/<name>.json")
+    parser.add_argument("--backend", choices=["wasm", "cpp"], default="wasm")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--count", type=int, default=20)
+    parser.add_argument("--output", help="write the last .wtns here")
+    args = parser.parse_args(argv)
+
+    with open(args.input or os.path.join(repo_dir, "circuit_input", f"{args.name}.json")) as f:
+        inputs = json.load(f)
+
+    t = time.perf_counter()
+    with WitnessPool(args.name, args.backend, args.workers) as pool:
+        warmup = time.perf_counter() - t
+        t = time.perf_counter()
+        results = pool.map([inputs] * args.count)
+        pooled = time.perf_counter() - t
+    print(f"pool ({args.backend}, {pool.size} workers): warm-up {warmup:.3f}s, {args.count} witnesses {pooled:.3f}s "
+          f"({pooled / args.count * 1000:.1f} ms each)")
+
+    t = time.perf_counter()
+    reference = spawn_per_witness(args.name, inputs)
+    spawned = time.perf_counter() - t
+    print(f"node generate_witness.js per witness: {spawned * 1000:.1f} ms each")
+    if parse_wtns(results[-1]) != parse_wtns(reference):
+        raise SystemExit("pooled witness differs from generate_witness.js")
+
+    if args.output:
+        with open(args.output, "wb") as f:
+            f.write(results[-1])
+
+
+if __name__ == "__main__":
+    main()
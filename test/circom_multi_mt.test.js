@@ -1,6 +1,7 @@
 const chai = require("chai");
 const path = require("path");
 const fs = require("fs");
+const { execFileSync } = require("child_process");
 const wasm_tester = require("circom_tester").wasm;
 const { MT } = require("../src/mt");
 const { poseidon2_hash } = require("../src/utils");
@@ -129,6 +130,48 @@ runTest("multi_merkle_7_7_7.circom", 7, 7, 7);
 runTest("multi_merkle_8_8_8.circom", 8, 8, 8);
 runTest("multi_merkle_9_9_9.circom", 9, 9, 9);
 
+/**
+ * Runs the arity-4 checker on the inputs BatchAggregator(number, level1, level2, arity=4) writes
+ * through `python3 -m stealthhub inputs`, and on the same inputs with one wrong pathIndices value.
+ * @param {string} circuitFile - The filename of the MultiQuadMerkleTreeCheckerPoseidon2 circuit.
+ */
+function runQuadTest(circuitFile) {
+    describe(`Testing ${circuitFile} on BatchAggregator(arity=4) inputs`, function () {
+        let circuit;
+        let input;
+
+        this.timeout(1000000);
+
+        before(async () => {
+            circuit = await wasm_tester(path.join(__dirname, "circuits", circuitFile));
+            const baseName = path.basename(circuitFile, ".circom");
+            const inputPath = execFileSync("python3", ["-m", "stealthhub", "inputs", baseName],
+                { cwd: path.join(__dirname, ".."), encoding: "utf8" }).trim().split("\n").pop();
+            input = JSON.parse(fs.readFileSync(inputPath, "utf8"));
+        });
+
+        it("should satisfy all constraints for the aggregated batch", async () => {
+            const witness = await circuit.calculateWitness(input);
+            await circuit.checkConstraints(witness);
+        });
+
+        it("should reject a wrong pathIndices value", async () => {
+            const bad = JSON.parse(JSON.stringify(input));
+            bad.pathIndices2[0][0] = String((Number(bad.pathIndices2[0][0]) + 1) % 4);
+            let rejected = false;
+            try {
+                const witness = await circuit.calculateWitness(bad);
+                await circuit.checkConstraints(witness);
+            } catch (error) {
+                rejected = true;
+            }
+            chai.expect(rejected).to.equal(true);
+        });
+    });
+}
+
+runQuadTest("multi_quad_merkle_4_2_2.circom");
+
 // runTest("multi_merkle_10_20_10.circom", 10, 20, 10);
 // runTest("multi_merkle_11_20_10.circom", 11, 20, 10);
 // runTest("multi_merkle_12_20_10.circom", 12, 20, 10);
@@ -0,0 +1,5 @@
+pragma circom 2.1.6;
+
+include "../../circuits/utils.circom";
+
+component main = MultiQuadMerkleTreeCheckerPoseidon2(4, 2, 2);